@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 性能测试
+Factorio Mod Localization Tool - Benchmarks
+
+生成模拟的模组目录（模组数、大型资源文件、语言和 .cfg 大小可调），
+测量扫描、读取和写入的耗时，结果以JSON输出，便于比较不同版本。
+
+示例:
+    python factorio_benchmark.py --mods 200 --assets 2 --asset-size 8 --output before.json
+    python factorio_benchmark.py --mods 200 --assets 2 --asset-size 8 --compare before.json
+    python factorio_benchmark.py --mods 50 --trace bench.trace.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from factorio_mod_core import (
+    ScanIndex, analyze_mod, commit_mod_changes, get_locale_files, invalidate_archive_index, modify_zip_file,
+    read_locale_file, scan_directory, index_locale_texts
+)
+from factorio_instrumentation import INSTRUMENTATION
+from factorio_text_index import LocaleTextIndex
+
+BENCHMARK_VERSION = 1
+
+# 比较结果时超过该比例视为变慢
+REGRESSION_THRESHOLD = 1.1
+
+_WORDS = ("iron", "copper", "steel", "plate", "gear", "wheel", "circuit", "belt", "inserter", "assembler",
+          "furnace", "drill", "pipe", "pump", "tank", "wagon", "signal", "turret", "ammo", "module")
+
+
+def _locale_text(rng: random.Random, size: int, language: str) -> str:
+    """生成约 size 字节的语言文件"""
+    lines = []
+    written = 0
+    section = 0
+    while written < size:
+        if section == 0 or rng.random() < 0.05:
+            lines.append(f"\n[section-{section}]\n" if section else f"[section-{section}]\n")
+            section += 1
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 12)))
+        line = f"{rng.choice(_WORDS)}-{len(lines)}={language} {words}\n"
+        lines.append(line)
+        written += len(line.encode('utf-8'))
+    return "".join(lines)
+
+
+def generate_mod_collection(directory: Path, mod_count: int, assets: int = 1, asset_size: int = 1024 * 1024,
+                            languages: Optional[List[str]] = None, locale_files: int = 2,
+                            cfg_size: int = 8 * 1024, seed: int = 0) -> List[Path]:
+    """在 directory 中生成 mod_count 个模拟模组，返回ZIP路径
+
+    每个模组包含 info.json、一些脚本、assets 个 asset_size 字节的资源文件（随机数据，不压缩，与PNG类似）
+    以及每种语言 locale_files 个约 cfg_size 字节的语言文件。相同的参数总是生成相同的内容。
+    """
+    languages = languages or ['en', 'de']
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(mod_count):
+        name = f"bench-mod-{i}"
+        version = f"1.{i // 100}.{i % 100}"
+        root = f"{name}_{version}"
+        path = directory / f"{root}.zip"
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(f"{root}/info.json", json.dumps({
+                'name': name, 'version': version, 'title': f"Benchmark Mod {i}", 'factorio_version': '1.1'
+            }))
+            zf.writestr(f"{root}/data.lua", "require('prototypes.items')\n" * 50)
+            for j in range(10):
+                zf.writestr(f"{root}/prototypes/part{j}.lua", f"-- part {j}\n" + "data:extend({})\n" * 200)
+            for j in range(assets):
+                data = rng.getrandbits(asset_size * 8).to_bytes(asset_size, 'little') if asset_size else b''
+                zf.writestr(f"{root}/graphics/asset{j}.png", data, compress_type=zipfile.ZIP_STORED)
+            for language in languages:
+                for j in range(locale_files):
+                    zf.writestr(f"{root}/locale/{language}/strings{j}.cfg", _locale_text(rng, cfg_size, language))
+        paths.append(path)
+    return paths
+
+
+def measure(func: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> List[float]:
+    """运行 repeat 次，返回每次的耗时(秒)；setup 在每次计时前运行，不计入耗时"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings: List[float], items: int) -> Dict:
+    """汇总一项测试的耗时"""
+    return {
+        'items': items,
+        'runs': [round(t, 6) for t in timings],
+        'min_s': round(min(timings), 6),
+        'median_s': round(statistics.median(timings), 6),
+        'mean_s': round(statistics.mean(timings), 6),
+        'per_item_ms': round(min(timings) * 1000 / max(1, items), 4)
+    }
+
+
+def run_benchmarks(mods_dir: Path, work_dir: Path, languages: List[str], repeat: int = 3, write_mods: int = 10,
+                   log: Callable[[str], None] = lambda message: None) -> Dict[str, Dict]:
+    """在 mods_dir 上运行所有测试，work_dir 存放索引等临时文件
+
+    写入测试会修改前 write_mods 个模组并在旁边留下一个备份。
+    """
+    paths = sorted(mods_dir.glob('*.zip'))
+    results = {}
+
+    def invalidate_all():
+        for path in paths:
+            invalidate_archive_index(path)
+
+    def record(name: str, timings: List[float], items: int):
+        results[name] = summarize(timings, items)
+        log(f"{name}: {results[name]['min_s'] * 1000:.1f} ms ({results[name]['per_item_ms']:.3f} ms/项)")
+
+    # 分析单个模组（每次都重新读取中央目录）
+    record('analyze_mod', measure(lambda: [analyze_mod(path) for path in paths], repeat, invalidate_all), len(paths))
+
+    # 完整扫描：无索引（首次启动）、有索引（再次启动）；扫描后建立文本索引
+    def cold_scan_setup():
+        invalidate_all()
+        shutil.rmtree(work_dir / 'scan', ignore_errors=True)
+
+    record('scan_directory_cold', measure(
+        lambda: scan_directory(mods_dir, ScanIndex(work_dir / 'scan' / 'scan_index.json')),
+        repeat, cold_scan_setup), len(paths))
+    record('scan_directory_warm', measure(
+        lambda: scan_directory(mods_dir, ScanIndex(work_dir / 'scan' / 'scan_index.json')),
+        repeat, invalidate_all), len(paths))
+
+    mods_data = scan_directory(mods_dir, ScanIndex(work_dir / 'scan' / 'scan_index.json'))
+
+    def text_index_setup():
+        invalidate_all()
+        (work_dir / 'scan' / 'locale_text_index.sqlite3').unlink(missing_ok=True)
+
+    def text_index_build():
+        text_index = LocaleTextIndex(work_dir / 'scan' / 'locale_text_index.sqlite3')
+        try:
+            index_locale_texts(mods_data, text_index)
+        finally:
+            text_index.close()
+
+    record('index_locale_texts_cold', measure(text_index_build, repeat, text_index_setup), len(paths))
+
+    # 列出和读取语言文件（中央目录索引已缓存）
+    for path in paths:
+        analyze_mod(path)
+    locale_files = [(path, language, filename)
+                    for path in paths for language in languages
+                    for filename in get_locale_files(path, language)]
+    record('get_locale_files', measure(
+        lambda: [get_locale_files(path, language) for path in paths for language in languages], repeat),
+        len(paths) * len(languages))
+    record('read_locale_file', measure(
+        lambda: [read_locale_file(path, language, filename) for path, language, filename in locale_files], repeat),
+        len(locale_files))
+
+    # 写入：直接替换语言文件，以及带增量备份的完整提交
+    targets = paths[:write_mods]
+    content = _locale_text(random.Random(1), 8 * 1024, 'zh-CN')
+    record('modify_zip_file', measure(
+        lambda: [modify_zip_file(path, 'zh-CN', 'strings0.cfg', content) for path in targets], repeat),
+        len(targets))
+    counter = iter(range(1 << 30))
+    record('commit_mod_changes_delta', measure(
+        lambda: [commit_mod_changes(path, {('zh-CN', 'strings0.cfg'): f"{content}n={next(counter)}\n"},
+                                    keep_backups=1) for path in targets], repeat),
+        len(targets))
+    return results
+
+
+def compare_results(current: Dict, previous: Dict) -> List[str]:
+    """与之前的结果比较，返回每项测试的变化"""
+    lines = []
+    for name, result in current['results'].items():
+        old = previous.get('results', {}).get(name)
+        if not old:
+            lines.append(f"{name}: 新增")
+            continue
+        ratio = result['min_s'] / old['min_s'] if old['min_s'] else float('inf')
+        marker = "  <-- 变慢" if ratio > REGRESSION_THRESHOLD else ""
+        lines.append(f"{name}: {old['min_s'] * 1000:.1f} ms -> {result['min_s'] * 1000:.1f} ms ({ratio:.2f}x){marker}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="异星工厂模组汉化工具性能测试")
+    parser.add_argument('--mods', type=int, default=100, help="模拟模组数")
+    parser.add_argument('--assets', type=int, default=1, help="每个模组的大型资源文件数")
+    parser.add_argument('--asset-size', type=float, default=1, help="每个资源文件的大小（MB）")
+    parser.add_argument('--languages', default='en,de,ru,ja', help="语言列表（逗号分隔）")
+    parser.add_argument('--locale-files', type=int, default=2, help="每种语言的语言文件数")
+    parser.add_argument('--cfg-size', type=float, default=8, help="每个语言文件的大小（KB）")
+    parser.add_argument('--write-mods', type=int, default=10, help="写入测试使用的模组数")
+    parser.add_argument('--repeat', type=int, default=3, help="每项测试的重复次数（取最小值）")
+    parser.add_argument('--seed', type=int, default=0, help="生成模组的随机种子")
+    parser.add_argument('--dir', help="模拟模组目录（默认使用临时目录，测试后删除；目录中已有模组时直接使用，"
+                                      "写入测试会修改其中的模组）")
+    parser.add_argument('--output', help="结果JSON文件（默认输出到stdout）")
+    parser.add_argument('--compare', help="与之前的结果JSON比较")
+    parser.add_argument('--trace', metavar='FILE', help="同时记录热点路径的耗时并写入 Chrome 跟踪文件"
+                                                       "（会略微增加测得的耗时）")
+    args = parser.parse_args(argv)
+
+    def log(message: str):
+        print(message, file=sys.stderr)
+
+    temp_dir = Path(tempfile.mkdtemp(prefix='factorio_benchmark_'))
+    mods_dir = Path(args.dir) if args.dir else temp_dir / 'mods'
+    config = {
+        'mods': args.mods,
+        'assets': args.assets,
+        'asset_size': int(args.asset_size * 1024 * 1024),
+        'languages': [language for language in args.languages.split(',') if language],
+        'locale_files': args.locale_files,
+        'cfg_size': int(args.cfg_size * 1024),
+        'write_mods': args.write_mods,
+        'repeat': args.repeat,
+        'seed': args.seed
+    }
+    try:
+        if not any(mods_dir.glob('*.zip')):
+            log(f"正在生成 {args.mods} 个模拟模组: {mods_dir}")
+            generate_mod_collection(mods_dir, args.mods, config['assets'], config['asset_size'],
+                                    config['languages'], config['locale_files'], config['cfg_size'], args.seed)
+        INSTRUMENTATION.enable(bool(args.trace))
+        results = run_benchmarks(mods_dir, temp_dir / 'work', config['languages'], args.repeat,
+                                 args.write_mods, log)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    if args.trace:
+        INSTRUMENTATION.dump_trace(Path(args.trace))
+        log(f"跟踪文件: {args.trace}")
+
+    report = {
+        'version': BENCHMARK_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': config,
+        'results': results
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            for line in compare_results(report, json.load(f)):
+                log(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 性能计时
+Factorio Mod Localization Tool - Instrumentation
+
+在热点路径（打开ZIP、读取中央目录、解压、压缩、重命名、插入Tk控件等）上记录耗时和计数，
+可在诊断窗口中查看，也可以导出为 Chrome 跟踪文件（在 chrome://tracing 或 Perfetto 中打开）。
+
+默认关闭。关闭时 timed() 返回共享的空上下文管理器，count() 直接返回，只多一次属性检查。
+
+用法（导入模块而不是函数名，避免被同名局部变量遮蔽）:
+    import factorio_instrumentation as instrumentation
+
+    with instrumentation.timed('zip.central_directory'):
+        ...
+    instrumentation.count('scan.index_hit')
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List
+
+# 保留的跟踪事件数上限（超过后丢弃最早的事件，汇总统计不受影响）
+TRACE_EVENT_LIMIT = 200000
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class _Timer:
+    """记录一次耗时"""
+
+    __slots__ = ('recorder', 'name', 'start')
+
+    def __init__(self, recorder: 'Instrumentation', name: str):
+        self.recorder = recorder
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.recorder.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class Instrumentation:
+    """耗时和计数的记录器（线程安全）"""
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.timers: Dict[str, List[float]] = {}  # 名称 -> [次数, 总耗时, 最大耗时]
+        self.counters: Dict[str, int] = {}
+        self.events = deque(maxlen=TRACE_EVENT_LIMIT)  # (名称, 开始时间, 耗时, 线程ID)
+
+    def enable(self, enabled: bool = True):
+        """开启或关闭记录"""
+        self.enabled = enabled
+
+    def reset(self):
+        """清空已记录的数据"""
+        with self.lock:
+            self.origin = time.perf_counter()
+            self.timers.clear()
+            self.counters.clear()
+            self.events.clear()
+
+    def timed(self, name: str):
+        """返回记录一段代码耗时的上下文管理器"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def count(self, name: str, value: int = 1):
+        """累加计数"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name: str, start: float, duration: float):
+        """记录一次耗时（start 为 perf_counter 时间）"""
+        with self.lock:
+            stat = self.timers.get(name)
+            if stat is None:
+                self.timers[name] = [1, duration, duration]
+            else:
+                stat[0] += 1
+                stat[1] += duration
+                if duration > stat[2]:
+                    stat[2] = duration
+            self.events.append((name, start, duration, threading.get_ident()))
+
+    def summary(self) -> List[Dict]:
+        """按总耗时排序的统计"""
+        with self.lock:
+            rows = [
+                {'name': name, 'count': int(calls), 'total_ms': total * 1000,
+                 'mean_ms': total * 1000 / calls, 'max_ms': longest * 1000}
+                for name, (calls, total, longest) in self.timers.items()
+            ]
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+    def counter_values(self) -> Dict[str, int]:
+        """所有计数"""
+        with self.lock:
+            return dict(sorted(self.counters.items()))
+
+    def chrome_trace(self) -> Dict:
+        """转换为 Chrome 跟踪格式（时间单位为微秒）"""
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            origin = self.origin
+            counters = dict(self.counters)
+        trace_events = [
+            {'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+             'ts': round((start - origin) * 1e6, 3), 'dur': round(duration * 1e6, 3)}
+            for name, start, duration, tid in events
+        ]
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms', 'otherData': {'counters': counters}}
+
+    def dump_trace(self, path: Path):
+        """把跟踪事件写入 Chrome 跟踪文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+# 全局记录器
+INSTRUMENTATION = Instrumentation()
+
+
+def timed(name: str):
+    """用全局记录器记录一段代码的耗时（见 Instrumentation.timed）"""
+    return INSTRUMENTATION.timed(name)
+
+
+def count(name: str, value: int = 1):
+    """用全局记录器累加计数（见 Instrumentation.count）"""
+    INSTRUMENTATION.count(name, value)
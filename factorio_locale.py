@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂语言文件(.cfg)解析
+Factorio Locale File Parser
+
+把 locale/*.cfg 解析为按顺序排列的 (分类, 键) -> 值 表，
+未修改的文件序列化后与原文逐字节一致（包括注释、空行、BOM和换行符）。
+
+文件格式:
+    ; 注释 或 # 注释
+    [item-name]
+    iron-plate=铁板
+    description=第一行\\n第二行      (多行文本使用 \\n 转义)
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 位于第一个分类之前的键属于空分类
+ROOT_SECTION = ""
+
+LocaleKey = Tuple[str, str]
+
+
+def _split_lines(text: str) -> List[str]:
+    """按 \\n 拆分并保留换行符（不使用 splitlines，避免值中的特殊字符被当成换行）"""
+    lines = text.split('\n')
+    last = lines.pop()
+    result = [line + '\n' for line in lines]
+    if last:
+        result.append(last)
+    return result
+
+
+def _line_body(line: str) -> str:
+    """去掉行尾换行符"""
+    if line.endswith('\n'):
+        line = line[:-1]
+    if line.endswith('\r'):
+        line = line[:-1]
+    return line
+
+
+def _line_ending(line: str) -> str:
+    """获取行尾换行符"""
+    if line.endswith('\r\n'):
+        return '\r\n'
+    if line.endswith('\n'):
+        return '\n'
+    return ''
+
+
+def decode_value(value: str) -> str:
+    """把值中的 \\n 转义还原为真正的换行"""
+    return value.replace('\\n', '\n')
+
+
+def encode_value(text: str) -> str:
+    """把文本中的换行转义为 \\n，得到可以写入 .cfg 的值"""
+    return text.replace('\r\n', '\n').replace('\r', '\n').replace('\n', '\\n')
+
+
+class LocaleFile:
+    """解析后的语言文件
+
+    lines 保存原始行（含换行符），keys 按出现顺序记录 (分类, 键) -> 行号。
+    修改值时只替换对应行中 = 之后的部分，其余内容保持不变。
+    """
+
+    __slots__ = ('lines', 'keys', 'section_lines')
+
+    def __init__(self, lines: List[str], keys: Dict[LocaleKey, int], section_lines: Dict[str, int]):
+        self.lines = lines
+        self.keys = keys
+        self.section_lines = section_lines  # 分类 -> 分类标题所在行号
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: LocaleKey) -> bool:
+        return key in self.keys
+
+    def __iter__(self) -> Iterator[LocaleKey]:
+        return iter(self.keys)
+
+    def get(self, section: str, key: str, default: Optional[str] = None) -> Optional[str]:
+        """获取值（保留 \\n 转义）"""
+        index = self.keys.get((section, key))
+        if index is None:
+            return default
+        line = _line_body(self.lines[index])
+        return line[line.index('=') + 1:]
+
+    def items(self) -> Iterator[Tuple[LocaleKey, str]]:
+        """按出现顺序遍历 ((分类, 键), 值)"""
+        for locale_key, index in self.keys.items():
+            line = _line_body(self.lines[index])
+            yield locale_key, line[line.index('=') + 1:]
+
+    def to_dict(self) -> Dict[LocaleKey, str]:
+        """转换为 {(分类, 键): 值}"""
+        return dict(self.items())
+
+    def sections(self) -> List[str]:
+        """按出现顺序列出包含键的分类"""
+        return list(dict.fromkeys(section for section, _ in self.keys))
+
+    def newline(self) -> str:
+        """文件使用的换行符"""
+        for line in self.lines:
+            ending = _line_ending(line)
+            if ending:
+                return ending
+        return '\n'
+
+    def set(self, section: str, key: str, value: str):
+        """设置值：已有的键原地替换，新键追加到所属分类末尾"""
+        self.update((((section, key), value),))
+
+    def update(self, items: Iterable[Tuple[LocaleKey, str]]):
+        """批量设置值：已有的键原地替换，新键按分类收集后一次插入（避免逐个插入时反复移动行号）
+
+        值必须已转义（见 encode_value），包含 \\n 换行符时抛出 ValueError（否则会多出一行）。
+        单独的 \\r 不会拆分行，解析得到的值可以原样写回。
+        """
+        items = list(items)
+        # 先检查全部条目，出错时文件保持不变
+        for (section, key), value in items:
+            if '\n' in value or '\n' in key:
+                raise ValueError(f"键或值中不能包含换行符（多行文本请用 encode_value 转义）: {section}.{key}")
+
+        pending: Dict[str, Dict[str, str]] = {}
+        for (section, key), value in items:
+            index = self.keys.get((section, key))
+            if index is None:
+                pending.setdefault(section, {})[key] = value
+                continue
+            line = self.lines[index]
+            body = _line_body(line)
+            self.lines[index] = body[:body.index('=') + 1] + value + _line_ending(line)
+        if pending:
+            self._insert_keys(pending)
+
+    def _insert_keys(self, pending: Dict[str, Dict[str, str]]):
+        """插入新键：已有分类插入到最后一个键之后，新分类追加到文件末尾"""
+        newline = self.newline()
+
+        # 每个分类的插入位置（插入到该行号之前）
+        insert_at: Dict[str, int] = {}
+        for (section, _), index in self.keys.items():
+            if section in pending and index >= insert_at.get(section, 0):
+                insert_at[section] = index + 1
+        for section, index in self.section_lines.items():
+            if section in pending and section not in insert_at:
+                insert_at[section] = index + 1
+        if ROOT_SECTION in pending and ROOT_SECTION not in insert_at:
+            insert_at[ROOT_SECTION] = self._header_end()
+
+        inserts: Dict[int, List[Tuple[LocaleKey, str]]] = {}
+        for section, position in insert_at.items():
+            inserts.setdefault(position, []).extend(
+                ((section, key), f"{key}={value}{newline}") for key, value in pending[section].items())
+        if 0 in inserts and self.lines and self.lines[0].startswith('\ufeff'):
+            # 插入到文件开头时BOM仍留在第一行
+            self.lines[0] = self.lines[0][1:]
+            first_key, first_line = inserts[0][0]
+            inserts[0][0] = (first_key, '\ufeff' + first_line)
+
+        lines: List[str] = []
+        new_index: List[int] = []  # 原行号 -> 新行号
+        new_keys: Dict[LocaleKey, int] = {}
+        for index in range(len(self.lines) + 1):
+            block = inserts.get(index)
+            if block:
+                if lines and not _line_ending(lines[-1]):
+                    lines[-1] += newline
+                for locale_key, line in block:
+                    new_keys[locale_key] = len(lines)
+                    lines.append(line)
+            if index < len(self.lines):
+                new_index.append(len(lines))
+                lines.append(self.lines[index])
+
+        self.keys = {locale_key: new_index[index] for locale_key, index in self.keys.items()}
+        self.section_lines = {section: new_index[index] for section, index in self.section_lines.items()}
+        self.keys.update(new_keys)
+
+        # 新分类追加到文件末尾
+        for section, entries in pending.items():
+            if section in insert_at:
+                continue
+            if lines and not _line_ending(lines[-1]):
+                lines[-1] += newline
+            if lines and _line_body(lines[-1]).strip():
+                lines.append(newline)
+            self.section_lines[section] = len(lines)
+            lines.append(f"[{section}]{newline}")
+            for key, value in entries.items():
+                self.keys[(section, key)] = len(lines)
+                lines.append(f"{key}={value}{newline}")
+
+        self.lines = lines
+
+    def _header_end(self) -> int:
+        """文件开头的注释和空行之后的行号"""
+        for index, line in enumerate(self.lines):
+            stripped = line.strip()
+            if index == 0:
+                stripped = stripped.lstrip('\ufeff').lstrip()
+            if stripped and stripped[0] not in ';#':
+                return index
+        return len(self.lines)
+
+    def remove(self, section: str, key: str) -> bool:
+        """删除一个键，返回是否存在"""
+        index = self.keys.pop((section, key), None)
+        if index is None:
+            return False
+        del self.lines[index]
+        self._shift(index, -1)
+        return True
+
+    def _shift(self, start: int, delta: int):
+        """删除行后更新行号"""
+        for locale_key, index in self.keys.items():
+            if index >= start:
+                self.keys[locale_key] = index + delta
+        for section, index in self.section_lines.items():
+            if index >= start:
+                self.section_lines[section] = index + delta
+
+    def copy(self) -> 'LocaleFile':
+        """复制一份可独立修改的副本"""
+        return LocaleFile(list(self.lines), dict(self.keys), dict(self.section_lines))
+
+    def serialize(self) -> str:
+        """序列化为文本"""
+        return ''.join(self.lines)
+
+    def to_bytes(self) -> bytes:
+        """序列化为UTF-8字节（原样还原解析时无法解码的字节）"""
+        return self.serialize().encode('utf-8', errors='surrogateescape')
+
+
+def parse_locale(text: str) -> LocaleFile:
+    """解析语言文件文本"""
+    lines = _split_lines(text)
+    keys = {}
+    section_lines = {}
+    section = ROOT_SECTION
+
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if index == 0 and stripped.startswith('\ufeff'):
+            stripped = stripped[1:].lstrip()
+        if not stripped or stripped[0] in ';#':
+            continue
+
+        if stripped[0] == '[':
+            end = stripped.find(']')
+            if end > 0:
+                section = stripped[1:end]
+                section_lines.setdefault(section, index)
+                continue
+
+        separator = line.find('=')
+        if separator > 0:
+            key = line[:separator].strip()
+            if index == 0:
+                key = key.lstrip('\ufeff')
+            if key:
+                # 重复的键以最后一次出现为准
+                keys.pop((section, key), None)
+                keys[(section, key)] = index
+
+    return LocaleFile(lines, keys, section_lines)
+
+
+def parse_locale_bytes(data: bytes) -> LocaleFile:
+    """解析语言文件字节，无法解码的字节会在 to_bytes 时原样还原"""
+    return parse_locale(data.decode('utf-8', errors='surrogateescape'))
+
+
+def build_locale(items: Iterable[Tuple[LocaleKey, str]], newline: str = '\n') -> LocaleFile:
+    """根据 ((分类, 键), 值) 构建新的语言文件，按分类分组输出"""
+    grouped: Dict[str, List[Tuple[str, str]]] = {}
+    for (section, key), value in items:
+        grouped.setdefault(section, []).append((key, value))
+
+    parts = []
+    for section, entries in grouped.items():
+        if parts:
+            parts.append(newline)
+        if section != ROOT_SECTION:
+            parts.append(f"[{section}]{newline}")
+        parts.extend(f"{key}={value}{newline}" for key, value in entries)
+    return parse_locale(''.join(parts))
+
+
+def diff_locale(source: LocaleFile, target: Optional[LocaleFile]) -> Dict[str, List[LocaleKey]]:
+    """按键比较源语言和目标语言文件
+
+    返回:
+        missing  - 源文件有、目标文件没有的键
+        stale    - 目标文件中的值与源文件完全相同（仍是未翻译的原文）
+        obsolete - 目标文件有、源文件已没有的键
+    """
+    missing = []
+    stale = []
+    target_values = target.to_dict() if target is not None else {}
+    for locale_key, value in source.items():
+        if locale_key not in target_values:
+            missing.append(locale_key)
+        elif value and target_values[locale_key] == value:
+            stale.append(locale_key)
+
+    obsolete = [locale_key for locale_key in target_values if locale_key not in source]
+    return {'missing': missing, 'stale': stale, 'obsolete': obsolete}
+
+
+def untranslated_keys(source: LocaleFile, target: Optional[LocaleFile]) -> List[LocaleKey]:
+    """需要翻译的键（缺失或未翻译），按源文件顺序"""
+    diff = diff_locale(source, target)
+    pending = set(diff['missing']) | set(diff['stale'])
+    return [locale_key for locale_key in source if locale_key in pending]
+
+
+def extract_keys(source: LocaleFile, keys: Iterable[LocaleKey]) -> LocaleFile:
+    """从源文件中提取指定的键，生成只包含这些键的语言文件"""
+    return build_locale(((locale_key, source.get(*locale_key)) for locale_key in keys), newline=source.newline())
+
+
+def merge_locale(base: LocaleFile, updates: LocaleFile) -> LocaleFile:
+    """把 updates 中的键合并到 base 的副本中（已有的键替换值，新键追加）"""
+    merged = base.copy()
+    merged.update(updates.items())
+    return merged
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 日志
+Factorio Mod Localization Tool - Logging
+
+各模块通过 get_logger() 获取日志记录器。默认不输出任何内容（低于 WARNING 的调试信息直接丢弃），
+扫描几百个模组时不会因为控制台输出变慢。
+
+调用 setup_logging() 后，日志先放入队列，由后台线程写入缓存目录中的滚动日志文件
+（以及可选的stderr），记录日志的线程不会因为磁盘或控制台I/O而阻塞。
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from pathlib import Path
+from typing import Optional, Union
+
+LOGGER_NAME = 'factorio_localizer'
+LOG_FILE_NAME = 'factorio_localizer.log'
+LOG_MAX_BYTES = 1024 * 1024  # 单个日志文件的大小上限
+LOG_BACKUP_COUNT = 3  # 保留的旧日志文件数
+DEFAULT_LOG_LEVEL = 'WARNING'
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s'
+
+_base_logger = logging.getLogger(LOGGER_NAME)
+_base_logger.addHandler(logging.NullHandler())
+_base_logger.setLevel(DEFAULT_LOG_LEVEL)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_atexit_registered = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取模块的日志记录器"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def parse_level(level: Union[str, int]) -> int:
+    """把日志级别名称（不区分大小写）或数值转换为数值"""
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f"未知的日志级别: {level}（可用: {', '.join(LOG_LEVELS)}）")
+    return value
+
+
+def setup_logging(level: Union[str, int] = DEFAULT_LOG_LEVEL, log_dir: Optional[Path] = None,
+                  console: bool = False) -> Optional[Path]:
+    """设置日志级别和输出位置，返回日志文件路径
+
+    log_dir 不为空时写入其中的滚动日志文件；console 为真时同时输出到stderr。
+    重复调用会先关闭之前的输出。
+    """
+    global _listener, _queue_handler, _atexit_registered
+    shutdown_logging()
+    _base_logger.setLevel(parse_level(level))
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    log_file = None
+    if log_dir is not None:
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_file = log_dir / LOG_FILE_NAME
+        # delay=True：没有日志时不创建文件
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8', delay=True))
+    if console:
+        handlers.append(logging.StreamHandler(sys.stderr))
+    if not handlers:
+        return None
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _base_logger.addHandler(_queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+    if not _atexit_registered:
+        # 退出前写完队列中剩余的日志
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
+    return log_file
+
+
+def shutdown_logging():
+    """写完队列中的日志并关闭日志文件（清理缓存目录前需要调用）"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        _base_logger.removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 命令行版本
+Factorio Mod Localization Tool - CLI
+
+无需图形界面即可扫描模组、导出源文件、导入译文，适合在服务器或SSH中批量处理。
+
+示例:
+    python factorio_mod_cli.py --mods-dir D:/mods scan --missing zh-CN
+    python factorio_mod_cli.py export --output ./exports --lang en
+    python factorio_mod_cli.py export --output ./exports --untranslated --target-lang zh-CN
+    python factorio_mod_cli.py import --input ./exports --lang zh-CN
+    python factorio_mod_cli.py apply my-mod --lang zh-CN --file strings.cfg --input strings.cfg
+    python factorio_mod_cli.py search "iron plate" --lang en
+    python factorio_mod_cli.py batch-export --bundle missing.jsonl --target-lang zh-CN
+    python factorio_mod_cli.py batch-translate --bundle missing.jsonl --provider mock
+    python factorio_mod_cli.py batch-import --bundle missing.jsonl --lang zh-CN
+    python factorio_mod_cli.py batch-export --bundle all.jsonl --all --full
+    python factorio_mod_cli.py --trace scan.trace.json scan
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from factorio_mod_core import (
+    ScanIndex, default_mods_path, default_cache_dir, format_file_size, get_locale_files,
+    read_locale_file, scan_directory, index_locale_texts, commit_mod_changes, preferred_source_language,
+    export_untranslated, merge_translation, load_locale_file_optional, latest_mods,
+    BACKUP_KEEP_COUNT, BACKUP_MAX_SIZE, BACKUP_MODE_DELTA, BACKUP_MODE_FULL
+)
+from factorio_instrumentation import INSTRUMENTATION
+from factorio_locale import parse_locale
+from factorio_logging import DEFAULT_LOG_LEVEL, LOG_LEVELS, setup_logging
+from factorio_translation_memory import TranslationMemory
+from factorio_text_index import LocaleTextIndex, SEARCH_LIMIT
+from factorio_pipeline import (
+    PipelineState, PIPELINE_WORKERS, STAGE_EXPORT, STAGE_IMPORT, default_state_path, export_bundle, import_bundle,
+    missing_language_mods, translate_bundle
+)
+from factorio_translation_provider import PROVIDERS, load_provider
+
+
+def load_mods(args) -> Dict[str, Dict]:
+    """扫描模组目录（使用缓存目录中的扫描索引）"""
+    mods_path = Path(args.mods_dir)
+    if not mods_path.exists():
+        raise SystemExit(f"目录不存在: {mods_path}")
+
+    cache_dir = Path(args.cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    scan_index = ScanIndex(cache_dir / "scan_index.json")
+    return scan_directory(mods_path, scan_index)
+
+
+def load_cached_mods(args) -> Dict[str, Dict]:
+    """读取扫描索引中记录的模组（不扫描目录）"""
+    scan_index = ScanIndex(Path(args.cache_dir) / "scan_index.json")
+    return scan_index.cached_mods(Path(args.mods_dir))
+
+
+def select_mods(mods_data: Dict[str, Dict], names: Optional[List[str]]) -> Dict[str, Tuple[Path, Dict]]:
+    """按名称筛选模组，未指定名称时返回全部"""
+    mods = latest_mods(mods_data)
+    if not names:
+        return mods
+
+    selected = {}
+    for name in names:
+        if name in mods:
+            selected[name] = mods[name]
+            continue
+        # 也接受ZIP文件名或路径
+        for mod_name, (path, info) in mods.items():
+            if name in (path.name, path.stem, str(path)):
+                selected[mod_name] = (path, info)
+                break
+        else:
+            raise SystemExit(f"找不到模组: {name}")
+    return selected
+
+
+def output(args, data, lines: List[str]):
+    """按 --json 选项输出结果"""
+    if args.json:
+        json.dump(data, args.stdout, ensure_ascii=False, indent=2)
+        args.stdout.write("\n")
+    else:
+        for line in lines:
+            print(line, file=args.stdout)
+
+
+def cmd_scan(args) -> int:
+    """scan 子命令：列出模组及其语言"""
+    mods_data = load_mods(args)
+
+    records = []
+    lines = []
+    for path, info in mods_data.items():
+        if args.missing and (info.get('is_backup') or args.missing in info.get('languages', [])):
+            continue
+
+        record = {
+            'path': path,
+            'name': info.get('name'),
+            'version': info.get('version'),
+            'title': info.get('title'),
+            'size': info.get('size'),
+            'is_backup': info.get('is_backup', False),
+            'languages': info.get('languages', []),
+            'locale_files': info.get('locale_files', {})
+        }
+        records.append(record)
+
+        if record['is_backup']:
+            lines.append(f"[备份] {record['name']}\t{format_file_size(record['size'])}")
+        else:
+            languages_str = ", ".join(record['languages']) or "无语言文件"
+            lines.append(f"{Path(path).stem}\t{format_file_size(record['size'])}\t{languages_str}")
+
+    lines.append(f"共 {len(records)} 项")
+    output(args, records, lines)
+    return 0
+
+
+def cmd_export(args) -> int:
+    """export 子命令：导出源语言文件，文件名格式与图形界面相同"""
+    mods = select_mods(load_mods(args), args.mod)
+    export_dir = Path(args.output)
+    export_dir.mkdir(parents=True, exist_ok=True)
+
+    exported = []
+    errors = []
+    for mod_name, (path, info) in mods.items():
+        source_lang = args.lang or preferred_source_language(info.get('languages', []))
+        if not source_lang:
+            continue
+
+        for filename in get_locale_files(path, source_lang):
+            try:
+                if args.untranslated:
+                    # 只导出目标语言中缺失或未翻译的键
+                    partial = export_untranslated(path, source_lang, args.target_lang, filename)
+                    if partial is None:
+                        continue
+                    content = partial.serialize()
+                    key_count = len(partial)
+                else:
+                    content = read_locale_file(path, source_lang, filename)
+                    key_count = None
+                export_path = export_dir / f"{mod_name}_{source_lang}_{filename}"
+                with open(export_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                exported.append({'mod': mod_name, 'language': source_lang, 'file': filename,
+                                 'path': str(export_path), 'keys': key_count})
+            except Exception as e:
+                errors.append({'mod': mod_name, 'file': filename, 'error': str(e)})
+
+    lines = [f"已导出: {item['path']}" for item in exported]
+    lines += [f"导出失败 {item['mod']}/{item['file']}: {item['error']}" for item in errors]
+    lines.append(f"共导出 {len(exported)} 个文件")
+    output(args, {'exported': exported, 'errors': errors}, lines)
+    return 1 if errors else 0
+
+
+def parse_export_filename(filename: str, mod_names) -> Optional[Tuple[str, str, str]]:
+    """解析导出文件名 {模组}_{语言}_{文件}，返回 (模组, 语言, 文件)"""
+    # 模组名本身可能包含下划线，优先匹配最长的模组名
+    for mod_name in sorted(mod_names, key=len, reverse=True):
+        prefix = f"{mod_name}_"
+        if filename.startswith(prefix):
+            rest = filename[len(prefix):]
+            language, sep, locale_file = rest.partition('_')
+            if sep and locale_file:
+                return mod_name, language, locale_file
+    return None
+
+
+def commit_changes(args, mods: Dict[str, Tuple[Path, Dict]],
+                   changes_by_mod: Dict[str, Dict[Tuple[str, str], str]]) -> Tuple[List[Dict], List[Dict]]:
+    """按模组提交更改，每个模组只备份和重写一次"""
+    scan_index = ScanIndex(Path(args.cache_dir) / "scan_index.json")
+    committed = []
+    errors = []
+    for mod_name, changes in changes_by_mod.items():
+        path = mods[mod_name][0]
+        if args.dry_run:
+            committed.append({'mod': mod_name, 'path': str(path), 'files': sorted(f for _, f in changes), 'backup': None})
+            continue
+        try:
+            backup_path, _ = commit_mod_changes(path, changes, scan_index, backup=not args.no_backup,
+                                                keep_backups=args.keep_backups,
+                                                max_backup_size=args.max_backup_size * 1024 * 1024,
+                                                backup_mode=BACKUP_MODE_FULL if args.full_backup else BACKUP_MODE_DELTA)
+            committed.append({
+                'mod': mod_name,
+                'path': str(path),
+                'files': sorted(f for _, f in changes),
+                'backup': str(backup_path) if backup_path else None
+            })
+        except Exception as e:
+            # 单个模组失败不影响其他模组
+            errors.append({'mod': mod_name, 'error': str(e)})
+    scan_index.save()
+    return committed, errors
+
+
+def cmd_import(args) -> int:
+    """import 子命令：把翻译好的导出文件写回对应模组"""
+    mods = select_mods(load_mods(args), args.mod)
+    input_dir = Path(args.input)
+    if not input_dir.is_dir():
+        raise SystemExit(f"目录不存在: {input_dir}")
+
+    memory = None if args.dry_run else TranslationMemory(Path(args.cache_dir) / "translation_memory.sqlite3")
+    changes_by_mod = {}
+    skipped = []
+    for file_path in sorted(input_dir.iterdir()):
+        if not file_path.is_file():
+            continue
+        parsed = parse_export_filename(file_path.name, mods.keys())
+        if not parsed:
+            skipped.append(file_path.name)
+            continue
+        mod_name, source_lang, locale_file = parsed
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        if not args.replace:
+            # 按键合并到现有译文（或源文件模板）中，支持只含部分键的导出文件
+            content = merge_translation(mods[mod_name][0], args.lang, locale_file, content, source_lang)
+        changes_by_mod.setdefault(mod_name, {})[(args.lang, locale_file)] = content
+
+        # 与源语言文件配对，记入翻译记忆
+        source = load_locale_file_optional(mods[mod_name][0], source_lang, locale_file)
+        if memory is not None and source is not None and source_lang != args.lang:
+            memory.record_locale(source_lang, args.lang, source, parse_locale(content))
+
+    committed, errors = commit_changes(args, mods, changes_by_mod)
+
+    lines = [f"已写入 {item['mod']}: {', '.join(item['files'])}" for item in committed]
+    lines += [f"跳过无法识别的文件: {name}" for name in skipped]
+    lines += [f"写入失败 {item['mod']}: {item['error']}" for item in errors]
+    output(args, {'committed': committed, 'skipped': skipped, 'errors': errors}, lines)
+    return 1 if errors else 0
+
+
+def cmd_apply(args) -> int:
+    """apply 子命令：把单个本地文件写入指定模组"""
+    mods = select_mods(load_mods(args), [args.mod_name])
+    mod_name = next(iter(mods))
+
+    input_path = Path(args.input)
+    with open(input_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    filename = args.file or input_path.name
+
+    committed, errors = commit_changes(args, mods, {mod_name: {(args.lang, filename): content}})
+
+    lines = [f"已写入 {item['mod']}: {args.lang}/{filename}" for item in committed]
+    lines += [f"写入失败 {item['mod']}: {item['error']}" for item in errors]
+    output(args, {'committed': committed, 'errors': errors}, lines)
+    return 1 if errors else 0
+
+
+def cmd_search(args) -> int:
+    """search 子命令：在所有模组的语言文件中查找键或文本"""
+    text_index = LocaleTextIndex(Path(args.cache_dir) / "locale_text_index.sqlite3")
+    try:
+        if args.no_scan:
+            # --mod 按扫描索引中记录的模组解析
+            mods_data = load_cached_mods(args)
+        else:
+            # 只重新索引有变化的模组
+            mods_data = load_mods(args)
+            index_locale_texts(mods_data, text_index)
+            text_index.prune(Path(args.mods_dir), mods_data.keys())
+
+        paths = None
+        if args.mod:
+            paths = [str(path) for path, _ in select_mods(mods_data, args.mod).values()]
+        results = text_index.search(args.text, language=args.lang, paths=paths, limit=args.limit)
+    finally:
+        text_index.close()
+
+    lines = []
+    for item in results:
+        locale_key = f"{item['section']}.{item['key']}" if item['section'] else item['key']
+        lines.append(f"{Path(item['path']).stem}\t{item['lang']}/{item['filename']}\t{locale_key}={item['value']}")
+    lines.append(f"共 {len(results)} 条" + ("（已达到上限）" if len(results) >= args.limit else ""))
+    output(args, results, lines)
+    return 0
+
+
+def print_progress(done: int, total: int, mod_name: str):
+    """批量处理的进度输出到stderr"""
+    print(f"[{done}/{total}] {mod_name}", file=sys.stderr)
+
+
+def cmd_batch_export(args) -> int:
+    """batch-export 子命令：把所有缺少目标语言的模组中需要翻译的键导出到一个批量文件"""
+    mods_data = load_mods(args)
+    if args.all:
+        mods = {name: mod for name, mod in sorted(latest_mods(mods_data).items()) if mod[1].get('languages')}
+    else:
+        mods = missing_language_mods(mods_data, args.target_lang)
+    if args.mod:
+        selected = select_mods(mods_data, args.mod)
+        mods = {name: mod for name, mod in mods.items() if name in selected}
+
+    bundle_path = Path(args.bundle)
+    state = PipelineState(default_state_path(bundle_path), bundle_path)
+    if args.restart:
+        state.reset(STAGE_EXPORT)
+    result = export_bundle(mods, bundle_path, args.target_lang, source_lang=args.lang, full=args.full, state=state,
+                           workers=args.workers, progress=print_progress)
+
+    lines = [f"已导出 {item['mod']}: {item['files']} 个文件，{item['keys']} 个键" for item in result['exported']]
+    lines += [f"导出失败 {item['mod']}: {item['error']}" for item in result['errors']]
+    if result['skipped']:
+        lines.append(f"跳过上次已导出的 {len(result['skipped'])} 个模组（使用 --restart 重新导出）")
+    lines.append(f"批量文件: {bundle_path}")
+    output(args, result, lines)
+    return 1 if result['errors'] else 0
+
+
+def cmd_batch_translate(args) -> int:
+    """batch-translate 子命令：用翻译服务填写批量文件中尚未翻译的条目"""
+    bundle_path = Path(args.bundle)
+    if not bundle_path.is_file():
+        raise SystemExit(f"文件不存在: {bundle_path}")
+
+    options = {}
+    for option in args.option or []:
+        key, sep, value = option.partition('=')
+        if not sep:
+            raise SystemExit(f"选项格式应为 KEY=VALUE: {option}")
+        options[key.replace('-', '_')] = value
+    try:
+        provider = load_provider(args.provider, **options)
+    except (ImportError, AttributeError, TypeError, ValueError) as e:
+        raise SystemExit(f"无法加载翻译服务: {e}")
+
+    # 每个翻译服务使用独立的缓存，避免不同服务的结果混在一起
+    cache = None if args.no_cache else TranslationMemory(
+        Path(args.cache_dir) / f"translation_cache_{provider.name}.sqlite3")
+    state = PipelineState(default_state_path(bundle_path), bundle_path)
+    result = translate_bundle(bundle_path, provider, cache, progress=print_progress, state=state)
+
+    lines = [f"已翻译 {result['translated']} 个文件（{result['strings']} 条文本），"
+             f"保留已有译文 {result['kept']} 个"]
+    if result['failed']:
+        lines.append(f"{result['failed']} 个文件翻译不完整，已保持未翻译（重新运行会重试）")
+    lines += [f"请求失败: {error}" for error in result['errors'][:20]]
+    output(args, result, lines)
+    return 1 if result['failed'] else 0
+
+
+def cmd_batch_import(args) -> int:
+    """batch-import 子命令：导入翻译好的批量文件并提交所有模组"""
+    bundle_path = Path(args.bundle)
+    if not bundle_path.is_file():
+        raise SystemExit(f"文件不存在: {bundle_path}")
+
+    mods = latest_mods(load_mods(args))
+    state = PipelineState(default_state_path(bundle_path), bundle_path)
+    if args.restart:
+        state.reset(STAGE_IMPORT)
+    cache_dir = Path(args.cache_dir)
+    memory = None if args.dry_run else TranslationMemory(cache_dir / "translation_memory.sqlite3")
+    result = import_bundle(bundle_path, mods, args.lang, state=state,
+                           scan_index=ScanIndex(cache_dir / "scan_index.json"), memory=memory,
+                           dry_run=args.dry_run, workers=args.workers, progress=print_progress,
+                           backup=not args.no_backup, keep_backups=args.keep_backups,
+                           max_backup_size=args.max_backup_size * 1024 * 1024,
+                           backup_mode=BACKUP_MODE_FULL if args.full_backup else BACKUP_MODE_DELTA)
+
+    lines = [f"已写入 {item['mod']}: {', '.join(item['files'])}" for item in result['committed']]
+    lines += [f"写入失败 {item['mod']}: {item['error']}" for item in result['errors']]
+    if result['skipped']:
+        lines.append(f"跳过上次已提交的 {len(result['skipped'])} 个模组（使用 --restart 重新提交）")
+    unchanged = result['unchanged_files'] + sum(len(item['unchanged'])
+                                                for item in result['committed'] + result['unchanged'])
+    if unchanged:
+        lines.append(f"跳过 {unchanged} 个内容未变化的文件")
+    if result['untranslated']:
+        lines.append(f"{result['untranslated']} 个文件尚未填写译文")
+    output(args, result, lines)
+    return 1 if result['errors'] else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="异星工厂模组汉化工具（命令行版本）")
+    parser.add_argument('--mods-dir', default=str(default_mods_path()), help="模组目录")
+    parser.add_argument('--cache-dir', default=str(default_cache_dir()), help="缓存目录（保存扫描索引）")
+    parser.add_argument('--json', action='store_true', help="以JSON格式输出结果")
+    parser.add_argument('--log-level', type=str.upper, choices=LOG_LEVELS,
+                        help="日志级别（默认 WARNING），日志写入缓存目录中的 factorio_localizer.log")
+    parser.add_argument('-v', '--verbose', action='store_true', help="同时把日志输出到stderr（未指定级别时为 DEBUG）")
+    parser.add_argument('--trace', metavar='FILE', help="记录热点路径的耗时，结束时写入 Chrome 跟踪文件并输出统计")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan_parser = subparsers.add_parser('scan', help="扫描模组目录")
+    scan_parser.add_argument('--missing', metavar='LANG', help="只列出缺少该语言的模组")
+    scan_parser.set_defaults(func=cmd_scan)
+
+    export_parser = subparsers.add_parser('export', help="导出源语言文件")
+    export_parser.add_argument('--output', default=str(Path.home() / "Desktop" / "factorio_exports"), help="导出目录")
+    export_parser.add_argument('--lang', help="源语言（默认优先英语）")
+    export_parser.add_argument('--mod', action='append', help="只处理指定模组（可多次指定）")
+    export_parser.add_argument('--untranslated', action='store_true', help="只导出目标语言中缺失或未翻译的键")
+    export_parser.add_argument('--target-lang', default='zh-CN', help="与 --untranslated 一起使用的目标语言")
+    export_parser.set_defaults(func=cmd_export)
+
+    def add_write_options(sub):
+        sub.add_argument('--lang', default='zh-CN', help="写入的目标语言")
+        sub.add_argument('--no-backup', action='store_true', help="不创建备份文件")
+        sub.add_argument('--full-backup', action='store_true',
+                         help="保留整个原文件作为备份（默认只保存被替换的语言文件）")
+        sub.add_argument('--keep-backups', type=int, default=BACKUP_KEEP_COUNT, help="每个模组保留的备份数（0为不限制）")
+        sub.add_argument('--max-backup-size', type=int, default=BACKUP_MAX_SIZE // (1024 * 1024), metavar='MB',
+                         help="每个模组备份的总大小上限（MB，0为不限制，最新的备份总是保留）")
+        sub.add_argument('--dry-run', action='store_true', help="只显示将要写入的内容，不修改ZIP")
+
+    import_parser = subparsers.add_parser('import', help="导入翻译好的导出文件")
+    import_parser.add_argument('--input', required=True, help="包含导出文件的目录")
+    import_parser.add_argument('--mod', action='append', help="只处理指定模组（可多次指定）")
+    import_parser.add_argument('--replace', action='store_true', help="直接覆盖目标文件，不按键合并")
+    add_write_options(import_parser)
+    import_parser.set_defaults(func=cmd_import)
+
+    apply_parser = subparsers.add_parser('apply', help="把单个文件写入模组")
+    apply_parser.add_argument('mod_name', help="模组内部名称或ZIP文件名")
+    apply_parser.add_argument('--input', required=True, help="要写入的本地文件")
+    apply_parser.add_argument('--file', help="ZIP中的语言文件名（默认与本地文件同名）")
+    add_write_options(apply_parser)
+    apply_parser.set_defaults(func=cmd_apply)
+
+    search_parser = subparsers.add_parser('search', help="在所有模组的语言文件中查找键或文本")
+    search_parser.add_argument('text', help="要查找的文本（不区分大小写）")
+    search_parser.add_argument('--lang', help="只查找该语言")
+    search_parser.add_argument('--mod', action='append', help="只查找指定模组（可多次指定）")
+    search_parser.add_argument('--limit', type=int, default=SEARCH_LIMIT, help="最多显示的结果数")
+    search_parser.add_argument('--no-scan', action='store_true', help="直接查询现有索引，不检查模组是否有变化（--mod 按上次扫描记录的模组查找）")
+    search_parser.set_defaults(func=cmd_search)
+
+    batch_export_parser = subparsers.add_parser('batch-export', help="把所有缺少目标语言的模组导出到一个批量文件")
+    batch_export_parser.add_argument('--bundle', required=True, help="批量文件路径（JSON Lines）")
+    batch_export_parser.add_argument('--lang', help="源语言（默认优先英语）")
+    batch_export_parser.add_argument('--target-lang', default='zh-CN', help="目标语言")
+    batch_export_parser.add_argument('--mod', action='append', help="只处理指定模组（可多次指定）")
+    batch_export_parser.add_argument('--all', action='store_true', help="导出所有模组（默认只导出缺少目标语言的模组）")
+    batch_export_parser.add_argument('--full', action='store_true',
+                                     help="导出完整的源文件和现有的目标文件（默认只导出需要翻译的键）")
+    batch_export_parser.add_argument('--workers', type=int, default=PIPELINE_WORKERS, help="并行处理的模组数")
+    batch_export_parser.add_argument('--restart', action='store_true', help="忽略上次的进度，重新导出")
+    batch_export_parser.set_defaults(func=cmd_batch_export)
+
+    batch_translate_parser = subparsers.add_parser('batch-translate', help="用翻译服务填写批量文件中的译文")
+    batch_translate_parser.add_argument('--bundle', required=True, help="批量文件路径（JSON Lines）")
+    batch_translate_parser.add_argument('--provider', default='mock',
+                                        help=f"翻译服务：内置名称（{', '.join(PROVIDERS)}）或 模块:类名")
+    batch_translate_parser.add_argument('--option', action='append', metavar='KEY=VALUE',
+                                        help="传给翻译服务的选项，如 batch_size=50、concurrency=4、"
+                                             "requests_per_second=2（可多次指定）")
+    batch_translate_parser.add_argument('--no-cache', action='store_true', help="不使用翻译缓存")
+    batch_translate_parser.set_defaults(func=cmd_batch_translate)
+
+    batch_import_parser = subparsers.add_parser('batch-import', help="导入翻译好的批量文件并提交所有模组")
+    batch_import_parser.add_argument('--bundle', required=True, help="批量文件路径（JSON Lines）")
+    batch_import_parser.add_argument('--workers', type=int, default=PIPELINE_WORKERS, help="并行处理的模组数")
+    batch_import_parser.add_argument('--restart', action='store_true', help="忽略上次的进度，重新提交")
+    add_write_options(batch_import_parser)
+    batch_import_parser.set_defaults(func=cmd_batch_import)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    args = build_parser().parse_args(argv)
+    level = args.log_level or ('DEBUG' if args.verbose else DEFAULT_LOG_LEVEL)
+    setup_logging(level, Path(args.cache_dir), console=args.verbose)
+    if args.trace:
+        INSTRUMENTATION.enable()
+    # 结果以外的输出写到stderr，保证stdout只包含结果
+    args.stdout = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            return args.func(args)
+    finally:
+        if args.trace:
+            INSTRUMENTATION.dump_trace(Path(args.trace))
+            for row in INSTRUMENTATION.summary():
+                print(f"{row['name']}: {row['count']} 次, 共 {row['total_ms']:.1f} ms, "
+                      f"平均 {row['mean_ms']:.3f} ms, 最长 {row['max_ms']:.3f} ms", file=sys.stderr)
+            for name, value in INSTRUMENTATION.counter_values().items():
+                print(f"{name}: {value}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
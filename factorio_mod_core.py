@@ -0,0 +1,1316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 核心功能
+Factorio Mod Localization Tool - Core
+
+模组扫描、语言文件读取和ZIP写入等与界面无关的功能，
+图形界面和命令行工具共用。
+"""
+
+import contextlib
+import glob
+import hashlib
+import os
+import re
+import zipfile
+import json
+import mmap
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, List, Dict, Optional, Tuple
+
+import factorio_instrumentation as instrumentation
+from factorio_logging import get_logger
+from factorio_locale import LocaleFile, parse_locale, parse_locale_bytes, untranslated_keys, extract_keys, merge_locale
+from factorio_text_index import LocaleTextIndex, LocaleString
+
+logger = get_logger('core')
+
+# 支持的语言列表
+SUPPORTED_LANGUAGES = {
+    'zh-CN': '简体中文',
+    'zh-TW': '繁体中文', 
+    'en': '英语',
+    'ja': '日语',
+    'ko': '韩语',
+    'ru': '俄语',
+    'es-ES': '西班牙语',
+    'pt-BR': '葡萄牙语',
+    'fr': '法语',
+    'de': '德语',
+    'it': '意大利语',
+    'pl': '波兰语',
+    'cs': '捷克语',
+    'hu': '匈牙利语',
+    'nl': '荷兰语',
+    'sv-SE': '瑞典语',
+    'da': '丹麦语',
+    'fi': '芬兰语',
+    'no': '挪威语',
+    'uk': '乌克兰语',
+    'tr': '土耳其语',
+    'vi': '越南语'
+}
+
+# 并行扫描的线程数
+SCAN_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+# 扫描索引格式版本，字段变化时递增以使旧索引失效
+SCAN_INDEX_VERSION = 1
+
+# 备份保留策略默认值：每个模组保留的备份数、每个模组备份的总大小上限(0为不限制)
+BACKUP_KEEP_COUNT = 5
+BACKUP_MAX_SIZE = 0
+
+# 备份文件名: 模组名.zip.年月日-时分秒[-序号][.delta].backup，旧版本的备份为 模组名.zip.backup
+BACKUP_NAME_PATTERN = re.compile(
+    r'^(?P<name>.+)\.zip(?:\.(?P<stamp>\d{8}-\d{6})(?:-(?P<seq>\d+))?)?(?P<delta>\.delta)?\.backup$')
+BACKUP_STAMP_FORMAT = '%Y%m%d-%H%M%S'
+
+# 备份方式：delta 只保存被替换条目的原始数据，full 保留整个原文件
+BACKUP_MODE_DELTA = 'delta'
+BACKUP_MODE_FULL = 'full'
+
+# 增量备份中的清单文件名和格式版本
+DELTA_MANIFEST_NAME = '.factorio-localizer-delta.json'
+DELTA_VERSION = 1
+
+
+class ScanIndex:
+    """持久化的模组扫描索引
+    
+    以 路径 + 文件大小 + 修改时间 为键缓存 analyze_mod 的结果，
+    未变化的ZIP在重新扫描时无需再次打开。
+    """
+    
+    def __init__(self, index_file: Path):
+        self.index_file = index_file
+        self.entries = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.load()
+    
+    def load(self):
+        """从磁盘加载索引"""
+        try:
+            if self.index_file.exists():
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == SCAN_INDEX_VERSION:
+                    self.entries = data.get('entries', {})
+        except Exception as e:
+            logger.warning("加载扫描索引失败: %s", e)
+            self.entries = {}
+    
+    def save(self):
+        """保存索引到磁盘（仅在有变化时写入）"""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {'version': SCAN_INDEX_VERSION, 'entries': self.entries}
+            self.dirty = False
+        
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_file.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_file)
+        except Exception as e:
+            logger.warning("保存扫描索引失败: %s", e)
+    
+    def lookup(self, zip_path: Path, stat_result: os.stat_result) -> Optional[Dict]:
+        """查找未变化文件的缓存结果，文件变化或不存在时返回None"""
+        with self.lock:
+            entry = self.entries.get(str(zip_path))
+        if (entry and entry.get('size') == stat_result.st_size
+                and entry.get('mtime_ns') == stat_result.st_mtime_ns):
+            return dict(entry['info'])
+        return None
+    
+    def store(self, zip_path: Path, stat_result: os.stat_result, mod_info: Dict):
+        """记录一个文件的分析结果"""
+        info = {k: v for k, v in mod_info.items() if k != 'size'}
+        with self.lock:
+            self.entries[str(zip_path)] = {
+                'size': stat_result.st_size,
+                'mtime_ns': stat_result.st_mtime_ns,
+                'info': info
+            }
+            self.dirty = True
+    
+    def cached_mods(self, directory: Path) -> Dict[str, Dict]:
+        """指定目录下已记录的 {路径: 模组信息}（不检查文件是否有变化）"""
+        with self.lock:
+            return {path: dict(entry['info'], size=entry['size']) for path, entry in self.entries.items()
+                    if Path(path).parent == directory}
+    
+    def remove(self, zip_path: Path):
+        """删除一个文件的记录"""
+        with self.lock:
+            if self.entries.pop(str(zip_path), None) is not None:
+                self.dirty = True
+    
+    def prune(self, directory: Path, existing_paths):
+        """删除指定目录下已不存在的文件的记录"""
+        existing = set(existing_paths)
+        with self.lock:
+            stale = [path for path in self.entries
+                     if Path(path).parent == directory and path not in existing]
+            for path in stale:
+                del self.entries[path]
+            if stale:
+                self.dirty = True
+    
+    def clear(self):
+        """清空内存中的索引"""
+        with self.lock:
+            self.entries = {}
+            self.dirty = False
+
+
+def mod_display_name(zip_path, mod_info: Dict) -> str:
+    """模组列表中显示的名称"""
+    if mod_info.get('is_backup', False):
+        if mod_info.get('backup_time'):
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mod_info['backup_time']))
+            kind = ", 增量" if mod_info.get('is_delta') else ""
+            return f"[备份] {mod_info['name']} ({created}{kind})"
+        return f"[备份] {mod_info['name']}"
+    return Path(zip_path).stem
+
+
+class ModSearchIndex:
+    """模组列表的三字母组(trigram)搜索索引
+    
+    对显示名称、标题和内部名称建立 三字母组 -> 路径集合 的倒排表，
+    查询时先取各三字母组集合的交集，再对少量候选做子串确认。
+    新查询包含上一次查询时（继续输入），只在上一次的结果中筛选。
+    """
+    
+    def __init__(self):
+        self.texts: Dict[str, str] = {}  # 路径 -> 小写的可搜索文本
+        self.trigrams: Dict[str, set] = {}
+        self.positions: Dict[str, int] = {}  # 路径 -> 列表中的位置，用于保持结果顺序
+        self.last_query = None
+        self.last_results: List[str] = []
+    
+    @staticmethod
+    def _trigrams(text: str) -> set:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def clear(self):
+        """清空索引"""
+        self.texts.clear()
+        self.trigrams.clear()
+        self.positions.clear()
+        self.last_query = None
+    
+    def add(self, zip_path: str, mod_info: Dict):
+        """添加或更新一个模组"""
+        display_name = mod_display_name(zip_path, mod_info)
+        # 各字段用换行分隔，查询文本不含换行，因此不会跨字段匹配
+        text = '\n'.join((
+            display_name,
+            mod_info.get('title', display_name),
+            mod_info.get('name', display_name),
+        )).lower()
+        if self.texts.get(zip_path) == text:
+            return
+        self.remove(zip_path)
+        self.last_query = None
+        self.texts[zip_path] = text
+        self.positions.setdefault(zip_path, len(self.positions))
+        for trigram in self._trigrams(text):
+            self.trigrams.setdefault(trigram, set()).add(zip_path)
+    
+    def remove(self, zip_path: str):
+        """删除一个模组"""
+        text = self.texts.pop(zip_path, None)
+        if text is None:
+            return
+        for trigram in self._trigrams(text):
+            paths = self.trigrams.get(trigram)
+            if paths is not None:
+                paths.discard(zip_path)
+                if not paths:
+                    del self.trigrams[trigram]
+        self.last_query = None
+    
+    def reorder(self, paths):
+        """设置结果的排列顺序"""
+        self.positions = {path: i for i, path in enumerate(paths)}
+        self.last_query = None
+    
+    def search(self, query: str) -> List[str]:
+        """返回名称、标题或内部名称包含查询文本的模组路径（不区分大小写）"""
+        query = query.strip().lower()
+        if not query:
+            return sorted(self.texts, key=self.positions.get)
+        
+        if self.last_query is not None and self.last_query in query:
+            # 继续输入：结果一定是上一次结果的子集
+            candidates = self.last_results
+        elif len(query) >= 3:
+            postings = sorted((self.trigrams.get(trigram, set()) for trigram in self._trigrams(query)), key=len)
+            candidates = set.intersection(*postings) if postings[0] else set()
+            candidates = sorted(candidates, key=self.positions.get)
+        else:
+            candidates = sorted(self.texts, key=self.positions.get)
+        
+        results = [path for path in candidates if query in self.texts.get(path, '')]
+        self.last_query = query
+        self.last_results = results
+        return results
+
+
+# ZIP格式中32位字段的上限，超过时需要ZIP64
+ZIP_FIELD_LIMIT = 0xFFFFFFFF
+ZIP_COUNT_LIMIT = 0xFFFF
+# 复制原始数据时的缓冲区大小
+ZIP_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class UnsupportedZipFile(Exception):
+    """MappedZipFile 不处理的ZIP（ZIP64、分卷、开头有其他数据、无法映射等），应改用 zipfile"""
+
+
+# 目录结束记录加上最长注释，只在文件末尾这一段中查找
+ZIP_EOCD_SEARCH_SIZE = zipfile.sizeEndCentDir + 0xFFFF
+
+
+def _dos_to_date_time(dos_date: int, dos_time: int) -> Tuple[int, int, int, int, int, int]:
+    return ((dos_date >> 9) + 1980, (dos_date >> 5) & 0xF, dos_date & 0x1F,
+            dos_time >> 11, (dos_time >> 5) & 0x3F, (dos_time & 0x1F) * 2)
+
+
+class MappedZipFile:
+    """用内存映射读取ZIP
+    
+    直接在映射中解析目录结束记录和中央目录，只为需要的条目创建 ZipInfo；
+    读取条目时把映射中的压缩数据切片(memoryview)交给 zlib 解压，不经过文件缓冲区复制。
+    遇到不常见的ZIP时抛出 UnsupportedZipFile，由调用方改用 zipfile。
+    映射只在 with 块内有效，不要长期持有（Windows上被映射的文件无法被替换）。
+    """
+    
+    def __init__(self, zip_path: Path):
+        self.zip_path = zip_path
+        with open(zip_path, 'rb') as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError, OverflowError) as e:
+                # 空文件、不支持映射的文件系统、32位系统上的大文件
+                raise UnsupportedZipFile(f"无法映射文件: {e}") from e
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def close(self):
+        self.map.close()
+    
+    def _central_directory(self) -> Tuple[int, int, int]:
+        """解析目录结束记录，返回 (条目数, 中央目录偏移, 中央目录大小)"""
+        size = len(self.map)
+        end = self.map.rfind(zipfile.stringEndArchive, max(0, size - ZIP_EOCD_SEARCH_SIZE))
+        if end < 0 or end + zipfile.sizeEndCentDir > size:
+            raise UnsupportedZipFile("找不到目录结束记录")
+        if (end >= zipfile.sizeEndCentDir64Locator and
+                self.map[end - zipfile.sizeEndCentDir64Locator:end - zipfile.sizeEndCentDir64Locator + 4]
+                == zipfile.stringEndArchive64Locator):
+            raise UnsupportedZipFile("ZIP64")
+        (_, disk, central_disk, disk_entries, entries,
+         central_size, central_offset, _) = struct.unpack_from(zipfile.structEndArchive, self.map, end)
+        if disk or central_disk or disk_entries != entries:
+            raise UnsupportedZipFile("分卷ZIP")
+        if entries == ZIP_COUNT_LIMIT or central_size == ZIP_FIELD_LIMIT or central_offset == ZIP_FIELD_LIMIT:
+            raise UnsupportedZipFile("ZIP64")
+        if central_offset + central_size != end:
+            # 自解压文件等开头有其他数据，偏移需要修正，交给 zipfile
+            raise UnsupportedZipFile("中央目录位置与记录不符")
+        return entries, central_offset, central_size
+    
+    def entries(self, name_filter: Optional[Callable[[bytes], bool]] = None) -> List[zipfile.ZipInfo]:
+        """按中央目录顺序返回条目；name_filter 按原始文件名字节筛选，只为通过的条目创建 ZipInfo"""
+        entries, pos, central_size = self._central_directory()
+        end = pos + central_size
+        result = []
+        for _ in range(entries):
+            if pos + zipfile.sizeCentralDir > end:
+                raise UnsupportedZipFile("中央目录不完整")
+            fields = struct.unpack_from(zipfile.structCentralDir, self.map, pos)
+            if fields[0] != zipfile.stringCentralDir:
+                raise UnsupportedZipFile("中央目录损坏")
+            name_length, extra_length, comment_length = fields[12:15]
+            name_start = pos + zipfile.sizeCentralDir
+            extra_start = name_start + name_length
+            comment_start = extra_start + extra_length
+            next_pos = comment_start + comment_length
+            if next_pos > end:
+                raise UnsupportedZipFile("中央目录不完整")
+            name_bytes = self.map[name_start:extra_start]
+            pos = next_pos
+            if name_filter is not None and not name_filter(name_bytes):
+                continue
+            
+            compress_size, file_size = fields[10:12]
+            header_offset = fields[18]
+            if ZIP_FIELD_LIMIT in (compress_size, file_size, header_offset):
+                raise UnsupportedZipFile("ZIP64")
+            flag_bits = fields[5]
+            filename = name_bytes.decode('utf-8' if flag_bits & 0x800 else 'cp437')
+            file_info = zipfile.ZipInfo(filename, date_time=_dos_to_date_time(fields[8], fields[7]))
+            (file_info.create_version, file_info.create_system, file_info.extract_version,
+             file_info.reserved, file_info.flag_bits, file_info.compress_type) = fields[1:7]
+            file_info.CRC = fields[9]
+            file_info.compress_size = compress_size
+            file_info.file_size = file_size
+            file_info.volume, file_info.internal_attr, file_info.external_attr = fields[15:18]
+            file_info.header_offset = header_offset
+            file_info.extra = self.map[extra_start:comment_start]
+            file_info.comment = self.map[comment_start:next_pos]
+            result.append(file_info)
+        return result
+    
+    def read(self, file_info: zipfile.ZipInfo) -> bytes:
+        """读取并解压一个条目（只支持未加密的存储和deflate条目）"""
+        if file_info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) or file_info.flag_bits & 0x1:
+            raise UnsupportedZipFile(f"不支持的压缩方式或加密条目: {file_info.filename}")
+        offset = file_info.header_offset
+        if offset + zipfile.sizeFileHeader > len(self.map):
+            raise zipfile.BadZipFile(f"本地文件头损坏: {file_info.filename}")
+        header = struct.unpack_from(zipfile.structFileHeader, self.map, offset)
+        if header[0] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"本地文件头损坏: {file_info.filename}")
+        # 本地文件头的最后两个字段是文件名长度和扩展字段长度
+        start = offset + zipfile.sizeFileHeader + header[-2] + header[-1]
+        end = start + file_info.compress_size
+        if end > len(self.map):
+            raise zipfile.BadZipFile(f"条目数据不完整: {file_info.filename}")
+        
+        with memoryview(self.map) as whole, whole[start:end] as compressed:
+            if file_info.compress_type == zipfile.ZIP_DEFLATED:
+                with instrumentation.timed('zip.decompress'):
+                    data = zlib.decompress(compressed, -15)
+            else:
+                data = compressed.tobytes()
+        instrumentation.count('zip.bytes_read', file_info.file_size)
+        if zlib.crc32(data) != file_info.CRC:
+            raise zipfile.BadZipFile(f"CRC校验失败: {file_info.filename}")
+        return data
+
+
+def _is_index_entry(name: bytes) -> bool:
+    """ModArchiveIndex 需要的条目：info.json 和 locale 目录下的文件"""
+    return b'/locale/' in name or name.endswith(b'info.json')
+
+
+class ModArchiveIndex:
+    """模组ZIP的中央目录索引
+    
+    打开ZIP时只遍历一次中央目录（通过 MappedZipFile 在内存映射中解析，不常见的ZIP改用 zipfile），
+    记录 info.json、模组根目录以及 (语言, 文件名) -> ZipInfo 的映射，之后的文件列表、读取和保存都复用它。
+    文件大小或修改时间变化后索引失效。
+    """
+    
+    def __init__(self, zip_path: Path):
+        self.zip_path = zip_path
+        stat_result = zip_path.stat()
+        self.size = stat_result.st_size
+        self.mtime_ns = stat_result.st_mtime_ns
+        
+        self.info_json = None  # info.json 的 ZipInfo
+        self.info_data = None  # 解析后的 info.json 内容
+        self.mod_root = ""
+        self.languages = []
+        self.locale_entries: Dict[Tuple[str, str], zipfile.ZipInfo] = {}
+        self.locale_files: Dict[str, List[str]] = {}
+        
+        with instrumentation.timed('zip.central_directory'):
+            try:
+                # 只解析中央目录，为 info.json 和语言文件创建 ZipInfo
+                with MappedZipFile(zip_path) as archive:
+                    self._load(archive.entries(_is_index_entry), lambda info: self.read_entry(info, archive))
+            except UnsupportedZipFile as e:
+                logger.debug("%s: %s，改用 zipfile 读取", zip_path.name, e)
+                instrumentation.count('zip.mmap_fallback')
+                with zipfile.ZipFile(zip_path, 'r') as zf:
+                    self._load(zf.filelist, zf.read)
+    
+    def _load(self, file_infos: List[zipfile.ZipInfo], read: Callable[[zipfile.ZipInfo], bytes]):
+        """从中央目录条目中找出 info.json 和语言文件"""
+        languages = set()
+        for file_info in file_infos:
+            filename = file_info.filename
+            
+            if self.info_json is None and (filename.endswith('/info.json') or filename == 'info.json'):
+                self.info_json = file_info
+                self.mod_root = filename[:-len('info.json')].rstrip('/')
+            
+            if '/locale/' in filename and not file_info.is_dir():
+                # 例如: mod_name_1.0.0/locale/en/strings.cfg
+                lang_parts = filename.split('/locale/', 1)[1].split('/')
+                if lang_parts[0]:
+                    language = lang_parts[0]
+                    languages.add(language)
+                    if filename.endswith('.cfg'):
+                        name = lang_parts[-1]
+                        if (language, name) not in self.locale_entries:
+                            self.locale_entries[(language, name)] = file_info
+                            self.locale_files.setdefault(language, []).append(name)
+        
+        if self.info_json is not None:
+            try:
+                info_content = read(self.info_json).decode('utf-8', errors='ignore')
+                self.info_data = json.loads(info_content)
+            except Exception as e:
+                logger.warning("解析info.json失败 %s: %s", self.zip_path.name, e)
+        
+        self.languages = sorted(languages)
+        for files in self.locale_files.values():
+            files.sort()
+    
+    def is_current(self) -> bool:
+        """检查ZIP文件自建立索引后是否未被修改"""
+        try:
+            stat_result = self.zip_path.stat()
+        except OSError:
+            return False
+        return stat_result.st_size == self.size and stat_result.st_mtime_ns == self.mtime_ns
+    
+    def get_entry(self, language: str, filename: str) -> Optional[zipfile.ZipInfo]:
+        """获取指定语言文件的 ZipInfo"""
+        return self.locale_entries.get((language, filename))
+    
+    def locale_path(self, language: str, filename: str) -> str:
+        """获取语言文件在ZIP中的路径（已存在则返回原路径）"""
+        entry = self.get_entry(language, filename)
+        if entry is not None:
+            return entry.filename
+        return f"{self.mod_root}/locale/{language}/{filename}".lstrip('/')
+    
+    @contextlib.contextmanager
+    def mapped(self):
+        """映射整个文件，用于连续读取多个条目（传给 read_entry）；无法映射时得到None"""
+        try:
+            archive = MappedZipFile(self.zip_path)
+        except UnsupportedZipFile:
+            yield None
+            return
+        with archive:
+            yield archive
+    
+    def read_entry(self, file_info: zipfile.ZipInfo, archive: Optional[MappedZipFile] = None) -> bytes:
+        """根据 ZipInfo 直接读取条目内容，无需重新解析中央目录
+        
+        archive 为 mapped() 得到的映射时从映射中解压；只读一个条目时普通读取更快（不必建立映射）。
+        """
+        if file_info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) or file_info.flag_bits & 0x1:
+            # 不常见的压缩方式或加密条目交给 zipfile 处理
+            with instrumentation.timed('zip.read_entry'), zipfile.ZipFile(self.zip_path, 'r') as zf:
+                return zf.read(file_info)
+        
+        if archive is not None:
+            with instrumentation.timed('zip.read_entry'):
+                return archive.read(file_info)
+        
+        with instrumentation.timed('zip.read_entry'), open(self.zip_path, 'rb') as f:
+            f.seek(file_info.header_offset)
+            header = struct.unpack(zipfile.structFileHeader, f.read(zipfile.sizeFileHeader))
+            if header[0] != zipfile.stringFileHeader:
+                raise zipfile.BadZipFile(f"本地文件头损坏: {file_info.filename}")
+            # 本地文件头的最后两个字段是文件名长度和扩展字段长度
+            f.seek(header[-2] + header[-1], os.SEEK_CUR)
+            data = f.read(file_info.compress_size)
+        
+        if file_info.compress_type == zipfile.ZIP_DEFLATED:
+            with instrumentation.timed('zip.decompress'):
+                data = zlib.decompress(data, -15)
+        instrumentation.count('zip.bytes_read', file_info.file_size)
+        if zlib.crc32(data) != file_info.CRC:
+            raise zipfile.BadZipFile(f"CRC校验失败: {file_info.filename}")
+        return data
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """移除扩展字段中的ZIP64记录（重新写出的头部使用32位字段）"""
+    result = []
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, data_size = struct.unpack('<HH', extra[pos:pos + 4])
+        if header_id != 0x0001:
+            result.append(extra[pos:pos + 4 + data_size])
+        pos += 4 + data_size
+    return b''.join(result)
+
+
+def _dos_date_time(date_time) -> Tuple[int, int]:
+    """把 ZipInfo.date_time 转换为DOS格式的(时间, 日期)"""
+    dos_time = date_time[3] << 11 | date_time[4] << 5 | (date_time[5] // 2)
+    dos_date = (date_time[0] - 1980) << 9 | date_time[1] << 5 | date_time[2]
+    return dos_time, dos_date
+
+
+class RawZipWriter:
+    """按原始压缩数据写出ZIP文件
+    
+    未修改的条目直接复制压缩后的字节，不经过解压和重新压缩；
+    只有新写入的条目才会被压缩。不支持ZIP64。
+    """
+    
+    def __init__(self, fp):
+        self.fp = fp
+        self.central_entries = []  # (ZipInfo, 文件名字节, 本地头偏移, 标志位)
+    
+    def _write_local_header(self, file_info: zipfile.ZipInfo, name_bytes: bytes, extra: bytes, flag_bits: int):
+        dos_time, dos_date = _dos_date_time(file_info.date_time)
+        self.fp.write(struct.pack(
+            zipfile.structFileHeader, zipfile.stringFileHeader,
+            file_info.extract_version, file_info.reserved, flag_bits,
+            file_info.compress_type, dos_time, dos_date, file_info.CRC,
+            file_info.compress_size, file_info.file_size,
+            len(name_bytes), len(extra)))
+        self.fp.write(name_bytes)
+        self.fp.write(extra)
+    
+    def copy_entry(self, source_fp, file_info: zipfile.ZipInfo):
+        """从源ZIP复制一个条目的压缩数据"""
+        source_fp.seek(file_info.header_offset)
+        header = struct.unpack(zipfile.structFileHeader, source_fp.read(zipfile.sizeFileHeader))
+        if header[0] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"本地文件头损坏: {file_info.filename}")
+        name_bytes = source_fp.read(header[-2])
+        local_extra = _strip_zip64_extra(source_fp.read(header[-1]))
+        
+        offset = self.fp.tell()
+        # CRC和大小已从中央目录得知，直接写入本地头，不再需要数据描述符
+        flag_bits = file_info.flag_bits & ~0x08
+        self._write_local_header(file_info, name_bytes, local_extra, flag_bits)
+        
+        remaining = file_info.compress_size
+        with instrumentation.timed('zip.copy_raw'):
+            while remaining > 0:
+                chunk = source_fp.read(min(ZIP_COPY_BUFFER_SIZE, remaining))
+                if not chunk:
+                    raise zipfile.BadZipFile(f"条目数据不完整: {file_info.filename}")
+                self.fp.write(chunk)
+                remaining -= len(chunk)
+        instrumentation.count('zip.bytes_copied', file_info.compress_size)
+        
+        self.central_entries.append((file_info, name_bytes, offset, flag_bits))
+    
+    def write_file(self, filename: str, data: bytes, template: Optional[zipfile.ZipInfo] = None):
+        """压缩并写入一个新条目"""
+        file_info = zipfile.ZipInfo(filename, date_time=time.localtime(time.time())[:6])
+        file_info.compress_type = zipfile.ZIP_DEFLATED
+        file_info.external_attr = template.external_attr if template else 0o600 << 16
+        
+        with instrumentation.timed('zip.compress'):
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+            compressed = compressor.compress(data) + compressor.flush()
+        file_info.file_size = len(data)
+        file_info.compress_size = len(compressed)
+        file_info.CRC = zlib.crc32(data)
+        
+        try:
+            name_bytes = filename.encode('ascii')
+            flag_bits = 0
+        except UnicodeEncodeError:
+            name_bytes = filename.encode('utf-8')
+            flag_bits = 0x800
+        
+        offset = self.fp.tell()
+        self._write_local_header(file_info, name_bytes, b'', flag_bits)
+        self.fp.write(compressed)
+        self.central_entries.append((file_info, name_bytes, offset, flag_bits))
+    
+    def close(self, comment: bytes = b''):
+        """写出中央目录和目录结束记录"""
+        central_offset = self.fp.tell()
+        for file_info, name_bytes, offset, flag_bits in self.central_entries:
+            dos_time, dos_date = _dos_date_time(file_info.date_time)
+            extra = _strip_zip64_extra(file_info.extra)
+            comment_bytes = file_info.comment
+            self.fp.write(struct.pack(
+                zipfile.structCentralDir, zipfile.stringCentralDir,
+                file_info.create_version, file_info.create_system,
+                file_info.extract_version, file_info.reserved, flag_bits,
+                file_info.compress_type, dos_time, dos_date, file_info.CRC,
+                file_info.compress_size, file_info.file_size,
+                len(name_bytes), len(extra), len(comment_bytes),
+                0, file_info.internal_attr, file_info.external_attr, offset))
+            self.fp.write(name_bytes)
+            self.fp.write(extra)
+            self.fp.write(comment_bytes)
+        central_size = self.fp.tell() - central_offset
+        
+        if central_offset + central_size > ZIP_FIELD_LIMIT or len(self.central_entries) > ZIP_COUNT_LIMIT:
+            raise zipfile.LargeZipFile("ZIP文件过大，需要ZIP64")
+        
+        entry_count = len(self.central_entries)
+        self.fp.write(struct.pack(
+            zipfile.structEndArchive, zipfile.stringEndArchive,
+            0, 0, entry_count, entry_count, central_size, central_offset, len(comment)))
+        self.fp.write(comment)
+
+
+def can_copy_raw(file_infos: List[zipfile.ZipInfo], extra_count: int = 0) -> bool:
+    """条目能否由 RawZipWriter 原样复制（不需要ZIP64、没有加密）"""
+    return all(
+        info.compress_size < ZIP_FIELD_LIMIT and info.file_size < ZIP_FIELD_LIMIT
+        and info.header_offset < ZIP_FIELD_LIMIT and not info.flag_bits & 0x1
+        for info in file_infos
+    ) and len(file_infos) + extra_count <= ZIP_COUNT_LIMIT
+
+
+def archive_fingerprint(zip_path: Path) -> str:
+    """根据文件大小和中央目录（文件名、CRC、压缩大小、偏移）计算ZIP的标识"""
+    digest = hashlib.sha256(str(zip_path.stat().st_size).encode('ascii'))
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        for info in zf.infolist():
+            digest.update(f"\n{info.filename}\0{info.CRC}\0{info.compress_size}\0{info.header_offset}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_delta_backup(original_path: Path, result_path: Path, replacements: Dict[str, bytes], delta_path: Path):
+    """写出增量备份：原文件中被替换条目的原始压缩数据，以及原文件和新文件的标识
+    
+    配合 result_path（修改后的文件）即可用 apply_delta_backup 还原出原文件的全部内容。
+    """
+    original_stat = original_path.stat()
+    with zipfile.ZipFile(original_path, 'r') as original_zip:
+        original_infos = {info.filename: info for info in original_zip.infolist()}
+    replaced = [name for name in replacements if name in original_infos]
+    added = [name for name in replacements if name not in original_infos]
+    
+    manifest = {
+        'version': DELTA_VERSION,
+        'original': {
+            'name': original_path.name,
+            'size': original_stat.st_size,
+            'mtime_ns': original_stat.st_mtime_ns,
+            'fingerprint': archive_fingerprint(original_path)
+        },
+        'result': {
+            'size': result_path.stat().st_size,
+            'fingerprint': archive_fingerprint(result_path)
+        },
+        'replaced': replaced,
+        'added': added
+    }
+    
+    with open(original_path, 'rb') as source_fp, open(delta_path, 'wb') as delta_fp:
+        writer = RawZipWriter(delta_fp)
+        for name in replaced:
+            writer.copy_entry(source_fp, original_infos[name])
+        writer.write_file(DELTA_MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+        writer.close()
+
+
+def read_delta_manifest(delta_path: Path) -> Dict:
+    """读取增量备份的清单"""
+    with zipfile.ZipFile(delta_path, 'r') as delta_zip:
+        manifest = json.loads(delta_zip.read(DELTA_MANIFEST_NAME).decode('utf-8'))
+    if manifest.get('version') != DELTA_VERSION:
+        raise ValueError(f"不支持的增量备份版本: {delta_path.name}")
+    return manifest
+
+
+def apply_delta_backup(current_path: Path, delta_path: Path, target_path: Path) -> Dict:
+    """把增量备份应用到 current_path，得到的原文件写到 target_path，返回清单
+    
+    current_path 必须是该备份创建时写出的文件（按标识校验）。
+    """
+    manifest = read_delta_manifest(delta_path)
+    if archive_fingerprint(current_path) != manifest['result']['fingerprint']:
+        raise ValueError(f"模组文件在备份 {delta_path.name} 之后已被修改，无法应用增量备份")
+    
+    replaced = set(manifest['replaced'])
+    added = set(manifest['added'])
+    with zipfile.ZipFile(delta_path, 'r') as delta_zip:
+        delta_infos = {info.filename: info for info in delta_zip.infolist()}
+    with zipfile.ZipFile(current_path, 'r') as current_zip:
+        current_infos = current_zip.infolist()
+        comment = current_zip.comment
+    if not can_copy_raw(current_infos):
+        raise ValueError(f"模组文件需要ZIP64或包含加密条目，无法应用增量备份: {current_path.name}")
+    
+    with open(current_path, 'rb') as current_fp, open(delta_path, 'rb') as delta_fp, \
+            open(target_path, 'wb') as target_fp:
+        writer = RawZipWriter(target_fp)
+        for info in current_infos:
+            if info.filename in added:
+                continue
+            if info.filename in replaced:
+                # 被替换的条目换回原始数据，位置不变
+                writer.copy_entry(delta_fp, delta_infos[info.filename])
+            else:
+                writer.copy_entry(current_fp, info)
+        writer.close(comment)
+    return manifest
+
+
+def rewrite_zip_entries(source_path: Path, target_path: Path, replacements: Dict[str, bytes]) -> bool:
+    """把源ZIP写到目标路径，同时替换或新增指定的条目，返回是否原样复制了未修改的条目
+    
+    未修改的条目原样复制压缩数据；遇到ZIP64或加密条目时退回到逐个解压重写。
+    """
+    with zipfile.ZipFile(source_path, 'r') as source_zip:
+        file_infos = source_zip.infolist()
+        comment = source_zip.comment
+        
+        if not can_copy_raw(file_infos, len(replacements)):
+            with zipfile.ZipFile(target_path, 'w', zipfile.ZIP_DEFLATED) as target_zip:
+                for file_info in file_infos:
+                    if file_info.filename not in replacements:
+                        target_zip.writestr(file_info, source_zip.read(file_info.filename))
+                for filename, data in replacements.items():
+                    target_zip.writestr(filename, data)
+            return False
+    
+    pending = dict(replacements)
+    with open(source_path, 'rb') as source_fp, open(target_path, 'wb') as target_fp:
+        writer = RawZipWriter(target_fp)
+        for file_info in file_infos:
+            if file_info.filename in pending:
+                # 被替换的条目保持原来的位置
+                writer.write_file(file_info.filename, pending.pop(file_info.filename), template=file_info)
+            elif file_info.filename not in replacements:
+                writer.copy_entry(source_fp, file_info)
+        for filename, data in pending.items():
+            writer.write_file(filename, data)
+        writer.close(comment)
+    return True
+
+
+# 模组路径 -> ModArchiveIndex，扫描线程和界面线程共用
+_archive_indexes: Dict[str, ModArchiveIndex] = {}
+_archive_indexes_lock = threading.Lock()
+
+
+def get_archive_index(zip_path: Path) -> ModArchiveIndex:
+    """获取模组的中央目录索引，文件变化时自动重建"""
+    key = str(zip_path)
+    with _archive_indexes_lock:
+        index = _archive_indexes.get(key)
+    if index is not None and index.is_current():
+        instrumentation.count('zip.index_hit')
+        return index
+    
+    instrumentation.count('zip.index_miss')
+    index = ModArchiveIndex(zip_path)
+    with _archive_indexes_lock:
+        _archive_indexes[key] = index
+    return index
+
+
+def invalidate_archive_index(zip_path: Path):
+    """丢弃模组的中央目录索引"""
+    with _archive_indexes_lock:
+        _archive_indexes.pop(str(zip_path), None)
+
+
+def default_mods_path() -> Path:
+    """默认的模组目录"""
+    return Path(os.path.expanduser("~")) / "AppData" / "Roaming" / "Factorio" / "mods"
+
+
+def default_cache_dir() -> Path:
+    """默认的缓存目录"""
+    return Path(tempfile.gettempdir()) / "factorio_mod_cache"
+
+
+def format_file_size(size_bytes: int) -> str:
+    """格式化文件大小"""
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    elif size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KB"
+    else:
+        return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+def analyze_mod(zip_path: Path) -> Optional[Dict]:
+    """分析模组信息"""
+    try:
+        index = get_archive_index(zip_path)
+    except Exception as e:
+        logger.warning("无法分析模组 %s: %s", zip_path, e)
+        return None
+    
+    mod_info = {'languages': [], 'has_locale': False, 'name': zip_path.stem}
+    
+    if index.info_json is not None:
+        if index.info_data is not None:
+            info_data = index.info_data
+            mod_info['name'] = info_data.get('name', zip_path.stem)
+            mod_info['version'] = info_data.get('version', 'unknown')
+            mod_info['title'] = info_data.get('title', mod_info['name'])
+        else:
+            mod_info['name'] = zip_path.stem
+            mod_info['version'] = 'unknown'
+            mod_info['title'] = zip_path.stem
+    
+    mod_info['mod_root'] = index.mod_root
+    mod_info['locale_files'] = {lang: list(files) for lang, files in index.locale_files.items()}
+    
+    if index.languages:
+        mod_info['has_locale'] = True
+        mod_info['languages'] = list(index.languages)
+        logger.debug("找到语言 %s: %s", zip_path.name, mod_info['languages'])
+    else:
+        logger.debug("未找到语言文件: %s", zip_path.name)
+    
+    return mod_info
+
+
+def collect_locale_strings(zip_path: Path) -> List[LocaleString]:
+    """读取模组中所有语言文件的 (语言, 文件名, 分类, 键, 值)"""
+    index = get_archive_index(zip_path)
+    strings = []
+    # 所有语言文件从同一个映射中读取
+    with index.mapped() as archive:
+        for (language, filename), file_info in index.locale_entries.items():
+            try:
+                locale = parse_locale_bytes(index.read_entry(file_info, archive))
+            except Exception as e:
+                logger.warning("读取语言文件失败 %s/%s/%s: %s", zip_path.name, language, filename, e)
+                continue
+            strings.extend((language, filename, section, key, value) for (section, key), value in locale.items())
+    return strings
+
+
+def update_text_index(zip_path: Path, stat_result: os.stat_result, text_index: LocaleTextIndex) -> bool:
+    """模组有变化时重新索引其语言文本，返回是否重新索引"""
+    if text_index.is_current(zip_path, stat_result):
+        return False
+    with instrumentation.timed('text_index.mod'):
+        text_index.store(zip_path, stat_result, collect_locale_strings(zip_path))
+    return True
+
+
+def index_locale_texts(mods_data: Dict[str, Dict], text_index: LocaleTextIndex, workers: int = SCAN_WORKERS,
+                       cancel_event: Optional[threading.Event] = None,
+                       progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """为已扫描的模组建立语言文本索引（只重新索引有变化的模组），返回重新索引的模组数
+
+    扫描只读取模组信息，文本索引在扫描结束后单独建立。progress(已完成数, 总数)。
+    """
+    paths = [Path(path) for path, info in mods_data.items()
+             if info.get('has_locale') and not info.get('is_backup')]
+    indexed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_update_text_index_safe, path, text_index, cancel_event): path for path in paths}
+        for done, future in enumerate(as_completed(futures), 1):
+            if future.result():
+                indexed += 1
+            if progress:
+                progress(done, len(paths))
+    return indexed
+
+
+def _update_text_index_safe(zip_path: Path, text_index: LocaleTextIndex,
+                            cancel_event: Optional[threading.Event]) -> bool:
+    if cancel_event is not None and cancel_event.is_set():
+        return False
+    try:
+        return update_text_index(zip_path, zip_path.stat(), text_index)
+    except Exception as e:
+        logger.warning("索引语言文本失败 %s: %s", zip_path.name, e)
+        return False
+
+
+def get_locale_files(zip_path: Path, language: str) -> List[str]:
+    """获取指定语言的locale文件列表"""
+    try:
+        return list(get_archive_index(zip_path).locale_files.get(language, []))
+    except Exception as e:
+        logger.warning("获取locale文件失败 %s: %s", zip_path.name, e)
+        return []
+
+
+def read_locale_file(zip_path: Path, language: str, filename: str) -> str:
+    """从ZIP文件中读取locale文件内容"""
+    index = get_archive_index(zip_path)
+    file_info = index.get_entry(language, filename)
+    if file_info is None:
+        raise FileNotFoundError(f"文件未找到: locale/{language}/{filename}")
+    
+    return index.read_entry(file_info).decode('utf-8', errors='ignore')
+
+
+def load_locale_file(zip_path: Path, language: str, filename: str) -> LocaleFile:
+    """从ZIP文件中读取并解析locale文件"""
+    index = get_archive_index(zip_path)
+    file_info = index.get_entry(language, filename)
+    if file_info is None:
+        raise FileNotFoundError(f"文件未找到: locale/{language}/{filename}")
+    
+    return parse_locale_bytes(index.read_entry(file_info))
+
+
+def load_locale_file_optional(zip_path: Path, language: str, filename: str) -> Optional[LocaleFile]:
+    """读取并解析locale文件，文件不存在时返回None"""
+    try:
+        return load_locale_file(zip_path, language, filename)
+    except FileNotFoundError:
+        return None
+
+
+def export_untranslated(zip_path: Path, source_lang: str, target_lang: str, filename: str,
+                        target: Optional[LocaleFile] = None) -> Optional[LocaleFile]:
+    """生成只包含目标语言中缺失或未翻译的键的源语言文件，没有需要翻译的键时返回None
+    
+    target 为空时读取ZIP中现有的目标语言文件。
+    """
+    source = load_locale_file(zip_path, source_lang, filename)
+    if target is None:
+        target = load_locale_file_optional(zip_path, target_lang, filename)
+    
+    keys = untranslated_keys(source, target)
+    if not keys:
+        return None
+    return extract_keys(source, keys)
+
+
+def merge_translation(zip_path: Path, target_lang: str, filename: str, content: str,
+                      source_lang: Optional[str] = None) -> str:
+    """把导入的（可能只含部分键的）译文合并到现有目标文件中
+    
+    目标语言文件不存在时以源语言文件为模板，两者都不存在时直接使用导入的内容。
+    """
+    base = load_locale_file_optional(zip_path, target_lang, filename)
+    if base is None and source_lang:
+        base = load_locale_file_optional(zip_path, source_lang, filename)
+    if base is None:
+        return content
+    return merge_locale(base, parse_locale(content)).serialize()
+
+
+def modify_zip_file(zip_path: Path, target_lang: str, filename: str, content: str):
+    """修改ZIP文件中的语言文件"""
+    modify_zip_files(zip_path, {(target_lang, filename): content})
+
+
+def modify_zip_files(zip_path: Path, changes: Dict[Tuple[str, str], str],
+                     backup_path: Optional[Path] = None) -> Optional[Path]:
+    """一次性修改ZIP文件中的多个语言文件，changes 为 {(语言, 文件名): 内容}
+    
+    指定 backup_path 时：增量备份只保存被替换的条目；完整备份由原文件重命名而来（不复制），
+    新文件写在原位置。ZIP64或加密的模组无法增量备份，改为完整备份。
+    返回实际写入的备份路径。
+    """
+    delta = backup_path is not None and is_delta_backup(backup_path)
+    # 在模组所在目录创建临时文件，替换时只需重命名
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.zip.tmp', dir=zip_path.parent) as temp_file:
+        temp_path = Path(temp_file.name)
+    
+    try:
+        # 模组根目录和已有文件路径从索引中获取
+        index = get_archive_index(zip_path)
+        replacements = {
+            index.locale_path(target_lang, filename): content.encode('utf-8', errors='surrogateescape')
+            for (target_lang, filename), content in changes.items()
+        }
+        
+        # 未修改的条目直接复制压缩数据，只压缩新的语言文件
+        with instrumentation.timed('zip.rewrite'):
+            copied_raw = rewrite_zip_entries(zip_path, temp_path, replacements)
+        if delta and not copied_raw:
+            backup_path = new_backup_path(zip_path)
+            delta = False
+        
+        # 替换原文件
+        if delta:
+            with instrumentation.timed('zip.delta_backup'):
+                write_delta_backup(zip_path, temp_path, replacements, backup_path)
+            with instrumentation.timed('fs.rename'):
+                os.replace(temp_path, zip_path)
+        elif backup_path is None:
+            with instrumentation.timed('fs.rename'):
+                os.replace(temp_path, zip_path)
+        else:
+            with instrumentation.timed('fs.rename'):
+                os.replace(zip_path, backup_path)
+                try:
+                    os.replace(temp_path, zip_path)
+                except Exception:
+                    os.replace(backup_path, zip_path)
+                    raise
+        invalidate_archive_index(zip_path)
+        return backup_path
+        
+    except Exception as e:
+        # 清理临时文件
+        if temp_path.exists():
+            temp_path.unlink()
+        if delta and backup_path.exists():
+            # 新文件未能替换原文件，增量备份无效
+            backup_path.unlink()
+        raise e
+
+
+def find_mod_files(mods_path: Path) -> List[Path]:
+    """列出目录中的模组文件和备份文件（备份按模组分组，最新的在前）"""
+    zip_files = list(mods_path.glob("*.zip"))
+    backup_files = [path for path in mods_path.glob("*.backup") if parse_backup_name(path)]
+    return zip_files + sort_backups(backup_files)
+
+
+def scan_mod_file(file_path: Path, scan_index: Optional[ScanIndex] = None,
+                  cancel_event: Optional[threading.Event] = None) -> Optional[Dict]:
+    """分析单个模组或备份文件（可在工作线程中调用）"""
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    
+    stat_result = file_path.stat()
+    backup = parse_backup_name(file_path)
+    if backup:
+        # 备份文件不分析语言
+        info = {
+            'name': backup[0],
+            'is_backup': True,
+            'is_delta': is_delta_backup(file_path),
+            'backup_time': backup_time(file_path),
+            'languages': [],
+            'has_locale': False
+        }
+    else:
+        # 文件未变化时直接使用索引中的结果，不再打开ZIP
+        info = scan_index.lookup(file_path, stat_result) if scan_index else None
+        if info is None:
+            info = analyze_mod(file_path)
+            if not info:
+                return None
+            if scan_index:
+                scan_index.store(file_path, stat_result, info)
+    
+    info['size'] = stat_result.st_size
+    return info
+
+
+def scan_directory(mods_path: Path, scan_index: Optional[ScanIndex] = None,
+                   workers: int = SCAN_WORKERS) -> Dict[str, Dict]:
+    """并行扫描整个模组目录，返回 {路径: 模组信息}（按文件顺序）"""
+    all_files = find_mod_files(mods_path)
+    mods_data = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda p: _scan_mod_file_safe(p, scan_index), all_files)
+        for file_path, info in zip(all_files, results):
+            if info:
+                mods_data[str(file_path)] = info
+    
+    if scan_index:
+        scan_index.prune(mods_path, [str(p) for p in all_files])
+        scan_index.save()
+    return mods_data
+
+
+def _scan_mod_file_safe(file_path: Path, scan_index: Optional[ScanIndex]) -> Optional[Dict]:
+    try:
+        with instrumentation.timed('scan.mod_file'):
+            return scan_mod_file(file_path, scan_index)
+    except Exception as e:
+        logger.warning("分析文件失败 %s: %s", file_path.name, e)
+        return None
+
+
+def parse_backup_name(backup_path: Path) -> Optional[Tuple[str, Optional[str]]]:
+    """解析备份文件名，返回 (模组文件名(不含.zip), 时间戳)，旧版本的备份时间戳为None"""
+    match = BACKUP_NAME_PATTERN.match(Path(backup_path).name)
+    if not match:
+        return None
+    return match.group('name'), match.group('stamp')
+
+
+def is_delta_backup(backup_path: Path) -> bool:
+    """是否为增量备份"""
+    match = BACKUP_NAME_PATTERN.match(Path(backup_path).name)
+    return bool(match and match.group('delta'))
+
+
+def backup_time(backup_path: Path) -> float:
+    """备份创建时间：取自文件名中的时间戳，旧版本的备份使用修改时间"""
+    match = BACKUP_NAME_PATTERN.match(backup_path.name)
+    if match and match.group('stamp'):
+        seconds = time.mktime(time.strptime(match.group('stamp'), BACKUP_STAMP_FORMAT))
+        # 同一秒内的多个备份按序号排列
+        return seconds + int(match.group('seq') or 0) * 1e-3
+    return backup_path.stat().st_mtime
+
+
+def sort_backups(backup_paths: List[Path]) -> List[Path]:
+    """按模组名排序，同一模组的备份最新的在前"""
+    keyed = [(parse_backup_name(path)[0].lower(), -backup_time(path), path) for path in backup_paths]
+    return [path for _, _, path in sorted(keyed, key=lambda item: item[:2])]
+
+
+def list_backups(zip_path: Path) -> List[Path]:
+    """列出一个模组的所有备份，最新的在前"""
+    name = zip_path.stem
+    candidates = [path for path in zip_path.parent.glob(f"{glob.escape(name)}.zip*.backup")
+                  if (parse_backup_name(path) or (None,))[0] == name]
+    return sort_backups(candidates)
+
+
+def new_backup_path(zip_path: Path, delta: bool = False) -> Path:
+    """为模组生成一个带时间戳的新备份路径"""
+    suffix = '.delta.backup' if delta else '.backup'
+    stamp = time.strftime(BACKUP_STAMP_FORMAT)
+    # 同一秒内已有备份时使用更大的序号，保证新备份排在最前
+    seqs = []
+    for path in zip_path.parent.glob(f"{glob.escape(zip_path.name)}.{stamp}*.backup"):
+        match = BACKUP_NAME_PATTERN.match(path.name)
+        if match and match.group('stamp') == stamp:
+            seqs.append(int(match.group('seq') or 0))
+    if not seqs:
+        return zip_path.with_name(f"{zip_path.name}.{stamp}{suffix}")
+    return zip_path.with_name(f"{zip_path.name}.{stamp}-{max(seqs) + 1}{suffix}")
+
+
+def prune_backups(zip_path: Path, keep_count: int = BACKUP_KEEP_COUNT,
+                  max_size: int = BACKUP_MAX_SIZE) -> List[Path]:
+    """按保留策略删除旧备份，返回被删除的备份路径
+    
+    keep_count 为保留的最大数量，max_size 为备份总大小上限(字节)，0 表示不限制。
+    最新的备份总是保留。
+    """
+    removed = []
+    total_size = 0
+    for i, backup_path in enumerate(list_backups(zip_path)):
+        total_size += backup_path.stat().st_size
+        if i > 0 and ((keep_count > 0 and i >= keep_count) or (max_size > 0 and total_size > max_size)):
+            try:
+                backup_path.unlink()
+                removed.append(backup_path)
+            except OSError as e:
+                logger.warning("删除旧备份失败 %s: %s", backup_path.name, e)
+    return removed
+
+
+def restore_backup(backup_path: Path) -> Path:
+    """用备份还原模组文件，返回模组路径
+    
+    完整备份直接移动回原位置。增量备份从当前文件（或更近的完整备份）开始，
+    由新到旧依次应用到目标备份为止。还原后，比目标新的增量备份所对应的文件已不存在，
+    这些增量备份随之删除。
+    """
+    parsed = parse_backup_name(backup_path)
+    if not parsed:
+        raise ValueError(f"不是备份文件: {backup_path.name}")
+    zip_path = backup_path.parent / f"{parsed[0]}.zip"
+    
+    chain = []
+    for path in list_backups(zip_path):
+        chain.append(path)
+        if path == backup_path:
+            break
+    else:
+        raise ValueError(f"找不到备份: {backup_path.name}")
+    
+    if not is_delta_backup(backup_path):
+        os.replace(backup_path, zip_path)
+    else:
+        # 从离目标最近的完整备份开始，没有则从当前文件开始
+        current = zip_path
+        deltas = []
+        for path in chain:
+            if is_delta_backup(path):
+                deltas.append(path)
+            else:
+                current = path
+                deltas = []
+        
+        temp_paths = []
+        try:
+            manifest = None
+            for delta_path in deltas:
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.zip.tmp', dir=zip_path.parent) as temp_file:
+                    temp_paths.append(Path(temp_file.name))
+                manifest = apply_delta_backup(current, delta_path, temp_paths[-1])
+                current = temp_paths[-1]
+            
+            os.replace(current, zip_path)
+            # 恢复原文件的修改时间
+            os.utime(zip_path, ns=(time.time_ns(), manifest['original']['mtime_ns']))
+        finally:
+            for temp_path in temp_paths:
+                if temp_path.exists():
+                    temp_path.unlink()
+    invalidate_archive_index(zip_path)
+    
+    for path in chain:
+        if is_delta_backup(path):
+            path.unlink()
+    return zip_path
+
+
+def commit_mod_changes(zip_path: Path, changes: Dict[Tuple[str, str], str],
+                       scan_index: Optional[ScanIndex] = None, backup: bool = True,
+                       text_index: Optional[LocaleTextIndex] = None,
+                       keep_backups: int = BACKUP_KEEP_COUNT,
+                       max_backup_size: int = BACKUP_MAX_SIZE,
+                       backup_mode: str = BACKUP_MODE_DELTA) -> Tuple[Optional[Path], Optional[Dict]]:
+    """把一个模组的全部更改写入ZIP，只重写一次
+    
+    增量备份只保存被替换的条目（ZIP64或加密的模组退回到完整备份），
+    完整备份由原文件重命名而来；之后按保留策略清理旧备份。
+    返回 (备份路径, 重新分析后的模组信息)。
+    """
+    backup_path = None
+    if backup:
+        backup_path = new_backup_path(zip_path, backup_mode == BACKUP_MODE_DELTA)
+    backup_path = modify_zip_files(zip_path, changes, backup_path)
+    if backup_path:
+        prune_backups(zip_path, keep_backups, max_backup_size)
+    
+    # 重新分析模组（更新语言列表）
+    new_mod_info = analyze_mod(zip_path)
+    if new_mod_info:
+        stat_result = zip_path.stat()
+        if scan_index:
+            scan_index.store(zip_path, stat_result, new_mod_info)
+        if text_index is not None:
+            update_text_index(zip_path, stat_result, text_index)
+        new_mod_info['size'] = stat_result.st_size
+    return backup_path, new_mod_info
+
+
+def _version_key(version: str) -> Tuple:
+    """把版本号转换为可比较的元组"""
+    parts = []
+    for part in str(version).split('.'):
+        parts.append((0, int(part), '') if part.isdigit() else (1, 0, part))
+    return tuple(parts)
+
+
+def latest_mods(mods_data: Dict[str, Dict]) -> Dict[str, Tuple[Path, Dict]]:
+    """按模组内部名称分组，同一模组有多个版本时取最新版本"""
+    result = {}
+    for path, info in mods_data.items():
+        if info.get('is_backup'):
+            continue
+        name = info.get('name', Path(path).stem)
+        current = result.get(name)
+        if current is None or _version_key(info.get('version', '')) > _version_key(current[1].get('version', '')):
+            result[name] = (Path(path), info)
+    return result
+
+
+def preferred_source_language(languages: List[str]) -> Optional[str]:
+    """选择默认的源语言：优先英语，否则第一个"""
+    if not languages:
+        return None
+    return 'en' if 'en' in languages else languages[0]
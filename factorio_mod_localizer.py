@@ -8,49 +8,421 @@ Factorio Mod Localization Tool
 """
 
 import os
-import zipfile
 import json
 import shutil
-import tempfile
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkinter.scrolledtext import ScrolledText
 
+from factorio_mod_core import (
+    SUPPORTED_LANGUAGES, SCAN_WORKERS, ScanIndex, ModSearchIndex, mod_display_name, default_mods_path, default_cache_dir,
+    format_file_size, get_locale_files, read_locale_file, find_mod_files, scan_mod_file, index_locale_texts,
+    commit_mod_changes, preferred_source_language, export_untranslated, load_locale_file_optional, latest_mods,
+    BACKUP_KEEP_COUNT, BACKUP_MAX_SIZE, BACKUP_MODE_DELTA, list_backups, sort_backups, restore_backup
+)
+import factorio_instrumentation as instrumentation
+from factorio_instrumentation import INSTRUMENTATION
+from factorio_locale import LocaleFile, LocaleKey, encode_value, parse_locale, merge_locale
+from factorio_logging import DEFAULT_LOG_LEVEL, get_logger, setup_logging, shutdown_logging
+from factorio_translation_memory import TranslationMemory
+from factorio_text_index import LocaleTextIndex, SEARCH_LIMIT
+from factorio_watcher import FileChanges, ModDirectoryWatcher
+from factorio_pipeline import (
+    PipelineState, STAGE_EXPORT, STAGE_IMPORT, default_state_path, export_bundle, import_bundle, missing_language_mods
+)
+
+logger = get_logger('gui')
+
+# 后台扫描参数：队列轮询间隔(毫秒)、每次轮询最多处理的结果数
+SCAN_POLL_INTERVAL = 50
+SCAN_BATCH_SIZE = 50
+
+# 检查目录监视结果的间隔(毫秒)
+WATCH_QUEUE_POLL_INTERVAL = 500
+# 停止监视时等待正在分析的文件的最长时间(秒)
+WATCH_STOP_TIMEOUT = 5.0
+
+# 停止建立文本索引时等待正在索引的模组的最长时间(秒)
+TEXT_INDEX_STOP_TIMEOUT = 5.0
+
+# 搜索框停止输入多久后再过滤(毫秒)
+SEARCH_DEBOUNCE_MS = 150
+
+# 树视图每次空闲回调中最多创建的行数，第一批会立即显示
+TREE_PAGE_SIZE = 100
+
+# 编辑器分批插入大文件时每批的字符数（在换行处截断）和批次间隔(毫秒)
+TEXT_CHUNK_SIZE = 32 * 1024
+TEXT_CHUNK_INTERVAL = 1
+
+
+class LazyTreeRows:
+    """树视图的行模型
+    
+    每行的显示内容只计算一次并保存在 rows 中。
+    过滤或排序时通过 set_children 重新排列/隐藏已有项目，而不是删除后重新插入；
+    尚未创建的行分批在空闲时创建，第一屏立即显示。
+    """
+    
+    def __init__(self, root: tk.Tk, tree: ttk.Treeview):
+        self.root = root
+        self.tree = tree
+        self.rows: Dict[str, Tuple[str, Tuple]] = {}  # 项目ID -> (文本, 各列的值)
+        self.materialized = set()  # 已在树视图中创建的项目ID
+        self.render_generation = 0
+    
+    def clear(self):
+        """删除所有行"""
+        self.render_generation += 1
+        if self.materialized:
+            self.tree.delete(*self.materialized)
+        self.rows.clear()
+        self.materialized.clear()
+    
+    def put_row(self, iid: str, text: str, values: Tuple):
+        """添加或更新一行，只有内容变化时才更新树视图"""
+        row = (text, tuple(values))
+        if self.rows.get(iid) == row:
+            return
+        self.rows[iid] = row
+        if iid in self.materialized:
+            self.tree.item(iid, text=text, values=values)
+    
+    def remove_row(self, iid: str):
+        """删除一行"""
+        self.rows.pop(iid, None)
+        if iid in self.materialized:
+            self.materialized.discard(iid)
+            self.tree.delete(iid)
+    
+    def append(self, iid: str):
+        """在列表末尾显示一行（扫描过程中逐条显示）"""
+        if iid in self.materialized:
+            self.tree.move(iid, '', 'end')
+        else:
+            self._materialize(iid)
+    
+    def show(self, iids):
+        """按给定顺序显示这些行，其余行隐藏"""
+        self.render_generation += 1
+        iids = [iid for iid in iids if iid in self.rows]
+        
+        if all(iid in self.materialized for iid in iids):
+            # 所有行都已创建，一次调用完成重排和隐藏
+            self.tree.set_children('', *iids)
+            return
+        
+        # 先显示第一屏，剩余的行在空闲时分批创建
+        first_page = iids[:TREE_PAGE_SIZE]
+        for iid in first_page:
+            if iid not in self.materialized:
+                self._materialize(iid)
+        self.tree.set_children('', *first_page)
+        if len(iids) > TREE_PAGE_SIZE:
+            self.root.after_idle(self._show_more, self.render_generation, iids, TREE_PAGE_SIZE)
+    
+    def _show_more(self, generation: int, iids, start: int):
+        if generation != self.render_generation:
+            # 列表已被新的过滤结果取代
+            return
+        for iid in iids[start:start + TREE_PAGE_SIZE]:
+            self.append(iid)
+        if start + TREE_PAGE_SIZE < len(iids):
+            self.root.after_idle(self._show_more, generation, iids, start + TREE_PAGE_SIZE)
+    
+    def _materialize(self, iid: str):
+        text, values = self.rows[iid]
+        with instrumentation.timed('tk.tree_insert'):
+            self.tree.insert('', 'end', iid=iid, text=text, values=values)
+        self.materialized.add(iid)
+
+
+class ModListModel(LazyTreeRows):
+    """模组列表的行模型
+    
+    每个模组的显示文本和格式化后的大小只计算一次，树视图项目以文件路径为ID。
+    """
+    
+    @staticmethod
+    def format_row(path: str, info: Dict) -> Tuple[str, Tuple[str, str]]:
+        """计算一行的显示内容"""
+        size = info.get('size')
+        if size is None:
+            size = Path(path).stat().st_size
+        size_str = format_file_size(size)
+        
+        if info.get('is_backup', False):
+            # 备份文件
+            return mod_display_name(path, info), (size_str, "备份文件 (双击还原/右键删除)")
+        
+        # 普通模组文件
+        languages_str = ", ".join(info.get('languages', []))
+        if not languages_str:
+            languages_str = "无语言文件"
+        
+        # 如果没有中文支持，高亮显示
+        if 'zh-CN' not in info.get('languages', []):
+            languages_str += " (需要汉化)"
+        return mod_display_name(path, info), (size_str, languages_str)
+    
+    def set_row(self, path: str, info: Dict):
+        """添加或更新一个模组的行"""
+        self.put_row(path, *self.format_row(path, info))
+
+
+class ChunkedTextLoader:
+    """分批向 Text 控件插入大段文本
+    
+    第一批立即插入，其余的用 after() 在后台逐批追加，界面不会因为排版整个文件而卡住。
+    读取内容前调用 get_text()，会先把剩余部分一次性插入。
+    """
+    
+    def __init__(self, root: tk.Tk, widget: tk.Text, readonly: bool = False):
+        self.root = root
+        self.widget = widget
+        self.readonly = readonly
+        self.chunks: List[str] = []
+        self.after_id = None
+    
+    @staticmethod
+    def split_chunks(text: str) -> List[str]:
+        """按大约 TEXT_CHUNK_SIZE 个字符拆分，每批在换行处结束"""
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = text.find('\n', start + TEXT_CHUNK_SIZE)
+            end = len(text) if end < 0 else end + 1
+            chunks.append(text[start:end])
+            start = end
+        return chunks
+    
+    @property
+    def loading(self) -> bool:
+        return bool(self.chunks)
+    
+    def load(self, text: str):
+        """替换控件内容"""
+        self.cancel()
+        self.chunks = self.split_chunks(text)
+        self.chunks.reverse()
+        if self.readonly:
+            self.widget.config(state=tk.NORMAL)
+        self.widget.delete(1.0, tk.END)
+        if self.chunks:
+            self.widget.insert(tk.END, self.chunks.pop())
+        if self.readonly:
+            self.widget.config(state=tk.DISABLED)
+        self._schedule()
+    
+    def cancel(self):
+        """停止加载剩余部分"""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        self.chunks = []
+    
+    def finish(self):
+        """立即插入剩余的全部内容"""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        if self.chunks:
+            self._insert(''.join(reversed(self.chunks)))
+            self.chunks = []
+    
+    def get_text(self) -> str:
+        """获取完整内容"""
+        self.finish()
+        return self.widget.get(1.0, tk.END)
+    
+    def _schedule(self):
+        if self.chunks:
+            self.after_id = self.root.after(TEXT_CHUNK_INTERVAL, self._load_more)
+    
+    def _load_more(self):
+        self.after_id = None
+        if self.chunks:
+            self._insert(self.chunks.pop())
+        self._schedule()
+    
+    def _insert(self, text: str):
+        if self.readonly:
+            self.widget.config(state=tk.NORMAL)
+        # 追加到末尾，不影响用户在已加载部分中的编辑和光标位置
+        with instrumentation.timed('tk.text_insert'):
+            self.widget.insert(tk.END, text)
+        if self.readonly:
+            self.widget.config(state=tk.DISABLED)
+
+
+class KeyGridEditor:
+    """按键逐行对照编辑语言文件
+    
+    每个键一行（键、原文、译文、状态），编辑只修改内存中的 LocaleFile，
+    需要内容时才序列化。行由 LazyTreeRows 按需创建，几千个键也能立即显示。
+    """
+    
+    STATUS_MISSING = "缺失"
+    STATUS_UNTRANSLATED = "未翻译"
+    STATUS_TRANSLATED = "已翻译"
+    STATUS_OBSOLETE = "多余"
+    
+    def __init__(self, root: tk.Tk, parent):
+        self.source: Optional[LocaleFile] = None
+        self.target: Optional[LocaleFile] = None
+        self.keys: List[LocaleKey] = []
+        self.modified = False
+        
+        self.frame = ttk.Frame(parent)
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(1, weight=1)
+        
+        toolbar = ttk.Frame(self.frame)
+        toolbar.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        self.untranslated_only_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="只显示未翻译", variable=self.untranslated_only_var,
+                        command=self.refresh).pack(side=tk.LEFT)
+        self.summary_var = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.summary_var).pack(side=tk.RIGHT)
+        
+        self.tree = ttk.Treeview(self.frame, columns=('source', 'target', 'status'), show='tree headings')
+        self.tree.heading('#0', text='键', anchor=tk.W)
+        self.tree.heading('source', text='原文', anchor=tk.W)
+        self.tree.heading('target', text='译文', anchor=tk.W)
+        self.tree.heading('status', text='状态', anchor=tk.W)
+        self.tree.column('#0', width=220)
+        self.tree.column('source', width=300)
+        self.tree.column('target', width=300)
+        self.tree.column('status', width=70)
+        scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        
+        edit_row = ttk.Frame(self.frame)
+        edit_row.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+        edit_row.columnconfigure(1, weight=1)
+        ttk.Label(edit_row, text="译文:").grid(row=0, column=0, padx=(0, 5))
+        self.value_var = tk.StringVar()
+        self.value_entry = ttk.Entry(edit_row, textvariable=self.value_var)
+        self.value_entry.grid(row=0, column=1, sticky=(tk.W, tk.E))
+        self.value_entry.bind('<Return>', self.apply_edit)
+        ttk.Button(edit_row, text="应用 (回车)", command=self.apply_edit).grid(row=0, column=2, padx=(5, 0))
+        
+        self.rows = LazyTreeRows(root, self.tree)
+    
+    @classmethod
+    def row_status(cls, source_value: Optional[str], target_value: Optional[str]) -> str:
+        """与 diff_locale 的分类一致"""
+        if source_value is None:
+            return cls.STATUS_OBSOLETE
+        if target_value is None:
+            return cls.STATUS_MISSING
+        if source_value and target_value == source_value:
+            return cls.STATUS_UNTRANSLATED
+        return cls.STATUS_TRANSLATED
+    
+    def _put_row(self, index: int, source_value: Optional[str], target_value: Optional[str]):
+        section, key = self.keys[index]
+        self.rows.put_row(str(index), f"{section}.{key}" if section else key,
+                          (source_value or "", target_value or "", self.row_status(source_value, target_value)))
+    
+    def load(self, source: LocaleFile, target: LocaleFile):
+        """显示源文件和目标文件（目标文件复制一份用于编辑）"""
+        self.source = source
+        self.target = target.copy()
+        self.modified = False
+        source_values = source.to_dict()
+        target_values = self.target.to_dict()
+        # 源文件的键在前，目标文件中多余的键在后
+        self.keys = list(source_values) + [locale_key for locale_key in target_values if locale_key not in source_values]
+        
+        self.rows.clear()
+        for index, locale_key in enumerate(self.keys):
+            self._put_row(index, source_values.get(locale_key), target_values.get(locale_key))
+        self.value_var.set("")
+        self.refresh()
+    
+    def refresh(self):
+        """按过滤条件显示行"""
+        pending = (self.STATUS_MISSING, self.STATUS_UNTRANSLATED)
+        counts = {}
+        visible = []
+        for iid, (_, values) in self.rows.rows.items():
+            counts[values[2]] = counts.get(values[2], 0) + 1
+            if not self.untranslated_only_var.get() or values[2] in pending:
+                visible.append(iid)
+        self.rows.show(visible)
+        untranslated = sum(counts.get(status, 0) for status in pending)
+        self.summary_var.set(f"共 {len(self.keys)} 个键，未翻译 {untranslated} 个")
+    
+    def on_select(self, event=None):
+        """选中一行时把译文（缺失时为原文）放入编辑框"""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        section, key = self.keys[int(selection[0])]
+        value = self.target.get(section, key)
+        if value is None:
+            value = self.source.get(section, key, "")
+        self.value_var.set(value)
+        self.value_entry.icursor(tk.END)
+    
+    def apply_edit(self, event=None):
+        """把编辑框的内容写入选中的键，然后选中下一行"""
+        selection = self.tree.selection()
+        if not selection or self.target is None:
+            return "break"
+        iid = selection[0]
+        index = int(iid)
+        section, key = self.keys[index]
+        # 粘贴的多行文本转义为 \n，否则会在文件中多出一行
+        value = encode_value(self.value_var.get())
+        if self.target.get(section, key) != value:
+            self.target.set(section, key, value)
+            self.modified = True
+            self._put_row(index, self.source.get(section, key), value)
+        
+        next_iid = self.tree.next(iid)
+        if next_iid:
+            self.tree.selection_set(next_iid)
+            self.tree.see(next_iid)
+        self.value_entry.focus_set()
+        return "break"
+    
+    def serialize(self) -> str:
+        """编辑后的目标文件内容"""
+        return self.target.serialize() if self.target is not None else ""
+
+
 class FactorioModLocalizer:
     def __init__(self):
-        self.mods_path = Path(os.path.expanduser("~")) / "AppData" / "Roaming" / "Factorio" / "mods"
-        self.cache_dir = Path(tempfile.gettempdir()) / "factorio_mod_cache"
+        self.mods_path = default_mods_path()
+        self.cache_dir = default_cache_dir()
         self.cache_dir.mkdir(exist_ok=True)
+        self.scan_index = ScanIndex(self.cache_dir / "scan_index.json")
+        self.translation_memory = TranslationMemory(self.cache_dir / "translation_memory.sqlite3")
+        self.text_index = LocaleTextIndex(self.cache_dir / "locale_text_index.sqlite3")
         
         # 支持的语言列表
-        self.supported_languages = {
-            'zh-CN': '简体中文',
-            'zh-TW': '繁体中文', 
-            'en': '英语',
-            'ja': '日语',
-            'ko': '韩语',
-            'ru': '俄语',
-            'es-ES': '西班牙语',
-            'pt-BR': '葡萄牙语',
-            'fr': '法语',
-            'de': '德语',
-            'it': '意大利语',
-            'pl': '波兰语',
-            'cs': '捷克语',
-            'hu': '匈牙利语',
-            'nl': '荷兰语',
-            'sv-SE': '瑞典语',
-            'da': '丹麦语',
-            'fi': '芬兰语',
-            'no': '挪威语',
-            'uk': '乌克兰语',
-            'tr': '土耳其语',
-            'vi': '越南语'
-        }
+        self.supported_languages = SUPPORTED_LANGUAGES
+        
+        # 备份保留策略（可在配置文件中修改）
+        self.backup_keep_count = BACKUP_KEEP_COUNT
+        self.backup_max_size = BACKUP_MAX_SIZE
+        self.backup_mode = BACKUP_MODE_DELTA
+        
+        # 日志级别（可在配置文件中修改），日志写入缓存目录
+        self.log_level = DEFAULT_LOG_LEVEL
         
         self.setup_gui()
+        self.start_logging()
     
     def setup_gui(self):
         """设置图形用户界面"""
@@ -78,6 +450,8 @@ class FactorioModLocalizer:
         ttk.Entry(path_frame, textvariable=self.path_var, width=50).grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 5))
         ttk.Button(path_frame, text="浏览", command=self.browse_mods_directory).grid(row=0, column=1)
         ttk.Button(path_frame, text="扫描模组", command=self.scan_mods).grid(row=0, column=2, padx=(5, 0))
+        self.cancel_scan_button = ttk.Button(path_frame, text="取消扫描", command=self.cancel_scan, state=tk.DISABLED)
+        self.cancel_scan_button.grid(row=0, column=3, padx=(5, 0))
         
         # 搜索框
         search_frame = ttk.Frame(main_frame)
@@ -119,6 +493,8 @@ class FactorioModLocalizer:
         self.mod_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
+        self.mod_list = ModListModel(self.root, self.mod_tree)
+        
         # 绑定选择和双击事件
         self.mod_tree.bind('<<TreeviewSelect>>', self.on_mod_select)
         self.mod_tree.bind('<Double-1>', self.on_mod_double_click)
@@ -131,9 +507,15 @@ class FactorioModLocalizer:
         button_frame.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
         
         ttk.Button(button_frame, text="查看语言详情", command=self.show_language_details).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="搜索语言文本", command=self.show_text_search).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="批量导出缺失汉化", command=self.batch_export_missing).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="批量导入译文", command=self.batch_import_bundle).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="性能诊断", command=self.show_diagnostics).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="打开缓存目录", command=self.open_cache_directory).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="清理缓存", command=self.clear_cache).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="返回模组列表", command=self.show_mod_list).pack(side=tk.LEFT, padx=5)
+        self.pending_button = ttk.Button(button_frame, text="待提交更改 (0)", command=self.show_pending_changes)
+        self.pending_button.pack(side=tk.LEFT, padx=5)
         
         # 创建语言编辑框架（初始隐藏）
         self.editor_frame = ttk.Frame(main_frame)
@@ -144,13 +526,42 @@ class FactorioModLocalizer:
         self.current_mod_path = None
         self.current_mod_info = None
         
-        # 状态栏
+        # 状态栏（右侧显示文本索引状态）
+        status_frame = ttk.Frame(main_frame)
+        status_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_frame.columnconfigure(0, weight=1)
         self.status_var = tk.StringVar(value="准备就绪")
-        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.text_index_var = tk.StringVar(value="文本索引: 未建立")
+        text_index_bar = ttk.Label(status_frame, textvariable=self.text_index_var, relief=tk.SUNKEN, anchor=tk.W)
+        text_index_bar.grid(row=0, column=1, padx=(5, 0))
         
         self.mods_data = {}
         self.all_mods_data = {}  # 存储所有模组数据用于搜索
+        self.search_index = ModSearchIndex()
+        self.search_after_id = None
+        
+        # 暂存的更改: 模组路径 -> {(语言, 文件名): 内容}，提交时每个模组只重写一次
+        self.pending_changes: Dict[str, Dict[Tuple[str, str], str]] = {}
+        
+        # 后台扫描状态
+        self.scan_cancel_event = None
+        self.scan_futures = []
+        self.scan_order = {}
+        self.scan_total = 0
+        self.scan_done = 0
+        
+        # 模组目录监视（扫描时启动），有变化的文件在后台重新分析后通过队列回传
+        self.watcher: Optional[ModDirectoryWatcher] = None
+        
+        # 后台建立文本索引的状态（扫描只读取模组信息，扫描结束后再索引语言文本）
+        self.text_index_cancel_event: Optional[threading.Event] = None
+        self.text_index_thread: Optional[threading.Thread] = None
+        self.text_index_progress: Optional[Tuple[int, int]] = None
+        
+        # 后台批量导出/导入任务（同时只运行一个）
+        self.batch_thread: Optional[threading.Thread] = None
         
         # 配置文件路径
         self.config_file = Path("factorio_localizer_config.json")
@@ -205,6 +616,14 @@ class FactorioModLocalizer:
         ttk.Radiobutton(lang_select_frame, text="新建汉化文件", variable=self.operation_var, value="new").grid(row=1, column=1, sticky=tk.W, pady=(10, 0))
         ttk.Radiobutton(lang_select_frame, text="替换现有文件", variable=self.operation_var, value="replace").grid(row=1, column=2, sticky=tk.W, pady=(10, 0))
         
+        # 新建模式下用翻译记忆预填译文
+        memory_frame = ttk.Frame(lang_select_frame)
+        memory_frame.grid(row=1, column=3, sticky=tk.W, pady=(10, 0))
+        self.use_memory_var = tk.BooleanVar(value=True)
+        self.fuzzy_memory_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(memory_frame, text="翻译记忆预填", variable=self.use_memory_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(memory_frame, text="近似匹配", variable=self.fuzzy_memory_var).pack(side=tk.LEFT, padx=(5, 0))
+        
         # 文件选择区域
         file_frame = ttk.LabelFrame(self.editor_frame, text="语言文件内容", padding="10")
         file_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
@@ -222,8 +641,12 @@ class FactorioModLocalizer:
         file_ops_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
         
         ttk.Button(file_ops_frame, text="导出源文件", command=self.export_source_file).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(file_ops_frame, text="导出未翻译", command=self.export_untranslated_file).pack(side=tk.LEFT, padx=5)
         ttk.Button(file_ops_frame, text="导出目标文件", command=self.export_target_file).pack(side=tk.LEFT, padx=5)
         ttk.Button(file_ops_frame, text="从本地导入", command=self.import_local_file).pack(side=tk.LEFT, padx=5)
+        self.grid_mode_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(file_ops_frame, text="按键对照编辑", variable=self.grid_mode_var,
+                        command=self.toggle_grid_mode).pack(side=tk.LEFT, padx=(15, 5))
         
         # 编辑区域 - 增加高度和权重
         edit_frame = ttk.LabelFrame(self.editor_frame, text="编辑内容", padding="10")
@@ -251,6 +674,16 @@ class FactorioModLocalizer:
         self.target_text = ScrolledText(bottom_frame, height=18, wrap=tk.WORD)
         self.target_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        # 大文件分批加载
+        self.source_loader = ChunkedTextLoader(self.root, self.source_text, readonly=True)
+        self.target_loader = ChunkedTextLoader(self.root, self.target_text)
+        
+        # 按键对照编辑（与上下分栏二选一显示）
+        self.editor_source_content = ""
+        self.key_grid = KeyGridEditor(self.root, edit_frame)
+        self.key_grid.frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.key_grid.frame.grid_remove()
+        
         # 添加到分栏窗口，设置权重
         self.paned_window.add(top_frame, weight=1)
         self.paned_window.add(bottom_frame, weight=1)
@@ -271,6 +704,7 @@ class FactorioModLocalizer:
         save_frame.grid(row=4, column=0, columnspan=2, pady=10)
         
         ttk.Button(save_frame, text="保存到ZIP", command=self.save_to_zip).pack(side=tk.LEFT, padx=5)
+        ttk.Button(save_frame, text="暂存更改", command=self.stage_current_file).pack(side=tk.LEFT, padx=5)
         ttk.Button(save_frame, text="预览更改", command=self.preview_changes).pack(side=tk.LEFT, padx=5)
         
         # 配置编辑器框架的权重 - 给编辑区域更大的权重
@@ -306,147 +740,289 @@ class FactorioModLocalizer:
             self.mods_path = Path(directory)
     
     def scan_mods(self):
-        """扫描模组目录"""
+        """扫描模组目录（在后台线程池中分析，结果通过队列回传）"""
         self.mods_path = Path(self.path_var.get())
         
         if not self.mods_path.exists():
             messagebox.showerror("错误", f"目录不存在: {self.mods_path}")
             return
         
-        self.status_var.set("正在扫描模组...")
-        self.root.update()
+        # 如果上一次扫描还在进行，先取消
+        self.cancel_scan(silent=True)
+        self.cancel_text_indexing()
+        
+        # 先记录目录快照，扫描期间的变化会在扫描结束后补上
+        self.start_watcher()
         
         # 清空现有数据
-        for item in self.mod_tree.get_children():
-            self.mod_tree.delete(item)
+        self.mod_list.clear()
         self.mods_data.clear()
         self.all_mods_data.clear()
+        self.search_index.clear()
         
         # 扫描模组文件和备份文件
-        zip_files = list(self.mods_path.glob("*.zip"))
-        backup_files = list(self.mods_path.glob("*.zip.backup"))
-        all_files = zip_files + backup_files
+        all_files = find_mod_files(self.mods_path)
         
         if not all_files:
             self.status_var.set("未找到任何zip模组文件或备份文件")
             return
         
-        for i, file_path in enumerate(all_files):
-            self.status_var.set(f"扫描进度: {i+1}/{len(all_files)}")
-            self.root.update()
-            
+        self.scan_order = {str(file_path): i for i, file_path in enumerate(all_files)}
+        self.scan_total = len(all_files)
+        self.scan_done = 0
+        
+        # 每次扫描使用独立的队列和取消标志，旧扫描的结果会被自然丢弃
+        result_queue = queue.Queue()
+        cancel_event = threading.Event()
+        self.scan_cancel_event = cancel_event
+        
+        executor = ThreadPoolExecutor(max_workers=SCAN_WORKERS)
+        self.scan_futures = []
+        for file_path in all_files:
+            future = executor.submit(scan_mod_file, file_path, self.scan_index, cancel_event)
+            future.add_done_callback(lambda f, p=file_path: result_queue.put((p, f)))
+            self.scan_futures.append(future)
+        # 不等待，已提交的任务会继续在后台执行
+        executor.shutdown(wait=False)
+        
+        self.cancel_scan_button.config(state=tk.NORMAL)
+        self.status_var.set(f"扫描进度: 0/{self.scan_total}")
+        self.root.after(SCAN_POLL_INTERVAL, self.poll_scan_queue, result_queue, cancel_event)
+    
+    def poll_scan_queue(self, result_queue: queue.Queue, cancel_event: threading.Event):
+        """在主线程中取出扫描结果并更新模组列表"""
+        if cancel_event is not self.scan_cancel_event:
+            # 已被新的扫描取代
+            return
+        
+        search_text = self.search_var.get().strip()
+        processed = 0
+        while processed < SCAN_BATCH_SIZE:
             try:
-                is_backup = str(file_path).endswith('.backup')
-                
-                if is_backup:
-                    # 备份文件的处理
-                    size_str = self.format_file_size(file_path.stat().st_size)
-                    file_stem = file_path.name.replace('.zip.backup', '')
-                    
-                    # 备份文件不分析语言，直接添加
-                    item_id = self.mod_tree.insert('', 'end', 
-                                                 text=f"[备份] {file_stem}",
-                                                 values=(size_str, "备份文件"))
-                    
-                    # 存储备份文件信息
-                    self.mods_data[str(file_path)] = {
-                        'name': file_stem,
-                        'is_backup': True,
-                        'languages': [],
-                        'has_locale': False
-                    }
-                    
-                    # 设置备份文件的标签样式（如果可能的话）
-                    self.mod_tree.set(item_id, 'languages', "备份文件 (双击还原/右键删除)")
-                else:
-                    # 普通模组文件的处理
-                    mod_info = self.analyze_mod(file_path)
-                    if mod_info:
-                        self.mods_data[str(file_path)] = mod_info
-                        
-                        # 添加到树视图
-                        size_str = self.format_file_size(file_path.stat().st_size)
-                        languages_str = ", ".join(mod_info.get('languages', []))
-                        if not languages_str:
-                            languages_str = "无语言文件"
-                        
-                        item_id = self.mod_tree.insert('', 'end', 
-                                                     text=file_path.stem,
-                                                     values=(size_str, languages_str))
-                        
-                        # 如果没有中文支持，高亮显示
-                        if 'zh-CN' not in mod_info.get('languages', []):
-                            self.mod_tree.set(item_id, 'languages', languages_str + " (需要汉化)")
+                file_path, future = result_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            processed += 1
+            self.scan_done += 1
+            if future.cancelled():
+                continue
             
+            try:
+                info = future.result()
             except Exception as e:
-                print(f"分析文件失败 {file_path.name}: {e}")
+                logger.warning("分析文件失败 %s: %s", file_path.name, e)
+                continue
+            
+            if info:
+                self.all_mods_data[str(file_path)] = info
+                self.search_index.add(str(file_path), info)
+                self.mod_list.set_row(str(file_path), info)
+                # 有搜索条件时先不显示，扫描结束后统一过滤
+                if not search_text:
+                    self.mods_data[str(file_path)] = info
+                    self.mod_list.append(str(file_path))
+        
+        if cancel_event.is_set():
+            self.finish_scan(cancelled=True)
+        elif self.scan_done >= self.scan_total:
+            self.finish_scan()
+        else:
+            self.status_var.set(f"扫描进度: {self.scan_done}/{self.scan_total}")
+            self.root.after(SCAN_POLL_INTERVAL, self.poll_scan_queue, result_queue, cancel_event)
+    
+    def finish_scan(self, cancelled: bool = False):
+        """扫描结束（完成或取消）后的收尾工作"""
+        self.scan_cancel_event = None
+        self.scan_futures = []
+        self.cancel_scan_button.config(state=tk.DISABLED)
+        
+        # 结果按完成顺序到达，这里恢复为文件顺序，并重新应用搜索条件
+        self.all_mods_data = dict(sorted(self.all_mods_data.items(),
+                                         key=lambda item: self.scan_order.get(item[0], 0)))
+        self.search_index.reorder(self.all_mods_data)
+        self.apply_search()
+        
+        # 完整扫描后才清理已删除文件的索引记录
+        if not cancelled:
+            self.scan_index.prune(self.mods_path, self.scan_order.keys())
+            self.text_index.prune(self.mods_path, self.scan_order.keys())
+        self.scan_index.save()
+        self.start_text_indexing()
+        
+        regular_mods = len([p for p in self.all_mods_data.values() if not p.get('is_backup', False)])
+        backup_count = len([p for p in self.all_mods_data.values() if p.get('is_backup', False)])
+        if cancelled:
+            self.status_var.set(f"扫描已取消，已加载 {regular_mods} 个模组，{backup_count} 个备份文件")
+        else:
+            self.status_var.set(f"扫描完成，找到 {regular_mods} 个模组，{backup_count} 个备份文件")
+    
+    def cancel_scan(self, silent: bool = False):
+        """取消正在进行的扫描"""
+        cancel_event = self.scan_cancel_event
+        if cancel_event is None:
+            return
         
-        # 保存完整的模组数据用于搜索
-        self.all_mods_data = self.mods_data.copy()
+        cancel_event.set()
+        for future in self.scan_futures:
+            future.cancel()
         
-        regular_mods = len([p for p in self.mods_data.values() if not p.get('is_backup', False)])
-        backup_count = len([p for p in self.mods_data.values() if p.get('is_backup', False)])
-        self.status_var.set(f"扫描完成，找到 {regular_mods} 个模组，{backup_count} 个备份文件")
+        if silent:
+            # 直接废弃本次扫描，轮询回调会自行退出
+            self.scan_cancel_event = None
+            self.scan_futures = []
+            self.cancel_scan_button.config(state=tk.DISABLED)
+        else:
+            self.status_var.set("正在取消扫描...")
     
-    def analyze_mod(self, zip_path: Path) -> Optional[Dict]:
-        """分析模组信息"""
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                # 查找info.json
-                info_json = None
-                for file_info in zf.filelist:
-                    if file_info.filename.endswith('/info.json') or file_info.filename == 'info.json':
-                        info_json = file_info.filename
-                        break
-                
-                mod_info = {'languages': [], 'has_locale': False, 'name': zip_path.stem}
-                
-                if info_json:
-                    try:
-                        info_content = zf.read(info_json).decode('utf-8', errors='ignore')
-                        info_data = json.loads(info_content)
-                        mod_info['name'] = info_data.get('name', zip_path.stem)
-                        mod_info['version'] = info_data.get('version', 'unknown')
-                        mod_info['title'] = info_data.get('title', mod_info['name'])
-                    except Exception as e:
-                        print(f"解析info.json失败: {e}")
-                        mod_info['name'] = zip_path.stem
-                        mod_info['version'] = 'unknown'
-                        mod_info['title'] = zip_path.stem
-                
-                # 查找locale目录
-                languages = set()
-                for file_info in zf.filelist:
-                    filename = file_info.filename
-                    if '/locale/' in filename and not file_info.is_dir():
-                        # 例如: mod_name_1.0.0/locale/en/strings.cfg
-                        parts = filename.split('/locale/')
-                        if len(parts) > 1:
-                            lang_parts = parts[1].split('/')
-                            if len(lang_parts) > 0 and lang_parts[0]:
-                                languages.add(lang_parts[0])
-                
-                if languages:
-                    mod_info['has_locale'] = True
-                    mod_info['languages'] = sorted(list(languages))
-                    print(f"找到语言: {mod_info['languages']}")  # 调试信息
-                else:
-                    print(f"未找到语言文件: {zip_path.name}")  # 调试信息
-                
-                return mod_info
+    def start_text_indexing(self):
+        """在后台为已扫描的模组建立语言文本索引（只重新索引有变化的模组），进度显示在状态栏右侧"""
+        self.cancel_text_indexing()
+        mods_data = dict(self.all_mods_data)
+        text_index = self.text_index
+        progress_queue = queue.Queue()
+        cancel_event = threading.Event()
+        
+        def worker():
+            try:
+                index_locale_texts(mods_data, text_index, cancel_event=cancel_event,
+                                   progress=lambda done, total: progress_queue.put(('progress', (done, total))))
+            except Exception as e:
+                progress_queue.put(('error', e))
+            else:
+                progress_queue.put(('done', None))
+        
+        self.text_index_cancel_event = cancel_event
+        self.text_index_progress = (0, 0)
+        self.text_index_thread = threading.Thread(target=worker, name='LocaleTextIndexer', daemon=True)
+        self.text_index_thread.start()
+        self.text_index_var.set("文本索引: 准备中...")
+        self.root.after(SCAN_POLL_INTERVAL, self.poll_text_index_queue, progress_queue, cancel_event)
+    
+    def poll_text_index_queue(self, progress_queue: queue.Queue, cancel_event: threading.Event):
+        """在主线程中显示建立文本索引的进度"""
+        if cancel_event is not self.text_index_cancel_event:
+            # 已被取消或被新的索引任务取代
+            return
+        while True:
+            try:
+                kind, payload = progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == 'progress':
+                self.text_index_progress = payload
+                continue
+            
+            self.text_index_cancel_event = None
+            self.text_index_thread = None
+            self.text_index_progress = None
+            if kind == 'error':
+                logger.warning("建立文本索引失败: %s", payload)
+                self.text_index_var.set("文本索引: 建立失败")
+            else:
+                self.text_index_var.set(f"文本索引: {self.text_index.summary()['strings']} 条")
+            return
         
-        except Exception as e:
-            print(f"无法分析模组 {zip_path}: {e}")
-            return None
-    
-    def format_file_size(self, size_bytes: int) -> str:
-        """格式化文件大小"""
-        if size_bytes < 1024:
-            return f"{size_bytes} B"
-        elif size_bytes < 1024 * 1024:
-            return f"{size_bytes / 1024:.1f} KB"
+        done, total = self.text_index_progress
+        self.text_index_var.set(f"文本索引: {done}/{total}")
+        self.root.after(SCAN_POLL_INTERVAL, self.poll_text_index_queue, progress_queue, cancel_event)
+    
+    def cancel_text_indexing(self, wait: bool = False):
+        """取消正在建立的文本索引；wait 为真时等待正在索引的模组结束"""
+        cancel_event = self.text_index_cancel_event
+        if cancel_event is None:
+            return
+        cancel_event.set()
+        if wait and self.text_index_thread is not None:
+            self.text_index_thread.join(TEXT_INDEX_STOP_TIMEOUT)
+        self.text_index_cancel_event = None
+        self.text_index_thread = None
+        self.text_index_progress = None
+        self.text_index_var.set("文本索引: 未完成")
+    
+    def start_watcher(self):
+        """开始监视模组目录（替换之前的监视）"""
+        self.stop_watcher()
+        change_queue = queue.Queue()
+        watcher = ModDirectoryWatcher(self.mods_path, lambda changes: self.scan_changed_files(changes, change_queue))
+        try:
+            watcher.start()
+        except OSError as e:
+            watcher.stop()
+            logger.warning("无法监视模组目录 %s: %s", self.mods_path, e)
+            return
+        self.watcher = watcher
+        self.root.after(WATCH_QUEUE_POLL_INTERVAL, self.poll_watch_queue, watcher, change_queue)
+    
+    def stop_watcher(self, wait: bool = False):
+        """停止监视模组目录；wait 为真时等待正在进行的分析结束"""
+        if self.watcher is not None:
+            self.watcher.stop(WATCH_STOP_TIMEOUT if wait else None)
+            self.watcher = None
+    
+    def scan_changed_files(self, changes: FileChanges, change_queue: queue.Queue):
+        """重新分析有变化的文件（在监视线程中调用），结果为 {路径: 模组信息}，已删除或无法分析的为None"""
+        results = {}
+        for path in changes['removed']:
+            self.scan_index.remove(Path(path))
+            self.text_index.remove(Path(path))
+            results[path] = None
+        for path in changes['added'] + changes['modified']:
+            try:
+                # 文件可能仍在写入（例如游戏正在下载模组），写完后会再次报告
+                results[path] = scan_mod_file(Path(path), self.scan_index)
+            except Exception as e:
+                logger.warning("分析文件失败 %s: %s", Path(path).name, e)
+                results[path] = None
+        self.scan_index.save()
+        change_queue.put(results)
+    
+    def poll_watch_queue(self, watcher: ModDirectoryWatcher, change_queue: queue.Queue):
+        """在主线程中把有变化的文件更新到模组列表"""
+        if watcher is not self.watcher:
+            # 已停止或被新的监视取代
+            return
+        # 扫描进行中时先不更新，扫描结束后再处理
+        if self.scan_cancel_event is None:
+            while True:
+                try:
+                    results = change_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.apply_file_changes(results)
+        self.root.after(WATCH_QUEUE_POLL_INTERVAL, self.poll_watch_queue, watcher, change_queue)
+    
+    def apply_file_changes(self, results: Dict[str, Optional[Dict]]):
+        """只更新有变化的文件对应的行"""
+        added = removed = updated = 0
+        for path, info in results.items():
+            if info is None:
+                if path in self.all_mods_data:
+                    del self.all_mods_data[path]
+                    self.mods_data.pop(path, None)
+                    self.search_index.remove(path)
+                    self.mod_list.remove_row(path)
+                    removed += 1
+                continue
+            if path in self.all_mods_data:
+                updated += 1
+            else:
+                added += 1
+            self.update_mod_entry(Path(path), info)
+        if not (added or removed or updated):
+            return
+        self.reorder_mod_rows()
+        self.status_var.set(f"模组目录有变化：新增 {added} 个，删除 {removed} 个，更新 {updated} 个")
+        if added or updated:
+            self.start_text_indexing()
+    
+    def refresh_changed_files(self):
+        """修改模组目录后立即更新列表（只重新分析有变化的文件）"""
+        if self.watcher is not None:
+            self.watcher.check_now()
         else:
-            return f"{size_bytes / (1024 * 1024):.1f} MB"
+            self.scan_mods()
     
     def on_mod_select(self, event):
         """模组选择事件"""
@@ -462,28 +1038,12 @@ class FactorioModLocalizer:
         if not selection:
             return
         
+        # 树视图项目ID就是文件路径
         item = selection[0]
-        mod_name = self.mod_tree.item(item, 'text')
-        
-        # 查找对应的文件
-        target_path = None
-        target_info = None
-        for path, info in self.mods_data.items():
-            # 对于备份文件，匹配显示的名称
-            if info.get('is_backup'):
-                display_name = f"[备份] {info['name']}"
-                if display_name == mod_name:
-                    target_path = Path(path)
-                    target_info = info
-                    break
-            else:
-                # 普通模组文件
-                if Path(path).stem == mod_name:
-                    target_path = Path(path)
-                    target_info = info
-                    break
+        target_path = Path(item)
+        target_info = self.mods_data.get(item)
         
-        if not target_path or not target_info:
+        if not target_info:
             messagebox.showerror("错误", "找不到对应的文件")
             return
         
@@ -501,6 +1061,11 @@ class FactorioModLocalizer:
         original_name = backup_info['name']
         original_path = backup_path.parent / f"{original_name}.zip"
         
+        # 增量备份需要在当前文件的基础上还原
+        delta_note = ""
+        if backup_info.get('is_delta'):
+            delta_note = "\n\n这是增量备份，将在当前模组文件的基础上还原；比它新的增量备份会被删除。"
+        
         # 检查是否存在同名的原文件
         if original_path.exists():
             choice = messagebox.askyesnocancel(
@@ -510,23 +1075,19 @@ class FactorioModLocalizer:
                 f"选择'是'：替换原文件（原文件将被删除）\n"
                 f"选择'否'：取消操作\n"
                 f"选择'取消'：取消操作"
+                f"{delta_note}"
             )
             
             if choice is True:  # 用户选择"是"
                 try:
-                    # 删除原文件
-                    original_path.unlink()
-                    # 重命名备份文件
-                    backup_path.rename(original_path)
+                    # 用备份替换原文件
+                    restore_backup(backup_path)
                     
                     self.status_var.set(f"已从备份还原: {original_name}")
                     messagebox.showinfo("成功", f"已从备份还原模组：{original_name}")
                     
-                    # 重新扫描模组列表并保持搜索状态
-                    search_text = self.search_var.get().strip()
-                    self.scan_mods()
-                    if search_text:
-                        self.search_var.set(search_text)  # 这会触发搜索
+                    # 只更新有变化的文件，搜索状态保持不变
+                    self.refresh_changed_files()
                     
                 except Exception as e:
                     messagebox.showerror("错误", f"还原失败: {e}")
@@ -540,16 +1101,13 @@ class FactorioModLocalizer:
             
             if choice:
                 try:
-                    backup_path.rename(original_path)
+                    restore_backup(backup_path)
                     
                     self.status_var.set(f"已还原备份: {original_name}")
                     messagebox.showinfo("成功", f"已还原备份文件：{original_name}")
                     
-                    # 重新扫描模组列表并保持搜索状态
-                    search_text = self.search_var.get().strip()
-                    self.scan_mods()
-                    if search_text:
-                        self.search_var.set(search_text)  # 这会触发搜索
+                    # 只更新有变化的文件，搜索状态保持不变
+                    self.refresh_changed_files()
                     
                 except Exception as e:
                     messagebox.showerror("错误", f"还原失败: {e}")
@@ -562,25 +1120,12 @@ class FactorioModLocalizer:
             return
         
         self.mod_tree.selection_set(item)
-        mod_name = self.mod_tree.item(item, 'text')
-        
-        # 查找对应的文件信息
-        target_info = None
-        for path, info in self.mods_data.items():
-            if info.get('is_backup'):
-                display_name = f"[备份] {info['name']}"
-                if display_name == mod_name:
-                    target_info = info
-                    self.context_menu_path = Path(path)
-                    break
-            else:
-                if Path(path).stem == mod_name:
-                    target_info = info
-                    self.context_menu_path = Path(path)
-                    break
         
+        # 树视图项目ID就是文件路径
+        target_info = self.mods_data.get(item)
         if not target_info:
             return
+        self.context_menu_path = Path(item)
         
         # 创建右键菜单
         context_menu = tk.Menu(self.root, tearoff=0)
@@ -607,7 +1152,7 @@ class FactorioModLocalizer:
         if not hasattr(self, 'context_menu_path'):
             return
         
-        backup_name = self.context_menu_path.name.replace('.zip.backup', '')
+        backup_name = self.context_menu_path.name
         choice = messagebox.askyesno(
             "删除备份", 
             f"确定要删除备份文件：{backup_name} 吗？\n\n此操作无法撤销！"
@@ -619,11 +1164,8 @@ class FactorioModLocalizer:
                 self.status_var.set(f"已删除备份: {backup_name}")
                 messagebox.showinfo("成功", f"已删除备份文件：{backup_name}")
                 
-                # 重新扫描模组列表并保持搜索状态
-                search_text = self.search_var.get().strip()
-                self.scan_mods()
-                if search_text:
-                    self.search_var.set(search_text)  # 这会触发搜索
+                # 只更新有变化的文件，搜索状态保持不变
+                self.refresh_changed_files()
                 
             except Exception as e:
                 messagebox.showerror("错误", f"删除失败: {e}")
@@ -635,7 +1177,16 @@ class FactorioModLocalizer:
         self.show_editor()
     
     def on_search_change(self, *args):
-        """搜索框内容改变时调用"""
+        """搜索框内容改变时调用，停止输入一小段时间后才过滤"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+    
+    def apply_search(self):
+        """按当前搜索框内容过滤模组列表"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
         search_text = self.search_var.get().strip().lower()
         if search_text:
             self.filter_mods(search_text)
@@ -645,7 +1196,7 @@ class FactorioModLocalizer:
     def clear_search(self):
         """清除搜索"""
         self.search_var.set("")
-        self.show_all_mods()
+        self.apply_search()
     
     def show_all_mods(self):
         """显示所有模组"""
@@ -653,73 +1204,20 @@ class FactorioModLocalizer:
         self.refresh_mod_tree()
     
     def filter_mods(self, search_text):
-        """根据搜索文本过滤模组"""
-        filtered_data = {}
-        
-        for path, info in self.all_mods_data.items():
-            # 获取显示名称
-            if info.get('is_backup'):
-                display_name = f"[备份] {info['name']}"
-            else:
-                display_name = Path(path).stem
-            
-            # 检查名称是否匹配搜索文本
-            mod_title = info.get('title', display_name)
-            mod_name = info.get('name', display_name)
-            
-            if (search_text in display_name.lower() or 
-                search_text in mod_title.lower() or 
-                search_text in mod_name.lower()):
-                filtered_data[path] = info
-        
-        self.mods_data = filtered_data
+        """根据搜索文本过滤模组（使用搜索索引）"""
+        self.mods_data = {path: self.all_mods_data[path]
+                          for path in self.search_index.search(search_text)
+                          if path in self.all_mods_data}
         self.refresh_mod_tree()
         
         # 更新状态栏显示搜索结果
-        result_count = len(filtered_data)
+        result_count = len(self.mods_data)
         total_count = len(self.all_mods_data)
         self.status_var.set(f"搜索结果: {result_count}/{total_count} 项")
     
     def refresh_mod_tree(self):
-        """刷新模组树视图"""
-        # 清空现有项目
-        for item in self.mod_tree.get_children():
-            self.mod_tree.delete(item)
-        
-        # 重新添加过滤后的项目
-        for path, info in self.mods_data.items():
-            file_path = Path(path)
-            
-            try:
-                is_backup = info.get('is_backup', False)
-                
-                if is_backup:
-                    # 备份文件的处理
-                    size_str = self.format_file_size(file_path.stat().st_size)
-                    file_stem = info['name']
-                    
-                    item_id = self.mod_tree.insert('', 'end', 
-                                                 text=f"[备份] {file_stem}",
-                                                 values=(size_str, "备份文件"))
-                    
-                    self.mod_tree.set(item_id, 'languages', "备份文件 (双击还原/右键删除)")
-                else:
-                    # 普通模组文件的处理
-                    size_str = self.format_file_size(file_path.stat().st_size)
-                    languages_str = ", ".join(info.get('languages', []))
-                    if not languages_str:
-                        languages_str = "无语言文件"
-                    
-                    item_id = self.mod_tree.insert('', 'end', 
-                                                 text=file_path.stem,
-                                                 values=(size_str, languages_str))
-                    
-                    # 如果没有中文支持，高亮显示
-                    if 'zh-CN' not in info.get('languages', []):
-                        self.mod_tree.set(item_id, 'languages', languages_str + " (需要汉化)")
-            
-            except Exception as e:
-                print(f"刷新树视图失败 {file_path.name}: {e}")
+        """刷新模组树视图（只调整显示的行，不重新创建）"""
+        self.mod_list.show(list(self.mods_data))
     
     def show_mod_list(self):
         """显示模组列表"""
@@ -766,15 +1264,12 @@ class FactorioModLocalizer:
         
         # 更新源语言选择
         available_languages = self.current_mod_info.get('languages', [])
-        print(f"可用语言: {available_languages}")  # 调试信息
+        logger.debug("可用语言: %s", available_languages)
         
         if available_languages:
             self.source_lang_combo['values'] = available_languages
             # 优先选择英语，否则选择第一个
-            if 'en' in available_languages:
-                self.source_lang_combo.set('en')
-            else:
-                self.source_lang_combo.set(available_languages[0])
+            self.source_lang_combo.set(preferred_source_language(available_languages))
         else:
             self.source_lang_combo['values'] = []
             self.source_lang_combo.set('')
@@ -796,7 +1291,7 @@ class FactorioModLocalizer:
             return
         
         try:
-            files = self.get_locale_files(self.current_mod_path, self.source_lang_combo.get())
+            files = get_locale_files(self.current_mod_path, self.source_lang_combo.get())
             self.file_combo['values'] = files
             if files:
                 self.file_combo.set(files[0])  # 默认选择第一个文件
@@ -804,21 +1299,6 @@ class FactorioModLocalizer:
             self.status_var.set(f"获取文件列表失败: {e}")
             self.file_combo['values'] = []
     
-    def get_locale_files(self, zip_path: Path, language: str) -> List[str]:
-        """获取指定语言的locale文件列表"""
-        files = []
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                for file_info in zf.filelist:
-                    if f'/locale/{language}/' in file_info.filename and file_info.filename.endswith('.cfg'):
-                        # 提取文件名
-                        filename = file_info.filename.split('/')[-1]
-                        files.append(filename)
-        except Exception as e:
-            print(f"获取locale文件失败: {e}")
-        
-        return sorted(files)
-    
     def on_file_change(self, event=None):
         """文件改变事件"""
         # 可以在这里添加文件改变时的逻辑
@@ -848,65 +1328,121 @@ class FactorioModLocalizer:
             self.root.update()
             
             # 读取源文件内容
-            print(f"正在读取源文件: {source_lang}/{filename}")  # 调试信息
-            source_content = self.read_locale_file(self.current_mod_path, source_lang, filename)
+            logger.debug("正在读取源文件: %s/%s", source_lang, filename)
+            source_content = read_locale_file(self.current_mod_path, source_lang, filename)
             
-            # 显示源文件内容
-            self.source_text.config(state=tk.NORMAL)
-            self.source_text.delete(1.0, tk.END)
-            self.source_text.insert(1.0, source_content)
-            self.source_text.config(state=tk.DISABLED)
+            # 显示源文件内容（大文件先显示开头，其余在后台加载）
+            self.editor_source_content = source_content
+            self.source_loader.load(source_content)
             
             # 处理目标文件内容
             target_content = ""
+            memory_note = ""
+            staged_content = self.pending_changes.get(str(self.current_mod_path), {}).get((target_lang, filename))
             
-            if self.operation_var.get() == "replace":
+            if staged_content is not None:
+                # 该文件已有暂存的译文，继续编辑暂存内容
+                logger.debug("使用暂存的目标文件内容")
+                target_content = staged_content
+            elif self.operation_var.get() == "replace":
                 # 尝试读取现有的目标语言文件
                 try:
-                    print(f"尝试读取现有目标文件: {target_lang}/{filename}")  # 调试信息
-                    target_content = self.read_locale_file(self.current_mod_path, target_lang, filename)
-                    print("找到现有目标文件")  # 调试信息
+                    target_content = read_locale_file(self.current_mod_path, target_lang, filename)
+                    logger.debug("找到现有目标文件: %s/%s", target_lang, filename)
                 except FileNotFoundError:
-                    print("未找到现有目标文件，使用源文件作为模板")  # 调试信息
+                    logger.debug("未找到现有目标文件，使用源文件作为模板")
                     target_content = source_content
                 except Exception as e:
-                    print(f"读取目标文件出错: {e}")  # 调试信息
+                    logger.warning("读取目标文件出错 %s/%s: %s", target_lang, filename, e)
                     target_content = source_content
             else:
                 # 新建模式，使用源文件内容作为模板
-                print("新建模式，使用源文件作为模板")  # 调试信息
+                logger.debug("新建模式，使用源文件作为模板")
                 target_content = source_content
+                if self.use_memory_var.get():
+                    target_content, memory_note = self.prefill_from_memory(source_lang, target_lang, source_content)
             
             # 显示目标文件内容
-            self.target_text.delete(1.0, tk.END)
-            self.target_text.insert(1.0, target_content)
+            self.set_target_content(target_content)
             
-            self.status_var.set(f"已加载文件: {filename} ({source_lang} -> {target_lang})")
-            print("文件加载完成")  # 调试信息
+            self.status_var.set(f"已加载文件: {filename} ({source_lang} -> {target_lang}){memory_note}")
             
         except FileNotFoundError as e:
             error_msg = f"文件未找到: {e}"
-            print(error_msg)  # 调试信息
+            logger.error(error_msg)
             messagebox.showerror("错误", error_msg)
             self.status_var.set("文件加载失败")
         except Exception as e:
             error_msg = f"加载文件失败: {e}"
-            print(error_msg)  # 调试信息
+            logger.exception(error_msg)
             messagebox.showerror("错误", error_msg)
             self.status_var.set("文件加载失败")
     
-    def read_locale_file(self, zip_path: Path, language: str, filename: str) -> str:
-        """从ZIP文件中读取locale文件内容"""
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            for file_info in zf.filelist:
-                if f'/locale/{language}/{filename}' in file_info.filename:
-                    return zf.read(file_info.filename).decode('utf-8', errors='ignore')
+    def get_target_content(self) -> str:
+        """编辑器中的译文（按键编辑时由内存中的模型序列化）"""
+        if self.grid_mode_var.get():
+            return self.key_grid.serialize()
+        return self.target_loader.get_text()
+    
+    def set_target_content(self, content: str):
+        """在当前编辑方式下显示译文"""
+        if self.grid_mode_var.get():
+            self.key_grid.load(parse_locale(self.editor_source_content), parse_locale(content))
+        else:
+            self.target_loader.load(content)
+    
+    def toggle_grid_mode(self):
+        """在上下分栏和按键对照编辑之间切换，切换时同步译文"""
+        if self.grid_mode_var.get():
+            target_content = self.target_loader.get_text().rstrip()
+            self.key_grid.load(parse_locale(self.editor_source_content), parse_locale(target_content))
+            self.paned_window.grid_remove()
+            self.key_grid.frame.grid()
+        else:
+            self.target_loader.load(self.key_grid.serialize())
+            self.key_grid.frame.grid_remove()
+            self.paned_window.grid()
+    
+    def prefill_from_memory(self, source_lang: str, target_lang: str, source_content: str) -> Tuple[str, str]:
+        """用翻译记忆预填源文件模板，返回 (内容, 状态说明)"""
+        try:
+            prefilled, exact_count, fuzzy_count = self.translation_memory.prefill(
+                source_lang, target_lang, parse_locale(source_content), fuzzy=self.fuzzy_memory_var.get())
+        except Exception as e:
+            logger.warning("读取翻译记忆失败: %s", e)
+            return source_content, ""
+        
+        if not exact_count and not fuzzy_count:
+            return source_content, ""
+        note = f"，翻译记忆预填 {exact_count} 条"
+        if fuzzy_count:
+            note += f"，近似匹配 {fuzzy_count} 条（请检查）"
+        return prefilled.serialize(), note
+    
+    def record_translation_memory(self, zip_path: Path, changes: Dict[Tuple[str, str], str]):
+        """把即将写入的译文与对应的源文件配对，记入翻译记忆"""
+        if zip_path == self.current_mod_path and self.source_lang_combo.get():
+            source_lang = self.source_lang_combo.get()
+        else:
+            mod_info = self.all_mods_data.get(str(zip_path), {})
+            source_lang = preferred_source_language(mod_info.get('languages', []))
+        if not source_lang:
+            return
         
-        raise FileNotFoundError(f"文件未找到: locale/{language}/{filename}")
+        for (target_lang, filename), content in changes.items():
+            if target_lang == source_lang:
+                continue
+            try:
+                source = load_locale_file_optional(zip_path, source_lang, filename)
+                if source is not None:
+                    self.translation_memory.record_locale(source_lang, target_lang, source, parse_locale(content))
+            except Exception as e:
+                # 翻译记忆只是辅助功能，失败不影响保存
+                logger.warning("记录翻译记忆失败 %s: %s", filename, e)
     
     def preview_changes(self):
         """预览更改"""
-        target_content = self.target_text.get(1.0, tk.END).rstrip()
+        target_content = self.get_target_content().rstrip()
         
         # 创建预览窗口
         preview_window = tk.Toplevel(self.root)
@@ -930,12 +1466,12 @@ class FactorioModLocalizer:
         preview_text.config(state=tk.DISABLED)
     
     def save_to_zip(self):
-        """保存到ZIP文件"""
+        """保存到ZIP文件（同一模组的暂存更改会一并写入）"""
         if not self.current_mod_path or not self.target_lang_combo.get() or not self.file_combo.get():
             messagebox.showwarning("警告", "请先加载文件")
             return
         
-        target_content = self.target_text.get(1.0, tk.END).rstrip()
+        target_content = self.get_target_content().rstrip()
         if not target_content:
             messagebox.showwarning("警告", "目标内容为空")
             return
@@ -943,28 +1479,38 @@ class FactorioModLocalizer:
         try:
             target_lang = self.target_lang_combo.get()
             filename = self.file_combo.get()
+            mod_key = str(self.current_mod_path)
             
             # 确认保存
             operation = "新建" if self.operation_var.get() == "new" else "替换"
-            if not messagebox.askyesno("确认", f"确定要{operation}语言文件吗？\n\n语言: {target_lang}\n文件: {filename}"):
+            message = f"确定要{operation}语言文件吗？\n\n语言: {target_lang}\n文件: {filename}"
+            other_staged = [key for key in self.pending_changes.get(mod_key, {}) if key != (target_lang, filename)]
+            if other_staged:
+                message += f"\n\n该模组另有 {len(other_staged)} 个暂存文件将一并保存"
+            if not messagebox.askyesno("确认", message):
                 return
             
-            # 备份原文件
-            backup_path = self.current_mod_path.with_suffix('.zip.backup')
-            shutil.copy2(self.current_mod_path, backup_path)
+            self.pending_changes.setdefault(mod_key, {})[(target_lang, filename)] = target_content
+            changes = self.pending_changes.pop(mod_key)
+            self.update_pending_button()
             
             self.status_var.set("正在保存到ZIP文件...")
             self.root.update()
             
-            # 修改ZIP文件
-            self.modify_zip_file(self.current_mod_path, target_lang, filename, target_content)
+            try:
+                backup_path = self.commit_mod_changes(self.current_mod_path, changes)
+            except Exception:
+                # 保存失败时保留暂存内容
+                self.pending_changes[mod_key] = changes
+                self.update_pending_button()
+                raise
+            self.scan_index.save()
             
-            # 重新分析模组（更新语言列表）
-            new_mod_info = self.analyze_mod(self.current_mod_path)
+            new_mod_info = self.all_mods_data.get(mod_key)
             if new_mod_info:
-                self.mods_data[str(self.current_mod_path)] = new_mod_info
                 self.current_mod_info = new_mod_info
                 self.update_editor_info()
+            self.refresh_mod_tree()
             
             self.status_var.set("保存成功！")
             messagebox.showinfo("成功", f"语言文件已保存到ZIP中\n\n备份文件: {backup_path.name}")
@@ -975,49 +1521,503 @@ class FactorioModLocalizer:
         except Exception as e:
             messagebox.showerror("错误", f"保存失败: {e}")
     
-    def modify_zip_file(self, zip_path: Path, target_lang: str, filename: str, content: str):
-        """修改ZIP文件中的语言文件"""
-        import tempfile
+    def stage_current_file(self):
+        """把编辑器中的译文加入暂存，稍后与其他更改一起提交"""
+        if not self.current_mod_path or not self.target_lang_combo.get() or not self.file_combo.get():
+            messagebox.showwarning("警告", "请先加载文件")
+            return
         
-        # 创建临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_file:
-            temp_path = Path(temp_file.name)
+        target_content = self.get_target_content().rstrip()
+        if not target_content:
+            messagebox.showwarning("警告", "目标内容为空")
+            return
         
-        try:
-            # 复制原ZIP内容到新ZIP，同时添加或替换目标文件
-            with zipfile.ZipFile(zip_path, 'r') as source_zip:
-                with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as target_zip:
-                    
-                    # 查找模组根目录
-                    mod_root = ""
-                    for file_info in source_zip.filelist:
-                        if file_info.filename.endswith('/info.json'):
-                            mod_root = file_info.filename.replace('/info.json', '')
-                            break
-                        elif file_info.filename == 'info.json':
-                            mod_root = ""
-                            break
-                    
-                    target_file_path = f"{mod_root}/locale/{target_lang}/{filename}".lstrip('/')
-                    
-                    # 复制所有文件，跳过要替换的文件
-                    for file_info in source_zip.filelist:
-                        if file_info.filename != target_file_path:
-                            target_zip.writestr(file_info, source_zip.read(file_info.filename))
-                    
-                    # 添加新的语言文件
-                    target_zip.writestr(target_file_path, content.encode('utf-8'))
+        target_lang = self.target_lang_combo.get()
+        filename = self.file_combo.get()
+        self.pending_changes.setdefault(str(self.current_mod_path), {})[(target_lang, filename)] = target_content
+        self.update_pending_button()
+        
+        total_files = sum(len(changes) for changes in self.pending_changes.values())
+        self.status_var.set(f"已暂存: {target_lang}/{filename}（共 {total_files} 个文件待提交）")
+    
+    def update_pending_button(self):
+        """更新待提交更改按钮上的计数"""
+        total_files = sum(len(changes) for changes in self.pending_changes.values())
+        self.pending_button.config(text=f"待提交更改 ({total_files})")
+    
+    def commit_mod_changes(self, zip_path: Path, changes: Dict[Tuple[str, str], str]) -> Path:
+        """把一个模组的全部更改写入ZIP，只备份和重写一次，返回备份路径"""
+        self.record_translation_memory(zip_path, changes)
+        backup_path, new_mod_info = commit_mod_changes(zip_path, changes, self.scan_index, text_index=self.text_index,
+                                                       keep_backups=self.backup_keep_count,
+                                                       max_backup_size=self.backup_max_size,
+                                                       backup_mode=self.backup_mode)
+        
+        if new_mod_info:
+            self.update_mod_entry(zip_path, new_mod_info)
+        self.sync_backup_rows(zip_path)
+        return backup_path
+    
+    def update_mod_entry(self, zip_path: Path, mod_info: Dict):
+        """模组写入后同步列表数据"""
+        mod_key = str(zip_path)
+        self.all_mods_data[mod_key] = mod_info
+        if mod_key in self.mods_data:
+            self.mods_data[mod_key] = mod_info
+        self.search_index.add(mod_key, mod_info)
+        self.mod_list.set_row(mod_key, mod_info)
+    
+    def sync_backup_rows(self, *zip_paths: Path):
+        """更新模组的备份行：加入新备份，去掉按保留策略删除的旧备份"""
+        names = {zip_path.stem for zip_path in zip_paths}
+        for path, info in list(self.all_mods_data.items()):
+            if info.get('is_backup') and info['name'] in names and not Path(path).exists():
+                del self.all_mods_data[path]
+                self.mods_data.pop(path, None)
+                self.search_index.remove(path)
+                self.mod_list.remove_row(path)
+        
+        for zip_path in zip_paths:
+            for backup_path in list_backups(zip_path):
+                if str(backup_path) not in self.all_mods_data:
+                    info = scan_mod_file(backup_path)
+                    self.all_mods_data[str(backup_path)] = info
+                    self.search_index.add(str(backup_path), info)
+                    self.mod_list.set_row(str(backup_path), info)
+        
+        self.reorder_mod_rows()
+    
+    def reorder_mod_rows(self):
+        """模组在前，备份按模组分组、最新的在前（与扫描结果的顺序一致），并重新应用搜索条件"""
+        mods = {path: info for path, info in self.all_mods_data.items() if not info.get('is_backup')}
+        backups = sort_backups([Path(path) for path, info in self.all_mods_data.items() if info.get('is_backup')])
+        mods.update((str(path), self.all_mods_data[str(path)]) for path in backups)
+        self.all_mods_data = mods
+        self.search_index.reorder(self.all_mods_data)
+        self.apply_search()
+    
+    def commit_pending_changes(self, window: Optional[tk.Toplevel] = None) -> bool:
+        """提交所有暂存的更改，每个模组一次备份、一次重写"""
+        if not self.pending_changes:
+            messagebox.showinfo("提示", "没有待提交的更改", parent=window)
+            return False
+        
+        mod_count = len(self.pending_changes)
+        total_files = sum(len(changes) for changes in self.pending_changes.values())
+        if not messagebox.askyesno("确认", f"确定要提交 {mod_count} 个模组中的 {total_files} 个语言文件吗？\n\n"
+                                          f"每个模组只会备份和重写一次", parent=window):
+            return False
+        
+        errors = []
+        committed = 0
+        for i, (mod_key, changes) in enumerate(list(self.pending_changes.items())):
+            zip_path = Path(mod_key)
+            self.status_var.set(f"正在提交: {i+1}/{mod_count} {zip_path.name}")
+            self.root.update_idletasks()
+            
+            try:
+                self.commit_mod_changes(zip_path, changes)
+                del self.pending_changes[mod_key]
+                committed += 1
+            except Exception as e:
+                # 单个模组失败不影响其他模组，失败的更改保留在暂存区
+                errors.append(f"{zip_path.name}: {e}")
+        
+        self.scan_index.save()
+        self.update_pending_button()
+        self.refresh_mod_tree()
+        if self.current_mod_path and str(self.current_mod_path) in self.all_mods_data:
+            self.current_mod_info = self.all_mods_data[str(self.current_mod_path)]
+        
+        if errors:
+            self.status_var.set(f"提交完成: 成功 {committed} 个模组，失败 {len(errors)} 个")
+            messagebox.showerror("部分提交失败", "以下模组提交失败（更改仍保留在暂存区）:\n\n" + "\n".join(errors), parent=window)
+        else:
+            self.status_var.set(f"提交完成: 已写入 {committed} 个模组")
+            messagebox.showinfo("成功", f"已提交 {committed} 个模组的 {total_files} 个语言文件", parent=window)
+        return True
+    
+    def run_batch(self, label: str, job, on_done):
+        """在后台线程中运行批量任务，进度通过队列回传到状态栏
+        
+        job(progress) 返回结果后在主线程中调用 on_done(result)。
+        """
+        if self.batch_thread is not None:
+            messagebox.showwarning("警告", "已有批量任务正在进行")
+            return
+        
+        progress_queue = queue.Queue()
+        
+        def worker():
+            try:
+                result = job(lambda done, total, name: progress_queue.put(('progress', (done, total, name))))
+            except Exception as e:
+                progress_queue.put(('error', e))
+            else:
+                progress_queue.put(('done', result))
+        
+        self.batch_thread = threading.Thread(target=worker, daemon=True)
+        self.batch_thread.start()
+        self.status_var.set(f"批量{label}: 准备中...")
+        self.root.after(SCAN_POLL_INTERVAL, self.poll_batch_queue, label, progress_queue, on_done)
+    
+    def poll_batch_queue(self, label: str, progress_queue: queue.Queue, on_done):
+        """在主线程中显示批量任务的进度"""
+        while True:
+            try:
+                kind, payload = progress_queue.get_nowait()
+            except queue.Empty:
+                break
             
-            # 替换原文件
-            shutil.move(temp_path, zip_path)
+            if kind == 'progress':
+                done, total, mod_name = payload
+                self.status_var.set(f"批量{label}: {done}/{total} {mod_name}")
+                continue
             
-        except Exception as e:
-            # 清理临时文件
-            if temp_path.exists():
-                temp_path.unlink()
-            raise e
+            self.batch_thread = None
+            if kind == 'error':
+                self.status_var.set(f"批量{label}失败")
+                messagebox.showerror("错误", f"批量{label}失败: {payload}")
+            else:
+                on_done(payload)
+            return
+        
+        self.root.after(SCAN_POLL_INTERVAL, self.poll_batch_queue, label, progress_queue, on_done)
     
-
+    def open_batch_state(self, bundle_path: Path, stage: str, action: str) -> PipelineState:
+        """读取批量文件的进度，有未完成的进度时询问是否继续"""
+        state = PipelineState(default_state_path(bundle_path), bundle_path)
+        done = state.completed(stage)
+        if done and not messagebox.askyesno("继续", f"上次已{action} {len(done)} 个模组，是否跳过这些模组继续？\n\n"
+                                                  f"选择\"否\"将重新{action}全部模组"):
+            state.reset(stage)
+        return state
+    
+    def batch_export_missing(self):
+        """把所有缺少中文的模组中需要翻译的键导出到一个批量文件"""
+        target_lang = 'zh-CN'
+        mods = missing_language_mods(self.all_mods_data, target_lang)
+        if not mods:
+            messagebox.showinfo("提示", f"没有缺少 {target_lang} 的模组，请先扫描模组目录")
+            return
+        
+        bundle = filedialog.asksaveasfilename(
+            title="保存批量文件",
+            initialdir=self.export_path_var.get(),
+            initialfile=f"missing_{target_lang}.jsonl",
+            defaultextension=".jsonl",
+            filetypes=[("批量文件", "*.jsonl"), ("所有文件", "*.*")]
+        )
+        if not bundle:
+            return
+        bundle_path = Path(bundle)
+        state = self.open_batch_state(bundle_path, STAGE_EXPORT, "导出")
+        
+        def finish(result):
+            exported = result['exported']
+            keys = sum(item['keys'] for item in exported)
+            message = f"已导出 {len(exported)} 个模组的 {keys} 个键到:\n{bundle_path}"
+            if result['skipped']:
+                message += f"\n\n跳过上次已导出的 {len(result['skipped'])} 个模组"
+            if result['errors']:
+                message += "\n\n以下模组导出失败（再次导出时会重试）:\n" + "\n".join(
+                    f"{item['mod']}: {item['error']}" for item in result['errors'][:20])
+            self.status_var.set(f"批量导出完成: {len(exported)} 个模组，{keys} 个键")
+            messagebox.showinfo("批量导出完成", message)
+        
+        self.run_batch("导出", lambda progress: export_bundle(mods, bundle_path, target_lang, state=state,
+                                                             progress=progress), finish)
+    
+    def batch_import_bundle(self):
+        """导入翻译好的批量文件，按模组合并后写回ZIP"""
+        bundle = filedialog.askopenfilename(
+            title="选择批量文件",
+            initialdir=self.export_path_var.get(),
+            filetypes=[("批量文件", "*.jsonl"), ("所有文件", "*.*")]
+        )
+        if not bundle:
+            return
+        if not messagebox.askyesno("确认", "确定要把批量文件中的译文写入对应的模组吗？\n\n每个模组只会备份和重写一次"):
+            return
+        bundle_path = Path(bundle)
+        state = self.open_batch_state(bundle_path, STAGE_IMPORT, "提交")
+        mods = latest_mods(self.all_mods_data)
+        
+        def job(progress):
+            return import_bundle(bundle_path, mods, state=state, scan_index=self.scan_index,
+                                 text_index=self.text_index, memory=self.translation_memory, progress=progress,
+                                 keep_backups=self.backup_keep_count, max_backup_size=self.backup_max_size,
+                                 backup_mode=self.backup_mode)
+        
+        def finish(result):
+            committed = result['committed']
+            zip_paths = [Path(item['path']) for item in committed]
+            for zip_path in zip_paths:
+                # 提交时已写入扫描索引，这里直接取出新的模组信息
+                info = scan_mod_file(zip_path, self.scan_index)
+                if info:
+                    self.update_mod_entry(zip_path, info)
+            if zip_paths:
+                self.sync_backup_rows(*zip_paths)
+            if self.current_mod_path and str(self.current_mod_path) in self.all_mods_data:
+                self.current_mod_info = self.all_mods_data[str(self.current_mod_path)]
+            
+            message = f"已写入 {len(committed)} 个模组"
+            if result['unchanged']:
+                message += f"\n{len(result['unchanged'])} 个模组的内容没有变化，未重写"
+            if result['skipped']:
+                message += f"\n跳过上次已提交的 {len(result['skipped'])} 个模组"
+            if result['untranslated']:
+                message += f"\n{result['untranslated']} 个文件尚未填写译文，已跳过"
+            if result['errors']:
+                message += "\n\n以下模组写入失败（再次导入时会重试）:\n" + "\n".join(
+                    f"{item['mod']}: {item['error']}" for item in result['errors'][:20])
+            self.status_var.set(f"批量导入完成: 已写入 {len(committed)} 个模组")
+            messagebox.showinfo("批量导入完成", message)
+        
+        self.run_batch("导入", job, finish)
+    
+    def show_pending_changes(self):
+        """显示待提交的更改列表"""
+        pending_window = tk.Toplevel(self.root)
+        pending_window.title("待提交更改")
+        pending_window.geometry("700x400")
+        
+        list_frame = ttk.Frame(pending_window, padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        list_frame.columnconfigure(0, weight=1)
+        list_frame.rowconfigure(0, weight=1)
+        
+        pending_tree = ttk.Treeview(list_frame, columns=('language', 'file', 'size'), show='tree headings')
+        pending_tree.heading('#0', text='模组', anchor=tk.W)
+        pending_tree.heading('language', text='语言', anchor=tk.W)
+        pending_tree.heading('file', text='文件', anchor=tk.W)
+        pending_tree.heading('size', text='大小', anchor=tk.W)
+        pending_tree.column('#0', width=280)
+        pending_tree.column('language', width=80)
+        pending_tree.column('file', width=180)
+        pending_tree.column('size', width=80)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=pending_tree.yview)
+        pending_tree.configure(yscrollcommand=scrollbar.set)
+        pending_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        
+        # 树视图项目 -> (模组路径, (语言, 文件名))
+        item_keys = {}
+        
+        def reload():
+            for item in pending_tree.get_children():
+                pending_tree.delete(item)
+            item_keys.clear()
+            for mod_key, changes in self.pending_changes.items():
+                for (language, filename), content in sorted(changes.items()):
+                    item_id = pending_tree.insert('', 'end', text=Path(mod_key).stem,
+                                                  values=(language, filename,
+                                                          format_file_size(len(content.encode('utf-8')))))
+                    item_keys[item_id] = (mod_key, (language, filename))
+        
+        def remove_selected():
+            for item_id in pending_tree.selection():
+                mod_key, change_key = item_keys[item_id]
+                changes = self.pending_changes.get(mod_key, {})
+                changes.pop(change_key, None)
+                if not changes:
+                    self.pending_changes.pop(mod_key, None)
+            self.update_pending_button()
+            reload()
+        
+        def clear_all():
+            if self.pending_changes and messagebox.askyesno("确认", "确定要丢弃所有暂存的更改吗？", parent=pending_window):
+                self.pending_changes.clear()
+                self.update_pending_button()
+                reload()
+        
+        def commit_all():
+            if self.commit_pending_changes(pending_window):
+                reload()
+        
+        button_frame = ttk.Frame(pending_window, padding=(10, 0, 10, 10))
+        button_frame.pack(fill=tk.X)
+        ttk.Button(button_frame, text="全部提交", command=commit_all).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="移除选中", command=remove_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="清空全部", command=clear_all).pack(side=tk.LEFT, padx=5)
+        
+        reload()
+    
+    def show_diagnostics(self):
+        """显示热点路径的耗时统计，可导出 Chrome 跟踪文件"""
+        diag_window = tk.Toplevel(self.root)
+        diag_window.title("性能诊断")
+        diag_window.geometry("700x450")
+        
+        enabled_var = tk.BooleanVar(value=INSTRUMENTATION.enabled)
+        
+        def toggle():
+            INSTRUMENTATION.enable(enabled_var.get())
+            reload()
+        
+        top_frame = ttk.Frame(diag_window, padding=(10, 10, 10, 0))
+        top_frame.pack(fill=tk.X)
+        ttk.Checkbutton(top_frame, text="记录耗时", variable=enabled_var, command=toggle).pack(side=tk.LEFT)
+        status_label = ttk.Label(top_frame, text="")
+        status_label.pack(side=tk.LEFT, padx=(10, 0))
+        
+        list_frame = ttk.Frame(diag_window, padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        list_frame.columnconfigure(0, weight=1)
+        list_frame.rowconfigure(0, weight=1)
+        
+        columns = ('count', 'total', 'mean', 'max')
+        stats_tree = ttk.Treeview(list_frame, columns=columns, show='tree headings')
+        stats_tree.heading('#0', text='名称', anchor=tk.W)
+        stats_tree.heading('count', text='次数/计数', anchor=tk.W)
+        stats_tree.heading('total', text='总耗时 (ms)', anchor=tk.W)
+        stats_tree.heading('mean', text='平均 (ms)', anchor=tk.W)
+        stats_tree.heading('max', text='最长 (ms)', anchor=tk.W)
+        stats_tree.column('#0', width=220)
+        for column in columns:
+            stats_tree.column(column, width=110)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=stats_tree.yview)
+        stats_tree.configure(yscrollcommand=scrollbar.set)
+        stats_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        
+        def reload():
+            stats_tree.delete(*stats_tree.get_children())
+            for row in INSTRUMENTATION.summary():
+                stats_tree.insert('', 'end', text=row['name'],
+                                  values=(row['count'], f"{row['total_ms']:.1f}", f"{row['mean_ms']:.3f}",
+                                          f"{row['max_ms']:.3f}"))
+            for name, value in INSTRUMENTATION.counter_values().items():
+                stats_tree.insert('', 'end', text=name, values=(value, '', '', ''))
+            status_label.config(text="正在记录" if INSTRUMENTATION.enabled else "未开启（开启后重新执行要测量的操作）")
+        
+        def reset():
+            INSTRUMENTATION.reset()
+            reload()
+        
+        def export_trace():
+            trace_file = filedialog.asksaveasfilename(
+                parent=diag_window,
+                title="导出跟踪文件",
+                initialdir=self.export_path_var.get(),
+                initialfile="factorio_localizer_trace.json",
+                defaultextension=".json",
+                filetypes=[("Chrome 跟踪文件", "*.json"), ("所有文件", "*.*")]
+            )
+            if not trace_file:
+                return
+            try:
+                INSTRUMENTATION.dump_trace(Path(trace_file))
+            except OSError as e:
+                messagebox.showerror("错误", f"导出跟踪文件失败: {e}", parent=diag_window)
+                return
+            messagebox.showinfo("完成", f"已导出跟踪文件（可在 chrome://tracing 或 Perfetto 中打开）:\n{trace_file}",
+                                parent=diag_window)
+        
+        button_frame = ttk.Frame(diag_window, padding=(10, 0, 10, 10))
+        button_frame.pack(fill=tk.X)
+        ttk.Button(button_frame, text="刷新", command=reload).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="清空", command=reset).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="导出跟踪文件", command=export_trace).pack(side=tk.LEFT, padx=5)
+        
+        reload()
+    
+    def show_text_search(self):
+        """在所有模组的语言文件中搜索键或文本（查询缓存中的文本索引，不打开ZIP）"""
+        search_window = tk.Toplevel(self.root)
+        search_window.title("搜索语言文本")
+        search_window.geometry("900x500")
+        
+        query_frame = ttk.Frame(search_window, padding=(10, 10, 10, 0))
+        query_frame.pack(fill=tk.X)
+        query_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(query_frame, text="文本:").grid(row=0, column=0, padx=(0, 5))
+        query_var = tk.StringVar()
+        query_entry = ttk.Entry(query_frame, textvariable=query_var)
+        query_entry.grid(row=0, column=1, sticky=(tk.W, tk.E))
+        ttk.Label(query_frame, text="语言:").grid(row=0, column=2, padx=(10, 5))
+        language_var = tk.StringVar(value="全部")
+        ttk.Combobox(query_frame, textvariable=language_var, state="readonly", width=10,
+                     values=["全部"] + list(self.supported_languages)).grid(row=0, column=3)
+        
+        list_frame = ttk.Frame(search_window, padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        list_frame.columnconfigure(0, weight=1)
+        list_frame.rowconfigure(0, weight=1)
+        
+        result_tree = ttk.Treeview(list_frame, columns=('file', 'key', 'value'), show='tree headings')
+        result_tree.heading('#0', text='模组', anchor=tk.W)
+        result_tree.heading('file', text='文件', anchor=tk.W)
+        result_tree.heading('key', text='键', anchor=tk.W)
+        result_tree.heading('value', text='文本', anchor=tk.W)
+        result_tree.column('#0', width=200)
+        result_tree.column('file', width=140)
+        result_tree.column('key', width=220)
+        result_tree.column('value', width=300)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=result_tree.yview)
+        result_tree.configure(yscrollcommand=scrollbar.set)
+        result_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        
+        if self.text_index_cancel_event is None and self.all_mods_data:
+            # 索引未建立完（例如扫描被取消）时先补上，已索引且未变化的模组会直接跳过
+            self.start_text_indexing()
+        
+        def index_note() -> str:
+            if self.text_index_progress is None:
+                return ""
+            done, total = self.text_index_progress
+            return f"（文本索引正在建立 {done}/{total}，结果可能不完整）"
+        
+        result_var = tk.StringVar(value=f"已索引 {self.text_index.summary()['strings']} 条文本，"
+                                        f"输入至少1个字符开始搜索{index_note()}")
+        ttk.Label(search_window, textvariable=result_var, padding=(10, 0, 10, 10)).pack(fill=tk.X)
+        
+        # 树视图项目 -> 模组路径
+        item_paths = {}
+        pending_search = [None]
+        
+        def run_search():
+            pending_search[0] = None
+            result_tree.delete(*result_tree.get_children())
+            item_paths.clear()
+            language = language_var.get()
+            results = self.text_index.search(query_var.get(), language=None if language == "全部" else language)
+            for item in results:
+                locale_key = f"{item['section']}.{item['key']}" if item['section'] else item['key']
+                item_id = result_tree.insert('', 'end', text=Path(item['path']).stem,
+                                             values=(f"{item['lang']}/{item['filename']}", locale_key, item['value']))
+                item_paths[item_id] = item['path']
+            limit_note = "（已达到显示上限）" if len(results) >= SEARCH_LIMIT else ""
+            result_var.set(f"找到 {len(results)} 条{limit_note}{index_note()}")
+        
+        def schedule_search(*args):
+            if pending_search[0] is not None:
+                search_window.after_cancel(pending_search[0])
+            pending_search[0] = search_window.after(SEARCH_DEBOUNCE_MS, run_search)
+        
+        def locate_mod(event):
+            selection = result_tree.selection()
+            if not selection:
+                return
+            path = item_paths[selection[0]]
+            if path not in self.mods_data:
+                # 当前搜索条件下不可见，先清除搜索
+                self.clear_search()
+            if path in self.mod_list.materialized:
+                self.mod_tree.selection_set(path)
+                self.mod_tree.see(path)
+        
+        query_var.trace('w', schedule_search)
+        language_var.trace('w', schedule_search)
+        query_entry.bind('<Return>', lambda event: run_search())
+        result_tree.bind('<Double-1>', locate_mod)
+        query_entry.focus_set()
     
     def show_language_details(self):
         """显示语言详情"""
@@ -1029,13 +2029,8 @@ class FactorioModLocalizer:
         item = selection[0]
         mod_name = self.mod_tree.item(item, 'text')
         
-        # 查找模组信息
-        mod_info = None
-        for path, info in self.mods_data.items():
-            if Path(path).stem == mod_name:
-                mod_info = info
-                break
-        
+        # 树视图项目ID就是文件路径
+        mod_info = self.mods_data.get(item)
         if not mod_info:
             messagebox.showerror("错误", "找不到模组信息")
             return
@@ -1100,14 +2095,39 @@ class FactorioModLocalizer:
         """清理缓存"""
         if messagebox.askyesno("确认", "确定要清理所有缓存文件吗？"):
             try:
-                if self.cache_dir.exists():
-                    shutil.rmtree(self.cache_dir)
-                    self.cache_dir.mkdir(exist_ok=True)
+                # 先停止目录监视（它会写入索引），再关闭数据库和日志文件，否则Windows上无法删除
+                self.stop_watcher(wait=True)
+                self.cancel_text_indexing(wait=True)
+                self.translation_memory.close()
+                self.text_index.close()
+                shutdown_logging()
+                try:
+                    if self.cache_dir.exists():
+                        shutil.rmtree(self.cache_dir)
+                        self.cache_dir.mkdir(exist_ok=True)
+                finally:
+                    self.translation_memory = TranslationMemory(self.cache_dir / "translation_memory.sqlite3")
+                    self.text_index = LocaleTextIndex(self.cache_dir / "locale_text_index.sqlite3")
+                    self.start_logging()
+                self.scan_index.clear()
+                if self.mods_path.exists():
+                    self.start_watcher()
+                if self.all_mods_data:
+                    self.start_text_indexing()
                 self.status_var.set("缓存已清理")
                 messagebox.showinfo("成功", "缓存已清理完毕")
             except Exception as e:
                 messagebox.showerror("错误", f"清理缓存失败: {e}")
     
+    def start_logging(self):
+        """按配置的级别把日志写入缓存目录（不输出到控制台）"""
+        try:
+            setup_logging(self.log_level, self.cache_dir)
+        except ValueError as e:
+            self.log_level = DEFAULT_LOG_LEVEL
+            setup_logging(self.log_level, self.cache_dir)
+            logger.warning("%s，使用默认级别 %s", e, DEFAULT_LOG_LEVEL)
+    
     def load_config(self):
         """加载配置文件"""
         try:
@@ -1117,19 +2137,27 @@ class FactorioModLocalizer:
                     export_path = config.get('export_path', str(Path.home() / "Desktop" / "factorio_exports"))
                     if hasattr(self, 'export_path_var'):
                         self.export_path_var.set(export_path)
+                    self.backup_keep_count = int(config.get('backup_keep_count', BACKUP_KEEP_COUNT))
+                    self.backup_max_size = int(config.get('backup_max_size_mb', BACKUP_MAX_SIZE // (1024 * 1024))) * 1024 * 1024
+                    self.backup_mode = config.get('backup_mode', BACKUP_MODE_DELTA)
+                    self.log_level = config.get('log_level', DEFAULT_LOG_LEVEL)
         except Exception as e:
-            print(f"加载配置失败: {e}")
+            logger.warning("加载配置失败: %s", e)
     
     def save_config(self):
         """保存配置文件"""
         try:
             config = {
-                'export_path': self.export_path_var.get() if hasattr(self, 'export_path_var') else str(Path.home() / "Desktop" / "factorio_exports")
+                'export_path': self.export_path_var.get() if hasattr(self, 'export_path_var') else str(Path.home() / "Desktop" / "factorio_exports"),
+                'backup_keep_count': self.backup_keep_count,
+                'backup_max_size_mb': self.backup_max_size // (1024 * 1024),
+                'backup_mode': self.backup_mode,
+                'log_level': self.log_level
             }
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
         except Exception as e:
-            print(f"保存配置失败: {e}")
+            logger.warning("保存配置失败: %s", e)
     
     def browse_export_path(self):
         """浏览导出路径"""
@@ -1153,7 +2181,7 @@ class FactorioModLocalizer:
             filename = self.file_combo.get()
             
             # 读取源文件内容
-            content = self.read_locale_file(self.current_mod_path, source_lang, filename)
+            content = read_locale_file(self.current_mod_path, source_lang, filename)
             
             # 确保导出目录存在
             export_dir = Path(self.export_path_var.get())
@@ -1174,9 +2202,47 @@ class FactorioModLocalizer:
         except Exception as e:
             messagebox.showerror("错误", f"导出失败: {e}")
     
+    def export_untranslated_file(self):
+        """只导出目标语言中缺失或未翻译的键，减少AI翻译的内容"""
+        if not self.current_mod_path or not self.source_lang_combo.get() or not self.file_combo.get():
+            messagebox.showwarning("警告", "请先加载文件")
+            return
+        
+        try:
+            source_lang = self.source_lang_combo.get()
+            target_lang = self.target_lang_combo.get()
+            filename = self.file_combo.get()
+            
+            # 已暂存的译文优先于ZIP中的目标文件
+            staged_content = self.pending_changes.get(str(self.current_mod_path), {}).get((target_lang, filename))
+            target = parse_locale(staged_content) if staged_content is not None else None
+            
+            partial = export_untranslated(self.current_mod_path, source_lang, target_lang, filename, target)
+            if partial is None:
+                messagebox.showinfo("提示", f"{target_lang}/{filename} 中没有需要翻译的键")
+                return
+            
+            # 确保导出目录存在
+            export_dir = Path(self.export_path_var.get())
+            export_dir.mkdir(parents=True, exist_ok=True)
+            
+            # 文件名与导出源文件相同，导入时会合并到现有译文中
+            mod_name = self.current_mod_info.get('name', 'unknown')
+            export_filename = f"{mod_name}_{source_lang}_{filename}"
+            export_path = export_dir / export_filename
+            
+            with open(export_path, 'w', encoding='utf-8') as f:
+                f.write(partial.serialize())
+            
+            self.status_var.set(f"已导出 {len(partial)} 个未翻译的键: {export_path}")
+            messagebox.showinfo("成功", f"已导出 {len(partial)} 个未翻译的键到:\n{export_path}")
+            
+        except Exception as e:
+            messagebox.showerror("错误", f"导出失败: {e}")
+    
     def export_target_file(self):
         """导出目标文件（编辑器中的内容）"""
-        target_content = self.target_text.get(1.0, tk.END).rstrip()
+        target_content = self.get_target_content().rstrip()
         if not target_content:
             messagebox.showwarning("警告", "目标内容为空")
             return
@@ -1224,12 +2290,31 @@ class FactorioModLocalizer:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
+            # 编辑器中已有内容时按键合并（支持只含部分键的译文），否则直接替换
+            current_content = self.get_target_content().rstrip()
+            imported = parse_locale(content)
+            if current_content and len(imported):
+                content = merge_locale(parse_locale(current_content), imported).serialize()
+                result = f"已合并 {len(imported)} 个键"
+            else:
+                result = "文件已导入"
+            
+            # 与编辑器中的原文配对，记入翻译记忆
+            source_content = self.source_loader.get_text().rstrip()
+            source_lang = self.source_lang_combo.get()
+            target_lang = self.target_lang_combo.get()
+            if source_content and source_lang and target_lang and source_lang != target_lang:
+                try:
+                    self.translation_memory.record_locale(source_lang, target_lang,
+                                                          parse_locale(source_content), parse_locale(content))
+                except Exception as e:
+                    logger.warning("记录翻译记忆失败: %s", e)
+            
             # 显示在目标文本框中
-            self.target_text.delete(1.0, tk.END)
-            self.target_text.insert(1.0, content)
+            self.set_target_content(content)
             
-            self.status_var.set(f"已导入文件: {Path(file_path).name}")
-            messagebox.showinfo("成功", f"文件已导入:\n{Path(file_path).name}")
+            self.status_var.set(f"{result}: {Path(file_path).name}")
+            messagebox.showinfo("成功", f"{result}:\n{Path(file_path).name}")
             
         except Exception as e:
             messagebox.showerror("错误", f"导入失败: {e}")
@@ -1239,8 +2324,12 @@ class FactorioModLocalizer:
         # 启动时自动扫描
         self.root.after(100, self.scan_mods)
         self.root.mainloop()
+        # 停止仍在后台运行的扫描任务和目录监视
+        self.cancel_scan(silent=True)
+        self.stop_watcher()
         # 程序退出时保存配置
         self.save_config()
+        shutdown_logging()
 
 if __name__ == "__main__":
     app = FactorioModLocalizer()
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 批量汉化流程
+Factorio Mod Localization Tool - Batch Pipeline
+
+找出所有缺少目标语言的模组，把需要翻译的源语言键导出到一个批量文件；
+翻译完成后（手动填写或由翻译服务填写）导入批量文件，按模组合并译文并写回ZIP（每个模组只备份和重写一次）。
+
+导出和导入都在线程池中按模组并行处理，单个模组失败只记录错误，不影响其他模组。
+进度保存在批量文件旁的状态文件中，中断后重新运行会跳过已完成的模组。
+
+批量文件为 JSON Lines，读写都是逐行进行的，内存占用与模组数量无关。
+第一行是文件头 {"format": "factorio-localizer-bundle", "version": 1}，之后每行对应一个语言文件:
+    mod, version, path              - 模组名称、版本和导出时的路径
+    source_lang, target_lang, file  - 语言和文件名
+    keys                            - 原文中的键数
+    source, source_hash             - 原文（只含需要翻译的键，或完整文件）及其 SHA-256
+    target, target_hash             - 译文（翻译后填写，完整或只含部分键）及导出时译文的 SHA-256
+同一模组的条目是连续的。导入时校验原文的哈希，译文哈希未变的条目和合并后与ZIP中内容相同的文件会被跳过。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from factorio_mod_core import (
+    SCAN_WORKERS, ScanIndex, commit_mod_changes, export_untranslated, get_locale_files, latest_mods,
+    load_locale_file, load_locale_file_optional, merge_translation, preferred_source_language
+)
+from factorio_locale import LocaleFile, decode_value, encode_value, parse_locale
+from factorio_logging import get_logger
+from factorio_text_index import LocaleTextIndex
+from factorio_translation_memory import TranslationMemory
+from factorio_translation_provider import TranslationProvider, translate_texts
+
+logger = get_logger('pipeline')
+
+PIPELINE_WORKERS = SCAN_WORKERS
+PIPELINE_STATE_VERSION = 2
+
+BUNDLE_FORMAT = 'factorio-localizer-bundle'
+BUNDLE_VERSION = 1
+
+# 调用翻译服务时每次读取的批量文件行数，同一段中的文本合并去重后一起请求
+TRANSLATE_WINDOW = 200
+
+STAGE_EXPORT = 'export'
+STAGE_IMPORT = 'import'
+
+# progress(已完成数, 总数, 模组名称)
+ProgressCallback = Callable[[int, int, str], None]
+
+
+def content_hash(text: str) -> str:
+    """批量文件中记录的内容哈希"""
+    return hashlib.sha256(text.encode('utf-8', errors='surrogateescape')).hexdigest()
+
+
+def missing_language_mods(mods_data: Dict[str, Dict], target_lang: str) -> Dict[str, Tuple[Path, Dict]]:
+    """缺少目标语言但有其他语言文件的模组（同一模组只取最新版本），按名称排序"""
+    mods = latest_mods(mods_data)
+    return {
+        name: mods[name] for name in sorted(mods)
+        if mods[name][1].get('languages') and target_lang not in mods[name][1]['languages']
+    }
+
+
+def default_state_path(bundle_path: Path) -> Path:
+    """批量文件对应的状态文件路径"""
+    return bundle_path.with_name(bundle_path.name + '.state.json')
+
+
+class PipelineState:
+    """批量流程的进度文件，按阶段记录已完成的模组
+
+    每完成一个模组立即写入磁盘，中断后重新运行时跳过这些模组。
+    状态文件属于另一个批量文件或版本不符时视为空。
+    """
+
+    def __init__(self, state_file: Path, bundle_path: Path):
+        self.state_file = state_file
+        self.bundle = str(Path(bundle_path).resolve())
+        self.stages: Dict[str, Dict[str, Dict]] = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """从磁盘加载状态"""
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == PIPELINE_STATE_VERSION and data.get('bundle') == self.bundle:
+                    self.stages = data.get('stages', {})
+        except Exception as e:
+            logger.warning("加载批量进度失败: %s", e)
+            self.stages = {}
+
+    def save(self):
+        """保存状态到磁盘"""
+        with self.lock:
+            data = {'version': PIPELINE_STATE_VERSION, 'bundle': self.bundle, 'stages': self.stages}
+            temp_path = self.state_file.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.state_file)
+
+    def completed(self, stage: str) -> Dict[str, Dict]:
+        """某个阶段已完成的模组 -> 结果记录"""
+        with self.lock:
+            return dict(self.stages.get(stage, {}))
+
+    def mark_done(self, stage: str, mod_name: str, record: Dict):
+        """记录一个模组已完成并立即保存"""
+        with self.lock:
+            self.stages.setdefault(stage, {})[mod_name] = record
+        self.save()
+
+    def update_records(self, stage: str, updates: Dict[str, Dict]):
+        """更新已完成模组的记录（只更新已有的记录）并保存"""
+        with self.lock:
+            records = self.stages.get(stage, {})
+            changed = [name for name in updates if name in records]
+            for name in changed:
+                records[name] = dict(records[name], **updates[name])
+        if changed:
+            self.save()
+
+    def reset(self, stage: str):
+        """清除某个阶段的进度（重新开始）"""
+        with self.lock:
+            self.stages.pop(stage, None)
+        self.save()
+
+
+class _DigestWriter:
+    """写入批量文件的同时记录已写入的字节数和内容哈希（继续导出前用来确认文件未被改动）"""
+
+    def __init__(self, bundle, size: int = 0, digest=None):
+        self.bundle = bundle
+        self.size = size
+        self.digest = digest if digest is not None else hashlib.sha256()
+
+    def write(self, text: str):
+        data = text.encode('utf-8')
+        self.bundle.write(text)
+        self.size += len(data)
+        self.digest.update(data)
+
+    def position(self) -> Dict:
+        """当前位置和到此为止的内容哈希，保存在进度记录中"""
+        return {'offset': self.size, 'digest': self.digest.hexdigest()}
+
+
+def _prefix_digest(bundle_path: Path, size: int):
+    """批量文件前 size 个字节的哈希，文件不足 size 个字节时返回None"""
+    digest = hashlib.sha256()
+    remaining = size
+    with open(bundle_path, 'rb') as f:
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                return None
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest
+
+
+def write_bundle_line(bundle, data: Dict):
+    """写入批量文件的一行"""
+    bundle.write(json.dumps(data, ensure_ascii=False) + '\n')
+
+
+def write_bundle_header(bundle):
+    """写入批量文件头"""
+    write_bundle_line(bundle, {'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION})
+
+
+def read_bundle(bundle_path: Path) -> Iterator[Dict]:
+    """逐行读取批量文件中的条目，跳过文件头和空行"""
+    with open(bundle_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"批量文件第 {line_number} 行格式错误: {e}")
+            if 'format' in data:
+                if data['format'] != BUNDLE_FORMAT or data.get('version', 0) > BUNDLE_VERSION:
+                    raise ValueError(f"不支持的批量文件格式: {data['format']} {data.get('version')}")
+                continue
+            yield data
+
+
+def count_bundle_entries(bundle_path: Path) -> int:
+    """批量文件中的条目数（只数行，不解析）"""
+    with open(bundle_path, 'r', encoding='utf-8') as f:
+        return sum(1 for line in f if line.strip() and not line.startswith('{"format"'))
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    """把迭代器按 size 个一组切分"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _mod_groups(entries: Iterable[Dict]) -> Iterator[Tuple[str, List[Dict]]]:
+    """把相邻的同一模组的条目分为一组"""
+    mod_name = None
+    group = []
+    for entry in entries:
+        if group and entry['mod'] != mod_name:
+            yield mod_name, group
+            group = []
+        mod_name = entry['mod']
+        group.append(entry)
+    if group:
+        yield mod_name, group
+
+
+def _export_mod(mod_name: str, zip_path: Path, mod_info: Dict, source_lang: Optional[str],
+                target_lang: str, full: bool, cancel_event: Optional[threading.Event]) -> Optional[List[Dict]]:
+    """导出一个模组的语言文件，已取消时返回None
+
+    full 为假时只导出目标语言中缺失或未翻译的键，为真时导出完整的源文件和现有的目标文件。
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+
+    languages = mod_info.get('languages', [])
+    source_lang = source_lang if source_lang in languages else preferred_source_language(languages)
+    if not source_lang:
+        raise ValueError("没有可用的源语言")
+
+    entries = []
+    for filename in get_locale_files(zip_path, source_lang):
+        if full:
+            source = load_locale_file(zip_path, source_lang, filename)
+            target = load_locale_file_optional(zip_path, target_lang, filename)
+            target_text = target.serialize() if target is not None else ''
+        else:
+            source = export_untranslated(zip_path, source_lang, target_lang, filename)
+            if source is None:
+                continue
+            target_text = ''
+        source_text = source.serialize()
+        entries.append({
+            'mod': mod_name,
+            'version': mod_info.get('version', ''),
+            'path': str(zip_path),
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'file': filename,
+            'keys': len(source),
+            'source': source_text,
+            'source_hash': content_hash(source_text),
+            'target': target_text,
+            'target_hash': content_hash(target_text)
+        })
+    return entries
+
+
+def export_bundle(mods: Dict[str, Tuple[Path, Dict]], bundle_path: Path, target_lang: str = 'zh-CN',
+                  source_lang: Optional[str] = None, full: bool = False, state: Optional[PipelineState] = None,
+                  workers: int = PIPELINE_WORKERS, progress: Optional[ProgressCallback] = None,
+                  cancel_event: Optional[threading.Event] = None) -> Dict[str, List]:
+    """把模组中需要翻译的键（full 时为完整的语言文件）导出到批量文件
+
+    state 中已完成的模组会被跳过，新结果追加到批量文件末尾；没有已完成的模组时重写批量文件。
+    每个模组完成时记录批量文件的长度和内容哈希，批量文件已不存在或内容与记录不符时清除进度，重新导出全部模组。
+    结果按完成顺序写入，每个模组的条目连续排列。
+    返回 {'exported': [...], 'skipped': [...], 'errors': [...]}。
+    """
+    done = state.completed(STAGE_EXPORT) if state else {}
+    digest = None
+    if done:
+        last = max(done.values(), key=lambda record: record.get('offset', 0))
+        offset = last.get('offset', 0)
+        if bundle_path.exists() and last.get('digest'):
+            digest = _prefix_digest(bundle_path, offset)
+        if digest is None or digest.hexdigest() != last['digest']:
+            # 批量文件已被删除、重新创建或改动，记录为已完成的模组不一定在其中，全部重新导出
+            logger.warning("批量文件与进度不符，重新导出全部模组: %s", bundle_path)
+            state.reset(STAGE_EXPORT)
+            done = {}
+    pending = {name: mod for name, mod in mods.items() if name not in done}
+    result = {'exported': [], 'skipped': sorted(name for name in mods if name in done), 'errors': []}
+    total = len(mods)
+    finished = len(mods) - len(pending)
+    if done and not pending:
+        # 全部已完成，批量文件保持不变
+        return result
+
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    if done:
+        # 截掉上次中断时已写入但未记录进度的条目，避免同一模组出现两次
+        bundle = open(bundle_path, 'r+', encoding='utf-8', newline='\n')
+        bundle.seek(offset)
+        bundle.truncate()
+        writer = _DigestWriter(bundle, offset, digest)
+    else:
+        bundle = open(bundle_path, 'w', encoding='utf-8', newline='\n')
+        writer = _DigestWriter(bundle)
+        write_bundle_header(writer)
+    with bundle, ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(_export_mod, name, path, info, source_lang, target_lang, full, cancel_event): name
+            for name, (path, info) in pending.items()
+        }
+        for future in as_completed(futures):
+            mod_name = futures[future]
+            finished += 1
+            try:
+                entries = future.result()
+            except Exception as e:
+                # 单个模组失败不影响其他模组，下次运行时会重试
+                logger.warning("导出失败 %s: %s", mod_name, e)
+                result['errors'].append({'mod': mod_name, 'error': str(e)})
+            else:
+                if entries is None:
+                    continue
+                for entry in entries:
+                    write_bundle_line(writer, entry)
+                # 先写入批量文件再记录进度（包括文件末尾位置和内容哈希，继续导出时从这里开始）
+                bundle.flush()
+                record = dict({'files': len(entries), 'keys': sum(entry['keys'] for entry in entries)},
+                              **writer.position())
+                if state:
+                    state.mark_done(STAGE_EXPORT, mod_name, record)
+                result['exported'].append(dict(record, mod=mod_name))
+            finally:
+                if progress:
+                    progress(finished, total, mod_name)
+    return result
+
+
+def _translate_window(entries: List[Dict], provider: TranslationProvider,
+                      cache: Optional[TranslationMemory], result: Dict):
+    """填写一段条目中尚未翻译的条目（原地修改）"""
+    pending: Dict[Tuple[str, str], List[Tuple[Dict, LocaleFile]]] = {}
+    for entry in entries:
+        if entry.get('target', '').strip():
+            result['kept'] += 1
+            continue
+        locale = parse_locale(entry['source'])
+        pending.setdefault((entry['source_lang'], entry['target_lang']), []).append((entry, locale))
+
+    for (source_lang, target_lang), items in pending.items():
+        # 翻译服务收到的是还原了换行的文本
+        texts = [decode_value(value) for _, locale in items for _, value in locale.items()]
+        translations, errors = translate_texts(provider, texts, source_lang, target_lang, cache)
+        result['errors'].extend(errors)
+        result['strings'] += len(set(filter(None, texts)))
+
+        for entry, locale in items:
+            missing = False
+            for (section, key), value in list(locale.items()):
+                text = decode_value(value)
+                if not text:
+                    continue
+                if text not in translations:
+                    missing = True
+                    break
+                locale.set(section, key, encode_value(translations[text]))
+            if missing:
+                # 缺少部分译文时整个条目保持未翻译，已翻译的文本在缓存中，重新运行时不会再次请求
+                result['failed'] += 1
+            else:
+                entry['target'] = locale.serialize()
+                result['translated'] += 1
+
+
+def translate_bundle(bundle_path: Path, provider: TranslationProvider, cache: Optional[TranslationMemory] = None,
+                     progress: Optional[ProgressCallback] = None, state: Optional[PipelineState] = None) -> Dict:
+    """用翻译服务填写批量文件中尚未翻译的条目（已填写的条目保持不变）
+
+    按 TRANSLATE_WINDOW 行一段读取和请求，结果写入临时文件后替换原批量文件。
+    state 中已导出模组的位置和哈希改为新文件中的值，之后继续导出时不会截断译文。
+    返回 {'translated', 'kept', 'failed', 'strings', 'errors'}。
+    """
+    total = count_bundle_entries(bundle_path)
+    result = {'translated': 0, 'kept': 0, 'failed': 0, 'strings': 0, 'errors': []}
+    temp_path = bundle_path.with_name(bundle_path.name + '.tmp')
+    # 模组 -> 新文件中该模组最后一个条目之后的位置和哈希
+    positions: Dict[str, Dict] = {}
+    try:
+        with open(temp_path, 'w', encoding='utf-8', newline='\n') as output:
+            writer = _DigestWriter(output)
+            write_bundle_header(writer)
+            finished = 0
+            for window in _chunked(read_bundle(bundle_path), TRANSLATE_WINDOW):
+                _translate_window(window, provider, cache, result)
+                for entry in window:
+                    write_bundle_line(writer, entry)
+                    positions[entry['mod']] = writer.position()
+                finished += len(window)
+                if progress:
+                    progress(finished, total, window[-1]['mod'])
+        os.replace(temp_path, bundle_path)
+        if state is not None:
+            state.update_records(STAGE_EXPORT, positions)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    return result
+
+
+def _import_mod(zip_path: Path, entries: List[Dict], target_lang: Optional[str],
+                scan_index: Optional[ScanIndex], text_index: Optional[LocaleTextIndex],
+                memory: Optional[TranslationMemory], dry_run: bool,
+                cancel_event: Optional[threading.Event], commit_options: Dict) -> Optional[Dict]:
+    """把一个模组的译文合并后写回ZIP，已取消时返回None
+
+    合并后与ZIP中内容相同的文件不写入，所有文件都相同时不重写ZIP。
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    if not zip_path.exists():
+        raise FileNotFoundError(f"模组文件不存在: {zip_path}")
+
+    changes = {}
+    sources = {}
+    unchanged = []
+    for entry in entries:
+        if 'source_hash' in entry and content_hash(entry['source']) != entry['source_hash']:
+            raise ValueError(f"{entry['file']} 的原文与记录的哈希不符，批量文件可能已损坏")
+        lang = target_lang or entry['target_lang']
+        # 按键合并到现有译文（或源文件模板）中
+        content = merge_translation(zip_path, lang, entry['file'], entry['target'], entry.get('source_lang'))
+        current = load_locale_file_optional(zip_path, lang, entry['file'])
+        if current is not None and current.serialize() == content:
+            unchanged.append(entry['file'])
+            continue
+        changes[(lang, entry['file'])] = content
+        sources[(lang, entry['file'])] = entry.get('source_lang')
+
+    record = {'path': str(zip_path), 'files': sorted(filename for _, filename in changes),
+              'unchanged': sorted(unchanged), 'backup': None}
+    if dry_run or not changes:
+        return record
+
+    if memory is not None:
+        for (lang, filename), content in changes.items():
+            source_lang = sources[(lang, filename)]
+            source = load_locale_file_optional(zip_path, source_lang, filename) if source_lang else None
+            if source is not None and source_lang != lang:
+                memory.record_locale(source_lang, lang, source, parse_locale(content))
+
+    backup_path, _ = commit_mod_changes(zip_path, changes, scan_index, text_index=text_index, **commit_options)
+    record['backup'] = str(backup_path) if backup_path else None
+    return record
+
+
+def import_bundle(bundle_path: Path, mods: Optional[Dict[str, Tuple[Path, Dict]]] = None,
+                  target_lang: Optional[str] = None, state: Optional[PipelineState] = None,
+                  scan_index: Optional[ScanIndex] = None, text_index: Optional[LocaleTextIndex] = None,
+                  memory: Optional[TranslationMemory] = None, dry_run: bool = False,
+                  workers: int = PIPELINE_WORKERS, progress: Optional[ProgressCallback] = None,
+                  cancel_event: Optional[threading.Event] = None, **commit_options) -> Dict:
+    """导入批量文件中已翻译的条目，按模组合并后提交
+
+    边读取边提交，同时排队的模组数有上限，内存占用与批量文件大小无关。
+    mods 为当前扫描结果（模组名称 -> (路径, 信息)），模组升级后文件名变化时按名称找到新文件；
+    不在其中的模组使用批量文件中记录的路径。target_lang 为空时使用每个条目的目标语言。
+    commit_options 传给 commit_mod_changes（backup、keep_backups 等）。
+    progress 按条目数报告进度。
+    返回 {'committed': [...], 'unchanged': [...], 'skipped': [...],
+          'untranslated': 未填写译文的条目数, 'unchanged_files': 译文未修改的条目数, 'errors': [...]}。
+    """
+    total = count_bundle_entries(bundle_path)
+    done = state.completed(STAGE_IMPORT) if state and not dry_run else {}
+    result = {'committed': [], 'unchanged': [], 'skipped': [], 'untranslated': 0, 'unchanged_files': 0,
+              'errors': []}
+    workers = max(1, workers)
+    finished = 0
+    seen = set()
+    running = {}
+
+    def collect(future):
+        nonlocal finished
+        mod_name, count = running.pop(future)
+        finished += count
+        try:
+            record = future.result()
+        except Exception as e:
+            # 失败的模组不记录进度，下次运行时会重试
+            logger.warning("导入失败 %s: %s", mod_name, e)
+            result['errors'].append({'mod': mod_name, 'error': str(e)})
+        else:
+            if record is not None:
+                if state and not dry_run:
+                    state.mark_done(STAGE_IMPORT, mod_name, record)
+                key = 'committed' if record['files'] else 'unchanged'
+                result[key].append(dict(record, mod=mod_name))
+        if progress:
+            progress(finished, total, mod_name)
+
+    def drain(limit: int):
+        while len(running) > limit:
+            completed, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in completed:
+                collect(future)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for mod_name, group in _mod_groups(read_bundle(bundle_path)):
+            files = {}
+            if mod_name in seen:
+                result['errors'].append({'mod': mod_name, 'error': "批量文件中该模组的条目不连续，只处理了第一组"})
+            elif mod_name in done:
+                result['skipped'].append(mod_name)
+            else:
+                for entry in group:
+                    target = entry.get('target', '')
+                    if not target.strip():
+                        result['untranslated'] += 1
+                    elif entry.get('target_hash') == content_hash(target):
+                        # 导出后未修改的译文
+                        result['unchanged_files'] += 1
+                    else:
+                        # 同一文件出现多次时以最后一条为准
+                        files[entry['file']] = entry
+            seen.add(mod_name)
+
+            if not files:
+                finished += len(group)
+                if progress:
+                    progress(finished, total, mod_name)
+                continue
+
+            entries = list(files.values())
+            zip_path = mods[mod_name][0] if mods and mod_name in mods else Path(entries[0]['path'])
+            future = executor.submit(_import_mod, zip_path, entries, target_lang, scan_index, text_index,
+                                     memory, dry_run, cancel_event, commit_options)
+            running[future] = (mod_name, len(group))
+            drain(workers * 2 - 1)
+        drain(0)
+
+    if scan_index:
+        scan_index.save()
+    return result
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 语言文本全文索引
+Factorio Mod Localization Tool - Locale Text Index
+
+把所有已扫描模组的语言文件中的 键 和 值 保存到缓存目录的SQLite数据库中，
+查询"哪些模组/文件/键包含某段文本"时不需要打开任何ZIP。
+以 路径 + 文件大小 + 修改时间 判断模组是否需要重新索引，和扫描索引一致。
+
+SQLite 支持 FTS5 三字母组分词时使用全文索引（任意子串、不区分大小写），
+否则退回到普通表上的 LIKE 查询。
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 搜索结果的默认最大条数
+SEARCH_LIMIT = 200
+
+# (语言, 文件名, 分类, 键, 值)
+LocaleString = Tuple[str, str, str, str, str]
+
+
+def _fts5_trigram_available(conn: sqlite3.Connection) -> bool:
+    """检查SQLite是否支持 FTS5 三字母组分词（SQLite 3.34+）"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(text, tokenize='trigram')")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _like_pattern(text: str) -> str:
+    """转义 LIKE 通配符"""
+    return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+class LocaleTextIndex:
+    """基于SQLite的语言文本索引（线程安全）"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.use_fts = _fts5_trigram_available(self.conn)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS archives (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS strings (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    lang TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    section TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS strings_path ON strings (path)")
+            if self.use_fts:
+                self.conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS strings_fts
+                    USING fts5(key, value, tokenize='trigram')
+                """)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM strings").fetchone()[0]
+
+    def is_current(self, zip_path: Path, stat_result: os.stat_result) -> bool:
+        """模组自上次索引后是否未变化"""
+        with self.lock:
+            row = self.conn.execute("SELECT size, mtime_ns FROM archives WHERE path = ?",
+                                    (str(zip_path),)).fetchone()
+        return row == (stat_result.st_size, stat_result.st_mtime_ns)
+
+    def store(self, zip_path: Path, stat_result: os.stat_result, strings: Iterable[LocaleString]):
+        """替换一个模组的全部文本"""
+        path = str(zip_path)
+        rows = [(path,) + tuple(row) for row in strings]
+        with self.lock, self.conn:
+            self._delete(path)
+            self.conn.execute("INSERT INTO archives VALUES (?, ?, ?)",
+                              (path, stat_result.st_size, stat_result.st_mtime_ns))
+            self.conn.executemany(
+                "INSERT INTO strings (path, lang, filename, section, key, value) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            if self.use_fts and rows:
+                self.conn.execute("""
+                    INSERT INTO strings_fts (rowid, key, value)
+                    SELECT id, CASE section WHEN '' THEN key ELSE section || '.' || key END, value
+                    FROM strings WHERE path = ?
+                """, (path,))
+
+    def remove(self, zip_path: Path):
+        """删除一个模组的文本"""
+        with self.lock, self.conn:
+            self._delete(str(zip_path))
+
+    def _delete(self, path: str):
+        if self.use_fts:
+            self.conn.execute("DELETE FROM strings_fts WHERE rowid IN (SELECT id FROM strings WHERE path = ?)", (path,))
+        self.conn.execute("DELETE FROM strings WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM archives WHERE path = ?", (path,))
+
+    def prune(self, directory: Path, existing_paths):
+        """删除指定目录下已不存在的文件的文本"""
+        existing = set(existing_paths)
+        with self.lock:
+            stale = [path for (path,) in self.conn.execute("SELECT path FROM archives")
+                     if Path(path).parent == directory and path not in existing]
+        for path in stale:
+            self.remove(Path(path))
+
+    def clear(self):
+        """清空索引"""
+        with self.lock, self.conn:
+            if self.use_fts:
+                self.conn.execute("DELETE FROM strings_fts")
+            self.conn.execute("DELETE FROM strings")
+            self.conn.execute("DELETE FROM archives")
+
+    def search(self, text: str, language: Optional[str] = None, paths: Optional[List[str]] = None,
+               limit: int = SEARCH_LIMIT) -> List[Dict[str, str]]:
+        """查找键（分类.键）或值包含 text 的文本（不区分大小写）
+
+        language 限定语言，paths 限定模组路径。
+        """
+        text = text.strip()
+        if not text:
+            return []
+
+        conditions = []
+        params: List = []
+        if self.use_fts and len(text) >= 3:
+            # 三字母组索引只能匹配至少3个字符的子串，更短的查询退回 LIKE
+            conditions.append("s.id IN (SELECT rowid FROM strings_fts WHERE strings_fts MATCH ?)")
+            params.append('"' + text.replace('"', '""') + '"')
+        else:
+            conditions.append("(s.section || '.' || s.key LIKE ? ESCAPE '\\' OR s.value LIKE ? ESCAPE '\\')")
+            params.extend([_like_pattern(text)] * 2)
+        if language:
+            conditions.append("s.lang = ?")
+            params.append(language)
+        if paths is not None:
+            conditions.append(f"s.path IN ({','.join('?' * len(paths))})")
+            params.extend(paths)
+
+        sql = (f"SELECT s.path, s.lang, s.filename, s.section, s.key, s.value FROM strings s "
+               f"WHERE {' AND '.join(conditions)} ORDER BY s.id LIMIT ?")
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [
+            {'path': path, 'lang': lang, 'filename': filename, 'section': section, 'key': key, 'value': value}
+            for path, lang, filename, section, key, value in rows
+        ]
+
+    def summary(self) -> Dict[str, int]:
+        """已索引的模组数和文本条数"""
+        with self.lock:
+            archives = self.conn.execute("SELECT COUNT(*) FROM archives").fetchone()[0]
+            strings = self.conn.execute("SELECT COUNT(*) FROM strings").fetchone()[0]
+        return {'archives': archives, 'strings': strings}
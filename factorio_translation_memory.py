@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 翻译记忆库
+Factorio Mod Localization Tool - Translation Memory
+
+记录 原文 -> 译文 对，供不同模组、不同版本之间复用。
+数据保存在缓存目录的SQLite数据库中，按原文哈希建立索引，
+几十万条记录也不需要整体加载到内存。
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from factorio_locale import LocaleFile, encode_value
+
+# 每条SQL语句中 IN (...) 的最大参数数量
+LOOKUP_BATCH_SIZE = 500
+
+_FUZZY_STRIP = re.compile(r'[\W_]+')
+
+
+def text_hash(text: str) -> int:
+    """计算文本的64位哈希（有符号，可直接存入SQLite INTEGER）"""
+    digest = hashlib.blake2b(text.encode('utf-8', errors='surrogateescape'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+def fuzzy_key(text: str) -> str:
+    """近似匹配使用的规范化文本：忽略大小写、空白和标点"""
+    return _FUZZY_STRIP.sub(' ', text.lower()).strip()
+
+
+class TranslationMemory:
+    """基于SQLite的翻译记忆库（线程安全）"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory (
+                    source_lang TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    source_hash INTEGER NOT NULL,
+                    fuzzy_hash INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (source_lang, target_lang, source_hash)
+                )
+            """)
+            self.conn.execute("""
+                CREATE INDEX IF NOT EXISTS memory_fuzzy
+                ON memory (source_lang, target_lang, fuzzy_hash)
+            """)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+
+    def record_pairs(self, source_lang: str, target_lang: str, pairs: Iterable[Tuple[str, str]]) -> int:
+        """记录 (原文, 译文) 对，跳过空译文和与原文相同的译文，返回记录数"""
+        now = time.time()
+        rows = [
+            (source_lang, target_lang, text_hash(source), text_hash(fuzzy_key(source)), source, target, now)
+            for source, target in pairs
+            if source and target and source != target
+        ]
+        if not rows:
+            return 0
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO memory VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def record_locale(self, source_lang: str, target_lang: str, source: LocaleFile, target: LocaleFile) -> int:
+        """按键配对记录两个语言文件中的译文"""
+        source_values = source.to_dict()
+        pairs = [
+            (source_values[locale_key], value)
+            for locale_key, value in target.items()
+            if locale_key in source_values
+        ]
+        return self.record_pairs(source_lang, target_lang, pairs)
+
+    def lookup(self, source_lang: str, target_lang: str, texts: Iterable[str],
+               fuzzy: bool = False) -> Dict[str, Tuple[str, bool]]:
+        """批量查找译文，返回 {原文: (译文, 是否精确匹配)}"""
+        texts = list(dict.fromkeys(text for text in texts if text))
+        result = {}
+
+        by_hash = {text_hash(text): text for text in texts}
+        for source, target in self._select('source_hash', source_lang, target_lang, list(by_hash)):
+            # 哈希相同时再比较原文，避免哈希冲突
+            if by_hash.get(text_hash(source)) == source:
+                result[source] = (target, True)
+
+        if fuzzy:
+            by_fuzzy: Dict[int, List[str]] = {}
+            for text in texts:
+                if text not in result and fuzzy_key(text):
+                    by_fuzzy.setdefault(text_hash(fuzzy_key(text)), []).append(text)
+            for source, target in self._select('fuzzy_hash', source_lang, target_lang, list(by_fuzzy), latest_only=True):
+                for text in by_fuzzy.get(text_hash(fuzzy_key(source)), []):
+                    if text not in result and fuzzy_key(text) == fuzzy_key(source):
+                        result[text] = (target, False)
+        return result
+
+    def _select(self, column: str, source_lang: str, target_lang: str, hashes: List[int],
+                latest_only: bool = False) -> List[Tuple[str, str]]:
+        """按哈希列批量查询 (原文, 译文)；latest_only 时每个哈希只取最近的一条"""
+        if latest_only:
+            # SQLite 中与 MAX() 一起查询的其他列取自最大值所在的行
+            sql = (f"SELECT source, target, MAX(updated) FROM memory WHERE source_lang = ? AND target_lang = ? "
+                   f"AND {column} IN ({{}}) GROUP BY {column}")
+        else:
+            sql = (f"SELECT source, target, updated FROM memory WHERE source_lang = ? AND target_lang = ? "
+                   f"AND {column} IN ({{}})")
+        rows = []
+        with self.lock:
+            for start in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+                batch = hashes[start:start + LOOKUP_BATCH_SIZE]
+                rows.extend(self.conn.execute(sql.format(','.join('?' * len(batch))),
+                                              [source_lang, target_lang] + batch).fetchall())
+        return [(source, target) for source, target, _ in rows]
+
+    def prefill(self, source_lang: str, target_lang: str, source: LocaleFile,
+                base: Optional[LocaleFile] = None, fuzzy: bool = False) -> Tuple[LocaleFile, int, int]:
+        """用记忆库中的译文预填语言文件
+
+        以 base（默认为源文件）为模板，只替换值仍与原文相同的键。
+        返回 (预填后的文件, 精确匹配数, 近似匹配数)。
+        """
+        result = (base if base is not None else source).copy()
+        current = result.to_dict()
+        candidates = [
+            (locale_key, value) for locale_key, value in source.items()
+            if current.get(locale_key, value) == value
+        ]
+        matches = self.lookup(source_lang, target_lang, (value for _, value in candidates), fuzzy)
+
+        exact_count = 0
+        fuzzy_count = 0
+        filled = []
+        for locale_key, value in candidates:
+            match = matches.get(value)
+            if match is None:
+                continue
+            target, exact = match
+            # 翻译服务缓存的译文是还原了换行的文本
+            filled.append((locale_key, encode_value(target)))
+            if exact:
+                exact_count += 1
+            else:
+                fuzzy_count += 1
+        result.update(filled)
+        return result, exact_count, fuzzy_count
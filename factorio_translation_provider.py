@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 翻译服务接口
+Factorio Mod Localization Tool - Translation Providers
+
+批量流程通过 TranslationProvider 调用翻译服务：文本去重、查缓存后分批请求，
+用 asyncio 并发发送，并限制每秒请求数；每批的结果立即写入翻译缓存，
+中断后重新运行不会重复请求已翻译的文本。
+
+内置 mock 服务在本地生成确定的译文，不联网，用于测试和性能测量。
+其他服务以 "模块:类名" 的形式加载，类需继承 TranslationProvider 并实现 translate_batch。
+"""
+
+import asyncio
+import importlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from factorio_logging import get_logger
+from factorio_translation_memory import TranslationMemory
+
+logger = get_logger('translation')
+
+# 单个批次失败后的重试次数和首次重试前的等待时间(秒)，之后每次加倍
+TRANSLATE_RETRIES = 2
+RETRY_DELAY = 1.0
+
+
+class TranslationProvider:
+    """翻译服务接口
+
+    子类实现 translate_batch（按顺序返回与输入一一对应的译文）。
+    batch_size、concurrency、requests_per_second 可由子类覆盖，也可以通过选项指定。
+    """
+
+    name = 'base'
+    batch_size = 50
+    concurrency = 4
+    requests_per_second = 0.0  # 0 为不限制
+
+    def __init__(self, **options):
+        for option in ('batch_size', 'concurrency', 'requests_per_second'):
+            if option in options:
+                setattr(self, option, type(getattr(self, option))(options.pop(option)))
+        self.options = options
+
+    async def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """翻译一批文本"""
+        raise NotImplementedError
+
+    async def close(self):
+        """释放连接等资源（每次 translate_texts 结束时调用）"""
+
+
+class MockTranslationProvider(TranslationProvider):
+    """本地模拟翻译：结果确定，不联网
+
+    译文为 "[目标语言] 原文"；latency 选项模拟每个请求的耗时(秒)。
+    """
+
+    name = 'mock'
+
+    def __init__(self, latency: float = 0.0, **options):
+        super().__init__(**options)
+        self.latency = float(latency)
+        self.requests = 0
+
+    async def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [f"[{target_lang}] {text}" for text in texts]
+
+
+PROVIDERS = {
+    MockTranslationProvider.name: MockTranslationProvider,
+}
+
+
+def load_provider(spec: str, **options) -> TranslationProvider:
+    """按名称（内置服务）或 "模块:类名" 创建翻译服务"""
+    provider_class = PROVIDERS.get(spec)
+    if provider_class is None:
+        module_name, sep, class_name = spec.partition(':')
+        if not sep:
+            raise ValueError(f"未知的翻译服务: {spec}（内置: {', '.join(PROVIDERS)}，或使用 模块:类名）")
+        provider_class = getattr(importlib.import_module(module_name), class_name)
+        if not (isinstance(provider_class, type) and issubclass(provider_class, TranslationProvider)):
+            raise TypeError(f"{spec} 不是 TranslationProvider 的子类")
+    return provider_class(**options)
+
+
+class RateLimiter:
+    """限制请求频率：相邻两个请求的开始时间至少间隔 1 / rate 秒"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_time = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = asyncio.get_event_loop().time()
+        start = max(now, self.next_time)
+        # 事件循环是单线程的，读取和更新之间没有 await，不需要加锁
+        self.next_time = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+async def _request(provider: TranslationProvider, batch: List[str], source_lang: str, target_lang: str,
+                   limiter: RateLimiter, retries: int) -> List[str]:
+    """发送一个批次，失败时按指数退避重试"""
+    for attempt in range(retries + 1):
+        await limiter.wait()
+        try:
+            translated = await provider.translate_batch(batch, source_lang, target_lang)
+            if len(translated) != len(batch):
+                raise ValueError(f"翻译服务返回了 {len(translated)} 条结果，应为 {len(batch)} 条")
+            return translated
+        except Exception as e:
+            if attempt == retries:
+                raise
+            logger.info("翻译请求失败，%.1f 秒后重试: %s", RETRY_DELAY * 2 ** attempt, e)
+            await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+    return []
+
+
+async def _translate_pending(provider: TranslationProvider, texts: List[str], source_lang: str, target_lang: str,
+                             cache: Optional[TranslationMemory], progress: Optional[Callable[[int, int], None]],
+                             retries: int) -> Tuple[Dict[str, str], List[str]]:
+    batch_size = max(1, provider.batch_size)
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    semaphore = asyncio.Semaphore(max(1, provider.concurrency))
+    limiter = RateLimiter(provider.requests_per_second)
+    result = {}
+    errors = []
+    done = 0
+
+    async def run(batch: List[str]):
+        nonlocal done
+        async with semaphore:
+            try:
+                translated = await _request(provider, batch, source_lang, target_lang, limiter, retries)
+            except Exception as e:
+                # 一个批次失败不影响其他批次，未翻译的文本由调用方处理
+                logger.warning("翻译批次失败（%d 条）: %s", len(batch), e)
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+        pairs = list(zip(batch, translated))
+        result.update(pairs)
+        if cache is not None:
+            cache.record_pairs(source_lang, target_lang, pairs)
+        done += len(batch)
+        if progress:
+            progress(done, len(texts))
+
+    try:
+        await asyncio.gather(*(run(batch) for batch in batches))
+    finally:
+        await provider.close()
+    return result, errors
+
+
+def translate_texts(provider: TranslationProvider, texts: Iterable[str], source_lang: str, target_lang: str,
+                    cache: Optional[TranslationMemory] = None,
+                    progress: Optional[Callable[[int, int], None]] = None,
+                    retries: int = TRANSLATE_RETRIES) -> Tuple[Dict[str, str], List[str]]:
+    """批量翻译文本，返回 ({原文: 译文}, 错误信息列表)
+
+    先从 cache 中取出已翻译的文本，其余分批请求；失败的批次不在结果中。
+    progress(已请求的文本数, 需要请求的文本数) 在事件循环中调用。
+    """
+    unique = list(dict.fromkeys(text for text in texts if text))
+    result = {}
+    if cache is not None:
+        result.update((source, target) for source, (target, _) in cache.lookup(source_lang, target_lang, unique).items())
+
+    pending = [text for text in unique if text not in result]
+    errors = []
+    if pending:
+        translated, errors = asyncio.run(_translate_pending(provider, pending, source_lang, target_lang,
+                                                            cache, progress, retries))
+        result.update(translated)
+    return result, errors
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异星工厂模组汉化工具 - 模组目录监视
+Factorio Mod Localization Tool - Directory Watcher
+
+在后台线程中监视模组目录，发现新增、删除或修改的模组文件(.zip)和备份文件(.backup)后
+只报告这些文件，调用方只需重新分析它们，不必重新扫描整个目录。
+
+变化通过比较前后两次目录快照（文件大小和修改时间）得出，只用标准库即可工作（定时轮询）。
+安装了 watchdog 时使用系统的文件通知（inotify、ReadDirectoryChangesW 等）及时唤醒检查，
+轮询只作为兜底。
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from factorio_logging import get_logger
+from factorio_mod_core import parse_backup_name
+
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+logger = get_logger('watcher')
+
+# 轮询间隔(秒)：没有 watchdog 时较短；有 watchdog 时只用于兜底
+WATCH_POLL_INTERVAL = 2.0
+WATCH_FALLBACK_INTERVAL = 30.0
+
+# 收到通知后等待多久再检查（合并同一次写入产生的多个事件）
+WATCH_SETTLE_DELAY = 0.5
+
+FileState = Tuple[int, int]  # (大小, 修改时间ns)
+FileChanges = Dict[str, List[str]]  # {'added': [...], 'removed': [...], 'modified': [...]}
+
+
+def is_mod_file_name(name: str) -> bool:
+    """是否为模组文件或备份文件（与 find_mod_files 的规则一致）"""
+    return name.endswith('.zip') or (name.endswith('.backup') and parse_backup_name(Path(name)) is not None)
+
+
+def snapshot_mod_files(mods_path: Path) -> Dict[str, FileState]:
+    """记录目录中所有模组和备份文件的大小和修改时间"""
+    files = {}
+    with os.scandir(mods_path) as entries:
+        for entry in entries:
+            if not is_mod_file_name(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat_result = entry.stat()
+            except OSError:
+                # 文件在列出后被删除
+                continue
+            files[str(mods_path / entry.name)] = (stat_result.st_size, stat_result.st_mtime_ns)
+    return files
+
+
+def diff_snapshots(old: Dict[str, FileState], new: Dict[str, FileState]) -> FileChanges:
+    """比较两次快照"""
+    return {
+        'added': sorted(path for path in new if path not in old),
+        'removed': sorted(path for path in old if path not in new),
+        'modified': sorted(path for path, state in new.items() if path in old and old[path] != state)
+    }
+
+
+class _WakeHandler:
+    """watchdog 事件处理：任何事件都只唤醒检查线程，变化仍由快照比较得出"""
+
+    def __init__(self, wake_event: threading.Event):
+        self.wake_event = wake_event
+
+    def dispatch(self, event):
+        self.wake_event.set()
+
+
+class ModDirectoryWatcher:
+    """监视模组目录，有变化时在后台线程中调用 callback(changes)
+
+    启动时记录的快照作为基准，之后的每次变化只报告一次。
+    """
+
+    def __init__(self, mods_path: Path, callback: Callable[[FileChanges], None],
+                 interval: Optional[float] = None, use_notifications: bool = True):
+        self.mods_path = mods_path
+        self.callback = callback
+        self.snapshot: Dict[str, FileState] = {}
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+        self.observer = None
+        if use_notifications and Observer is not None:
+            try:
+                self.observer = Observer()
+                self.observer.schedule(_WakeHandler(self.wake_event), str(mods_path))
+            except Exception as e:
+                logger.warning("无法使用文件通知，改为轮询: %s", e)
+                self.observer = None
+        if interval is None:
+            interval = WATCH_FALLBACK_INTERVAL if self.observer is not None else WATCH_POLL_INTERVAL
+        self.interval = interval
+
+    @property
+    def mode(self) -> str:
+        return "文件通知" if self.observer is not None else "轮询"
+
+    def start(self):
+        """记录基准快照并开始监视"""
+        self.snapshot = snapshot_mod_files(self.mods_path)
+        if self.observer is not None:
+            self.observer.start()
+        self.thread = threading.Thread(target=self._run, name='ModDirectoryWatcher', daemon=True)
+        self.thread.start()
+        logger.info("开始监视模组目录（%s）: %s", self.mode, self.mods_path)
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止监视；指定 timeout 时最多等待这么久，让正在进行的回调结束"""
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.observer is not None:
+            self.observer.stop()
+        if timeout is not None and self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def check_now(self):
+        """立即检查一次（例如程序自己修改了文件之后）"""
+        self.wake_event.set()
+
+    def check(self) -> FileChanges:
+        """比较当前目录与上次的快照，有变化时调用回调"""
+        try:
+            snapshot = snapshot_mod_files(self.mods_path)
+        except OSError as e:
+            logger.warning("读取模组目录失败: %s", e)
+            return diff_snapshots(self.snapshot, self.snapshot)
+        changes = diff_snapshots(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        if any(changes.values()):
+            logger.info("模组目录变化: 新增 %d, 删除 %d, 修改 %d",
+                        len(changes['added']), len(changes['removed']), len(changes['modified']))
+            try:
+                self.callback(changes)
+            except Exception:
+                logger.exception("处理模组目录变化失败")
+        return changes
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            if self.wake_event.wait(self.interval):
+                # 等待文件写完，同一批事件只检查一次
+                self.stop_event.wait(WATCH_SETTLE_DELAY)
+                self.wake_event.clear()
+            if self.stop_event.is_set():
+                break
+            self.check()
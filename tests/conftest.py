@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试共用的辅助函数：让测试可以导入仓库根目录下的模块，并生成模拟的模组ZIP"""
+
+import json
+import sys
+import zipfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def make_mod(directory: Path, name: str, version: str = '1.0.0',
+             locales: Optional[Dict[str, Dict[str, bytes]]] = None,
+             assets: Optional[Dict[str, bytes]] = None) -> Path:
+    """生成一个模组ZIP：info.json、locale/<语言>/<文件> 和其他资源文件"""
+    root = f"{name}_{version}"
+    zip_path = directory / f"{root}.zip"
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"{root}/info.json", json.dumps({'name': name, 'version': version, 'title': name.title()}))
+        for path, data in (assets or {}).items():
+            zf.writestr(f"{root}/{path}", data)
+        for language, files in (locales or {}).items():
+            for filename, data in files.items():
+                zf.writestr(f"{root}/locale/{language}/{filename}", data)
+    return zip_path
+
+
+@pytest.fixture
+def mods_dir(tmp_path: Path) -> Path:
+    directory = tmp_path / 'mods'
+    directory.mkdir()
+    return directory
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""语言文件解析：逐字节往返、批量插入和换行检查"""
+
+import pytest
+
+from factorio_locale import ROOT_SECTION, encode_value, merge_locale, parse_locale, parse_locale_bytes
+
+
+@pytest.mark.parametrize('data', [
+    b'[item-name]\niron-plate=Iron plate\n',
+    b'\xef\xbb\xbf; comment\r\n[item-name]\r\niron-plate=Iron plate\r\n',
+    b'\xef\xbb\xbfroot=value\n[a]\nx=1',
+    b'# hash comment\n\n[a]\nx=1\r\n\n[b]\ny=2\n[a]\nz=3\n',
+    b'[a]\nbroken=\xff\xfe latin-1 \xe9\n',
+    b'[a]\nmulti=line1\\nline2\nstray=a\rb\n',
+    b'',
+])
+def test_round_trip_is_byte_exact(data):
+    assert parse_locale_bytes(data).to_bytes() == data
+
+
+def test_parse_keys_and_sections():
+    locale = parse_locale('\ufeffroot=1\n; c\n[a]\nx=1\ndup=old\n[b]\ny = 2\n[a]\ndup=new\n')
+    assert locale.to_dict() == {
+        (ROOT_SECTION, 'root'): '1', ('a', 'x'): '1', ('a', 'dup'): 'new', ('b', 'y'): ' 2',
+    }
+
+
+def test_update_inserts_into_existing_and_new_sections():
+    locale = parse_locale('; header\r\n[a]\r\nx=1\r\n\r\n[b]\r\ny=2')
+    locale.update([(('a', 'n'), 'N'), (('b', 'm'), 'M'), (('c', 'q'), 'Q'), (('a', 'x'), 'X')])
+    assert locale.serialize() == '; header\r\n[a]\r\nx=X\r\nn=N\r\n\r\n[b]\r\ny=2\r\nm=M\r\n\r\n[c]\r\nq=Q\r\n'
+    assert parse_locale(locale.serialize()).to_dict() == locale.to_dict()
+
+
+def test_update_inserts_root_keys_after_header_comments():
+    locale = parse_locale('; header\n; more\n\n[a]\nx=1\n')
+    locale.set(ROOT_SECTION, 'r', 'v')
+    assert locale.serialize() == '; header\n; more\n\nr=v\n[a]\nx=1\n'
+    assert locale.get(ROOT_SECTION, 'r') == 'v'
+
+
+def test_update_keeps_bom_at_start_of_file():
+    locale = parse_locale('\ufeff[a]\nx=1\n')
+    locale.set(ROOT_SECTION, 'r', 'v')
+    assert locale.serialize() == '\ufeffr=v\n[a]\nx=1\n'
+    assert parse_locale(locale.serialize()).to_dict() == locale.to_dict()
+
+
+def test_update_rejects_line_feed_without_changing_the_file():
+    locale = parse_locale('[s]\na=1\n')
+    with pytest.raises(ValueError):
+        locale.update([(('s', 'a'), '2'), (('s', 'b'), 'line1\nc=injected')])
+    assert locale.serialize() == '[s]\na=1\n'
+
+    locale.set('s', 'a', encode_value('line1\r\nc=injected'))
+    assert locale.to_dict() == {('s', 'a'): 'line1\\nc=injected'}
+
+
+def test_merge_accepts_parsed_values_with_carriage_return():
+    merged = merge_locale(parse_locale('[s]\nk=x\n'), parse_locale('[s]\nk=a\rb\nn=c\n'))
+    assert merged.serialize() == '[s]\nk=a\rb\nn=c\n'
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""批量流程：导出的继续、翻译后再次导出"""
+
+import json
+
+from conftest import make_mod
+from factorio_mod_core import scan_directory
+from factorio_pipeline import (
+    STAGE_EXPORT, PipelineState, default_state_path, export_bundle, missing_language_mods, read_bundle,
+    translate_bundle
+)
+from factorio_translation_provider import load_provider
+
+
+def collection(mods_dir, count=3):
+    for i in range(count):
+        make_mod(mods_dir, f"mod-{i}", locales={'en': {
+            'strings.cfg': f"[item-name]\nplate-{i}=Plate {i}\ngear-{i}=Gear {i}\n".encode('utf-8'),
+        }})
+    return missing_language_mods(scan_directory(mods_dir), 'zh-CN')
+
+
+def load_state(bundle_path):
+    return PipelineState(default_state_path(bundle_path), bundle_path)
+
+
+def bundle_lines(bundle_path):
+    with open(bundle_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_export_translate_export_keeps_translations(mods_dir, tmp_path):
+    mods = collection(mods_dir)
+    bundle_path = tmp_path / 'bundle.jsonl'
+
+    result = export_bundle(mods, bundle_path, state=load_state(bundle_path))
+    assert len(result['exported']) == 3
+    translate_bundle(bundle_path, load_provider('mock'), state=load_state(bundle_path))
+    translated = bundle_path.read_bytes()
+    assert all(entry['target'] for entry in read_bundle(bundle_path))
+
+    result = export_bundle(mods, bundle_path, state=load_state(bundle_path))
+    assert result['exported'] == []
+    assert len(result['skipped']) == 3
+    assert bundle_path.read_bytes() == translated
+
+
+def test_resume_after_translate_only_exports_missing_mods(mods_dir, tmp_path):
+    mods = collection(mods_dir)
+    bundle_path = tmp_path / 'bundle.jsonl'
+    first = dict(list(mods.items())[:2])
+
+    export_bundle(first, bundle_path, state=load_state(bundle_path))
+    translate_bundle(bundle_path, load_provider('mock'), state=load_state(bundle_path))
+    result = export_bundle(mods, bundle_path, state=load_state(bundle_path))
+
+    assert [item['mod'] for item in result['exported']] == ['mod-2']
+    entries = bundle_lines(bundle_path)[1:]
+    assert [entry['mod'] for entry in entries] == ['mod-0', 'mod-1', 'mod-2']
+    assert [bool(entry['target']) for entry in entries] == [True, True, False]
+
+
+def test_resume_truncates_unrecorded_entries(mods_dir, tmp_path):
+    mods = collection(mods_dir)
+    bundle_path = tmp_path / 'bundle.jsonl'
+    export_bundle(dict(list(mods.items())[:1]), bundle_path, state=load_state(bundle_path))
+    expected_prefix = bundle_path.read_bytes()
+    # 模拟中断：条目已写入但进度未记录
+    with open(bundle_path, 'a', encoding='utf-8') as f:
+        f.write('{"mod": "half-written"')
+
+    export_bundle(mods, bundle_path, state=load_state(bundle_path))
+    data = bundle_path.read_bytes()
+    assert data.startswith(expected_prefix)
+    # 新模组按完成顺序追加
+    entries = bundle_lines(bundle_path)[1:]
+    assert entries[0]['mod'] == 'mod-0'
+    assert sorted(entry['mod'] for entry in entries) == ['mod-0', 'mod-1', 'mod-2']
+
+
+def test_changed_or_missing_bundle_restarts_export(mods_dir, tmp_path):
+    mods = collection(mods_dir)
+    bundle_path = tmp_path / 'bundle.jsonl'
+    export_bundle(mods, bundle_path, state=load_state(bundle_path))
+    original = bundle_path.read_bytes()
+
+    # 文件被其他程序改写（长度不变）
+    bundle_path.write_bytes(original.replace(b'Plate 0', b'Plate X'))
+    result = export_bundle(mods, bundle_path, state=load_state(bundle_path))
+    assert len(result['exported']) == 3
+    assert len(bundle_lines(bundle_path)) == 4
+
+    bundle_path.unlink()
+    result = export_bundle(mods, bundle_path, state=load_state(bundle_path))
+    assert len(result['exported']) == 3
+    assert load_state(bundle_path).completed(STAGE_EXPORT).keys() == {'mod-0', 'mod-1', 'mod-2'}
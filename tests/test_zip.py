@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""ZIP重写和备份：原样复制的条目、增量/完整备份链的还原"""
+
+import os
+import zipfile
+
+from conftest import make_mod
+from factorio_mod_core import (
+    BACKUP_MODE_DELTA, BACKUP_MODE_FULL, RawZipWriter, commit_mod_changes, is_delta_backup, list_backups,
+    read_locale_file, restore_backup, rewrite_zip_entries
+)
+
+LOCALES = {
+    'en': {'strings.cfg': b'[item-name]\niron-plate=Iron plate\n', 'extra.cfg': b'[a]\nb=c\n'},
+}
+ASSETS = {'graphics/icon.png': os.urandom(4096), 'data.lua': b'-- data\n' * 200, 'empty.txt': b''}
+
+
+def read_all(zip_path):
+    with zipfile.ZipFile(zip_path) as zf:
+        return {info.filename: zf.read(info) for info in zf.infolist()}
+
+
+def test_raw_zip_writer_output_passes_testzip(mods_dir, tmp_path):
+    source = make_mod(mods_dir, 'raw', locales=LOCALES, assets=ASSETS)
+    target = tmp_path / 'out.zip'
+    with zipfile.ZipFile(source, 'a') as zf:
+        zf.comment = b'kept comment'
+    replacements = {'raw_1.0.0/locale/en/strings.cfg': b'[item-name]\niron-plate=Eisenplatte\n',
+                    'raw_1.0.0/locale/de/strings.cfg': b'[item-name]\niron-plate=Eisenplatte\n'}
+
+    assert rewrite_zip_entries(source, target, replacements) is True
+
+    with zipfile.ZipFile(target) as zf:
+        assert zf.testzip() is None
+        assert zf.comment == b'kept comment'
+    expected = dict(read_all(source), **replacements)
+    assert read_all(target) == expected
+    # 未修改的条目原样复制压缩数据
+    with zipfile.ZipFile(source) as before, zipfile.ZipFile(target) as after:
+        assert after.getinfo('raw_1.0.0/data.lua').compress_size == before.getinfo('raw_1.0.0/data.lua').compress_size
+
+
+def test_raw_zip_writer_new_entries(tmp_path):
+    target = tmp_path / 'new.zip'
+    with open(target, 'wb') as f:
+        writer = RawZipWriter(f)
+        writer.write_file('a/b.cfg', b'[a]\nb=c\n' * 100)
+        writer.write_file('a/empty.cfg', b'')
+        writer.close()
+    with zipfile.ZipFile(target) as zf:
+        assert zf.testzip() is None
+        assert zf.read('a/b.cfg') == b'[a]\nb=c\n' * 100
+        assert zf.read('a/empty.cfg') == b''
+
+
+def test_restore_delta_full_delta_chain(mods_dir):
+    zip_path = make_mod(mods_dir, 'chain', locales=LOCALES, assets=ASSETS)
+    versions = [zip_path.read_bytes()]
+    for mode, text in ((BACKUP_MODE_DELTA, 'first'), (BACKUP_MODE_FULL, 'second'), (BACKUP_MODE_DELTA, 'third')):
+        commit_mod_changes(zip_path, {('zh-CN', 'strings.cfg'): f"[item-name]\niron-plate={text}\n",
+                                      ('en', 'extra.cfg'): f"[a]\nb={text}\n"}, backup_mode=mode)
+        versions.append(zip_path.read_bytes())
+    assert read_locale_file(zip_path, 'zh-CN', 'strings.cfg') == "[item-name]\niron-plate=third\n"
+
+    backups = list_backups(zip_path)  # 最新的在前
+    assert [is_delta_backup(path) for path in backups] == [True, False, True]
+
+    # 还原最旧的增量备份：从完整备份开始应用，得到最初的文件；增量备份随之删除，完整备份保留
+    restore_backup(backups[-1])
+    assert zip_path.read_bytes() == versions[0]
+    assert list_backups(zip_path) == [backups[1]]
+
+
+def test_restore_newest_delta_then_full(mods_dir):
+    zip_path = make_mod(mods_dir, 'steps', locales=LOCALES, assets=ASSETS)
+    versions = [zip_path.read_bytes()]
+    for mode, text in ((BACKUP_MODE_FULL, 'first'), (BACKUP_MODE_DELTA, 'second')):
+        commit_mod_changes(zip_path, {('en', 'strings.cfg'): f"[item-name]\niron-plate={text}\n"}, backup_mode=mode)
+        versions.append(zip_path.read_bytes())
+
+    newest_delta, full = list_backups(zip_path)
+    restore_backup(newest_delta)
+    assert zip_path.read_bytes() == versions[1]
+    assert list_backups(zip_path) == [full]
+
+    restore_backup(full)
+    assert zip_path.read_bytes() == versions[0]